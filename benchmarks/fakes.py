@@ -0,0 +1,332 @@
+"""
+Local stand-ins for OpenAI, Anthropic, Drive and Sheets with configurable latency.
+OpenAI/Anthropic/Sheets are faked at the client level so the real AIService and SheetsService
+code paths run unchanged; Drive is faked at the service level over a local directory.
+"""
+import os
+import re
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import threading
+from types import SimpleNamespace
+import ffmpeg
+import httplib2
+from googleapiclient.errors import HttpError
+
+WORDS = ("this is a synthetic benchmark transcript used to exercise subtitle generation "
+         "and strategy prompts without calling any external service").split()
+
+
+class Latency:
+    """Fixed per-call latency plus an optional transfer rate (bytes/s) for payload-sized calls."""
+
+    def __init__(self, seconds=0.0, bytes_per_second=None):
+        self.seconds = seconds
+        self.bytes_per_second = bytes_per_second
+
+    def wait(self, payload_bytes=0):
+        delay = self.seconds
+        if self.bytes_per_second and payload_bytes:
+            delay += payload_bytes / self.bytes_per_second
+        if delay > 0:
+            time.sleep(delay)
+
+
+def _audio_duration(payload):
+    """Duration of the uploaded audio, probed from a temp copy."""
+    name, data = payload if isinstance(payload, tuple) else ("audio.mp3", payload)
+    if hasattr(data, 'read'):
+        data = data.read()
+    suffix = os.path.splitext(name)[1] or ".mp3"
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as tmp:
+        tmp.write(data)
+    try:
+        return float(ffmpeg.probe(tmp.name)['format']['duration']), len(data)
+    except Exception:
+        return len(data) * 8 / 128000, len(data)  # 128 kbps estimate
+    finally:
+        os.remove(tmp.name)
+
+
+def fake_transcript(duration, words_per_second=2.5):
+    """verbose_json-shaped transcript with evenly spaced word timestamps."""
+    words = []
+    step = 1.0 / words_per_second
+    t = 0.0
+    i = 0
+    while t + step <= duration:
+        words.append({"word": WORDS[i % len(WORDS)], "start": round(t, 2), "end": round(t + step * 0.9, 2)})
+        t += step
+        i += 1
+    text = " ".join(w["word"] for w in words)
+    return {
+        "text": text,
+        "duration": duration,
+        "language": "english",
+        "words": words,
+        "segments": [{"id": 0, "start": 0.0, "end": duration, "text": text}],
+    }
+
+
+class _Model(SimpleNamespace):
+    def model_dump(self):
+        return dict(self.__dict__)
+
+
+class FakeOpenAI:
+    def __init__(self, latency=None, **_):
+        latency = latency or Latency()
+
+        def create(model=None, file=None, **kwargs):
+            duration, size = _audio_duration(file)
+            latency.wait(size)
+            return _Model(**fake_transcript(duration))
+
+        self.audio = SimpleNamespace(transcriptions=SimpleNamespace(create=create))
+
+
+class FakeAnthropic:
+    def __init__(self, latency=None, **_):
+        latency = latency or Latency()
+
+        def create(**kwargs):
+            latency.wait()
+            strategy = {
+                "title": "Benchmark *FAST* Render",
+                "caption": "Synthetic caption",
+                "hashtags": "#bench #ffmpeg",
+                "tiktok_caption": "Synthetic TikTok caption",
+                "linkedin_post": "Synthetic LinkedIn post",
+            }
+            if kwargs.get('tools'):
+                block = SimpleNamespace(type="tool_use", id="toolu_bench", name=kwargs['tools'][0]['name'], input=strategy)
+            else:
+                block = SimpleNamespace(type="text", text=json.dumps(strategy))
+            return SimpleNamespace(content=[block],
+                                   usage=SimpleNamespace(input_tokens=0, output_tokens=0, cache_read_input_tokens=0))
+
+        self.messages = SimpleNamespace(create=create)
+
+
+class FakeDriveService:
+    """DriveService over local folders: folder_id -> directory."""
+
+    def __init__(self, folders, latency=None):
+        self.folders = folders
+        self.latency = latency or Latency()
+        self.service = True
+
+    def _file_entry(self, path):
+        with open(path, 'rb') as f:
+            md5 = hashlib.md5(f.read()).hexdigest()
+        file_id = hashlib.sha1(os.path.basename(path).encode()).hexdigest()[:16]
+        return {
+            'id': file_id,
+            'name': os.path.basename(path),
+            'webViewLink': f"file://{os.path.abspath(path)}",
+            'mimeType': 'video/mp4',
+            'md5Checksum': md5,
+            'size': str(os.path.getsize(path)),
+            '_path': path,
+        }
+
+    def list_files(self, folder_id):
+        self.latency.wait()
+        folder = self.folders[folder_id]
+        return [self._file_entry(os.path.join(folder, name))
+                for name in sorted(os.listdir(folder)) if name.endswith('.mp4')]
+
+    def download_file(self, file_id, destination_path):
+        for folder in self.folders.values():
+            for name in os.listdir(folder):
+                path = os.path.join(folder, name)
+                if name.endswith('.mp4') and self._file_entry(path)['id'] == file_id:
+                    self.latency.wait(os.path.getsize(path))
+                    shutil.copy(path, destination_path)
+                    return
+        raise FileNotFoundError(file_id)
+
+    def upload_file(self, file_path, folder_id):
+        self.latency.wait(os.path.getsize(file_path))
+        destination = os.path.join(self.folders[folder_id], os.path.basename(file_path))
+        shutil.copy(file_path, destination)
+        return {'id': hashlib.sha1(destination.encode()).hexdigest()[:16], 'webViewLink': f"file://{destination}"}
+
+
+def _col_to_index(col):
+    index = 0
+    for ch in col:
+        index = index * 26 + (ord(ch) - 64)
+    return index - 1
+
+
+def _parse_a1(range_name):
+    """"'Tab'!C5:H" -> (tab, col0, row0, col1, row1); missing bounds are None (0-based, inclusive)."""
+    tab, _, cells = range_name.rpartition('!')
+    tab = tab.strip("'")
+    if not tab:
+        tab, cells = cells.strip("'"), "A:ZZ"
+    m = re.fullmatch(r"([A-Z]+)?(\d+)?(?::([A-Z]+)?(\d+)?)?", cells)
+    c0, r0, c1, r1 = m.groups()
+    start_col = _col_to_index(c0) if c0 else 0
+    start_row = int(r0) - 1 if r0 else 0
+    end_col = _col_to_index(c1) if c1 else (start_col if ':' not in cells else None)
+    end_row = int(r1) - 1 if r1 else (start_row if ':' not in cells and r0 else None)
+    return tab, start_col, start_row, end_col, end_row
+
+
+def _http_error(status, message):
+    return HttpError(httplib2.Response({'status': status}), json.dumps({'error': {'code': status, 'message': message}}).encode())
+
+
+class _Request:
+    def __init__(self, fn, latency):
+        self.fn = fn
+        self.latency = latency
+
+    def execute(self, **_):
+        self.latency.wait()
+        return self.fn()
+
+
+class FakeSheetsBackend:
+    """In-memory spreadsheet implementing the subset of spreadsheets() the pipeline uses."""
+
+    def __init__(self, latency=None):
+        self.latency = latency or Latency()
+        self.tabs = {'Content Engine': [["Timestamp", "Original Link", "Final Link", "Platforms",
+                                         "Status", "Original ID", "Details Used", "Duration",
+                                         "Stage Breakdown", "Claim", "Lease Expires", "Variants", "Preview", "Cover"]],
+                     'Content Index': [["MD5", "Size", "Audio Fingerprint", "Original ID", "Final Link", "Filename", "Indexed At"]],
+                     'Backend Monitoring': []}
+        self.ids = {tab: i for i, tab in enumerate(self.tabs)}  # title -> sheetId
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def _sheet_id(self, tab):
+        if tab not in self.ids:
+            self.ids[tab] = max(self.ids.values(), default=-1) + 1
+        return self.ids[tab]
+
+    def _tab(self, sheet_gid):
+        tab = next((t for t, i in self.ids.items() if i == sheet_gid and t in self.tabs), None)
+        if tab is None:
+            raise _http_error(400, f"No grid with id: {sheet_gid}")
+        return tab
+
+    # --- grid helpers ---
+    def _read(self, range_name):
+        tab, c0, r0, c1, r1 = _parse_a1(range_name)
+        if tab not in self.tabs:
+            raise _http_error(400, f"Unable to parse range: {range_name}")
+        rows = self.tabs[tab]
+        r1 = len(rows) - 1 if r1 is None else min(r1, len(rows) - 1)
+        out = []
+        for row in rows[r0:r1 + 1]:
+            cells = row[c0:(None if c1 is None else c1 + 1)]
+            while cells and cells[-1] in ("", None):
+                cells = cells[:-1]
+            out.append(list(cells))
+        while out and not out[-1]:
+            out.pop()
+        return out
+
+    def _write(self, range_name, values):
+        tab, c0, r0, _, _ = _parse_a1(range_name)
+        rows = self.tabs.setdefault(tab, [])
+        for i, new_row in enumerate(values):
+            while len(rows) <= r0 + i:
+                rows.append([])
+            row = rows[r0 + i]
+            while len(row) < c0 + len(new_row):
+                row.append("")
+            row[c0:c0 + len(new_row)] = [str(v) for v in new_row]
+        return f"'{tab}'!A{r0 + 1}"
+
+    def _apply(self, request):
+        if 'addSheet' in request:
+            properties = request['addSheet']['properties']
+            self.tabs[properties['title']] = []
+            self.ids[properties['title']] = properties.get('sheetId', max(self.ids.values(), default=-1) + 1)
+            return {'addSheet': {'properties': {'sheetId': self.ids[properties['title']], 'title': properties['title']}}}
+        elif 'deleteSheet' in request:
+            tab = self._tab(request['deleteSheet']['sheetId'])
+            del self.tabs[tab], self.ids[tab]
+        elif 'updateCells' in request:
+            start = request['updateCells']['start']
+            values = [[next(iter(cell['userEnteredValue'].values())) for cell in row['values']]
+                      for row in request['updateCells']['rows']]
+            self._write(f"'{self._tab(start['sheetId'])}'!{chr(65 + start['columnIndex'])}{start['rowIndex'] + 1}", values)
+        elif 'deleteDimension' in request:
+            span = request['deleteDimension']['range']
+            rows = self.tabs[self._tab(span['sheetId'])]
+            del rows[span['startIndex']:span['endIndex']]
+        return {}
+
+    def _check(self, requests):
+        """spreadsheets().batchUpdate is all-or-nothing: reject the batch before applying any of it."""
+        titles = set(self.tabs)
+        for request in requests:
+            if 'addSheet' in request:
+                title = request['addSheet']['properties']['title']
+                if title in titles:
+                    raise _http_error(400, f'A sheet with the name "{title}" already exists.')
+                titles.add(title)
+
+    # --- spreadsheets().values() surface ---
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return self
+
+    def get(self, spreadsheetId=None, range=None, **_):
+        def run():
+            with self.lock:
+                self.calls += 1
+                if range is None:  # spreadsheets().get(): tab metadata
+                    return {'sheets': [{'properties': {'sheetId': self._sheet_id(tab), 'title': tab}} for tab in self.tabs]}
+                return {'range': range, 'values': self._read(range)}
+        return _Request(run, self.latency)
+
+    def batchGet(self, spreadsheetId=None, ranges=(), **_):
+        def run():
+            with self.lock:
+                self.calls += 1
+                return {'valueRanges': [{'range': r, 'values': self._read(r)} for r in ranges]}
+        return _Request(run, self.latency)
+
+    def update(self, spreadsheetId=None, range=None, body=None, **_):
+        def run():
+            with self.lock:
+                self.calls += 1
+                self._write(range, body['values'])
+                return {'updatedRange': range}
+        return _Request(run, self.latency)
+
+    def batchUpdate(self, spreadsheetId=None, body=None, **_):
+        def run():
+            with self.lock:
+                self.calls += 1
+                self._check(body.get('requests', []))
+                for entry in body.get('data', []):
+                    self._write(entry['range'], entry['values'])
+                # spreadsheets().batchUpdate()
+                replies = [self._apply(request) for request in body.get('requests', [])]
+                return {'totalUpdatedCells': sum(len(e['values']) for e in body.get('data', [])), 'replies': replies}
+        return _Request(run, self.latency)
+
+    def append(self, spreadsheetId=None, range=None, body=None, **_):
+        def run():
+            with self.lock:
+                self.calls += 1
+                tab = _parse_a1(range)[0]
+                rows = self.tabs.setdefault(tab, [])
+                start = len(rows)
+                for row in body['values']:
+                    rows.append([str(v) for v in row])
+                return {'updates': {'updatedRange': f"'{tab}'!A{start + 1}:Z{start + len(body['values'])}"}}
+        return _Request(run, self.latency)
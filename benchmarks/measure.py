@@ -0,0 +1,134 @@
+import os
+import time
+import resource
+import threading
+import functools
+from contextlib import contextmanager
+
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def _rss_bytes(pid):
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def _child_pids(pid):
+    pids = []
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children") as f:
+                pids.extend(int(p) for p in f.read().split())
+    except OSError:
+        pass
+    for child in list(pids):
+        pids.extend(_child_pids(child))
+    return pids
+
+
+def tree_rss_bytes():
+    """RSS of this process plus all descendants (ffmpeg runs as a child)."""
+    pid = os.getpid()
+    return _rss_bytes(pid) + sum(_rss_bytes(p) for p in _child_pids(pid))
+
+
+def _cpu_seconds():
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+class StageRecorder:
+    """
+    Records wall time, CPU time (self + reaped children) and peak RSS of the process tree per stage.
+    Peak RSS is sampled from /proc every `interval` seconds while a stage is open; on systems
+    without /proc it falls back to ru_maxrss, which is a lifetime high-water mark.
+    """
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.samples = []
+        self.lock = threading.Lock()
+        self._open = {}
+        self._stop = threading.Event()
+        self._sampler = None
+        self.has_proc = os.path.exists(f"/proc/{os.getpid()}/statm")
+
+    def start(self):
+        if self.has_proc and self._sampler is None:
+            self._sampler = threading.Thread(target=self._sample_loop, daemon=True)
+            self._sampler.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._sampler:
+            self._sampler.join()
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.interval):
+            rss = tree_rss_bytes()
+            with self.lock:
+                for key in self._open:
+                    self._open[key] = max(self._open[key], rss)
+
+    @contextmanager
+    def measure(self, stage, **labels):
+        key = object()
+        with self.lock:
+            self._open[key] = tree_rss_bytes() if self.has_proc else 0
+        wall_start = time.perf_counter()
+        cpu_start = _cpu_seconds()
+        ok = True
+        try:
+            yield
+        except Exception:
+            ok = False
+            raise
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = _cpu_seconds() - cpu_start
+            with self.lock:
+                peak = self._open.pop(key)
+            if not self.has_proc:
+                peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+            with self.lock:
+                self.samples.append({
+                    'stage': stage,
+                    'wall_s': round(wall, 4),
+                    'cpu_s': round(cpu, 4),
+                    'peak_rss_mb': round(peak / (1024 * 1024), 1),
+                    'ok': ok,
+                    **labels,
+                })
+
+    def wrap(self, obj, method_names, prefix, **labels):
+        """Replace obj.<method> with a measured wrapper for each name in method_names."""
+        for name in method_names:
+            original = getattr(obj, name)
+
+            @functools.wraps(original)
+            def wrapper(*args, _original=original, _stage=f"{prefix}.{name}", **kwargs):
+                with self.measure(_stage, **labels):
+                    return _original(*args, **kwargs)
+
+            setattr(obj, name, wrapper)
+        return obj
+
+    def summary(self):
+        """Aggregate samples by stage: count, total/mean wall, total CPU, max peak RSS."""
+        stages = {}
+        for s in self.samples:
+            agg = stages.setdefault(s['stage'], {'count': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'peak_rss_mb': 0.0, 'failures': 0})
+            agg['count'] += 1
+            agg['wall_s'] += s['wall_s']
+            agg['cpu_s'] += s['cpu_s']
+            agg['peak_rss_mb'] = max(agg['peak_rss_mb'], s['peak_rss_mb'])
+            agg['failures'] += 0 if s['ok'] else 1
+        for agg in stages.values():
+            agg['mean_wall_s'] = round(agg['wall_s'] / agg['count'], 4)
+            agg['wall_s'] = round(agg['wall_s'], 4)
+            agg['cpu_s'] = round(agg['cpu_s'], 4)
+        return stages
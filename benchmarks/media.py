@@ -0,0 +1,49 @@
+import os
+import ffmpeg
+
+# Short side / long side for each named resolution
+RESOLUTIONS = {
+    '480': (480, 854),
+    '720': (720, 1280),
+    '1080': (1080, 1920),
+}
+
+
+def synthetic_video_name(duration, resolution, orientation):
+    return f"bench_{orientation}_{resolution}p_{duration}s.mp4"
+
+
+def generate_synthetic_video(output_dir, duration, resolution='1080', orientation='portrait', fps=30):
+    """
+    Create (or reuse) a lavfi test video: moving testsrc2 pattern plus a 440Hz tone so that
+    every stage, including audio extraction, has real work to do.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, synthetic_video_name(duration, resolution, orientation))
+    if os.path.exists(output_path):
+        return output_path
+
+    short_side, long_side = RESOLUTIONS[str(resolution)]
+    width, height = (short_side, long_side) if orientation == 'portrait' else (long_side, short_side)
+
+    video = ffmpeg.input(f'testsrc2=size={width}x{height}:rate={fps}:duration={duration}', f='lavfi')
+    audio = ffmpeg.input(f'sine=frequency=440:sample_rate=44100:duration={duration}', f='lavfi')
+    (
+        ffmpeg
+        .output(video, audio, output_path, vcodec='libx264', preset='ultrafast',
+                pix_fmt='yuv420p', acodec='aac', shortest=None)
+        .overwrite_output()
+        .run(capture_stdout=True, capture_stderr=True)
+    )
+    return output_path
+
+
+def generate_matrix(output_dir, durations, resolutions, orientations):
+    """Every combination of duration x resolution x orientation. Returns a list of paths."""
+    paths = []
+    for duration in durations:
+        for resolution in resolutions:
+            for orientation in orientations:
+                print(f"🎞️  Synthetic video: {orientation} {resolution}p {duration}s")
+                paths.append(generate_synthetic_video(output_dir, duration, resolution, orientation))
+    return paths
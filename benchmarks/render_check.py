@@ -0,0 +1,431 @@
+"""
+Offline render equivalence checker for the Video Content Engine.
+
+Renders lavfi test media through a reference path (one lossless ffmpeg graph: subtitles then
+intro overlay) and through candidate paths (the production render functions, or any new fast
+mode registered in CANDIDATES), then checks each candidate against the reference:
+
+  * picture: SSIM / PSNR over every Nth frame (candidate scaled to the reference size)
+  * timing:  at every subtitle cue and overlay boundary (+/- tolerance) the candidate must show
+             something drawn exactly when the reference does
+  * stream:  duration and audio presence
+  * variants: every cropped platform variant (--variants) must still show the captions at each cue
+
+
+Regressions against the thresholds are listed and the exit code is 1:
+
+    python benchmarks/render_check.py --durations 12 --resolutions 720
+    python benchmarks/render_check.py --candidates pipeline --min-ssim 0.99
+    python benchmarks/render_check.py --variants square,vertical --orientations portrait,landscape
+"""
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import subprocess
+import tempfile
+
+import numpy as np
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(project_root, 'execution'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+bin_dir = os.path.join(project_root, 'bin')
+if os.path.exists(bin_dir):
+    os.environ["PATH"] += os.pathsep + bin_dir
+
+from media import generate_matrix
+from fakes import fake_transcript
+
+RESULTS_DIR = os.path.join(project_root, 'benchmarks', 'results')
+MEDIA_DIR = os.path.join(project_root, 'benchmarks', 'media_cache')
+
+# Intro overlay length in the test renders; subtitle cues start after it so each boundary is isolated
+OVERLAY_SECONDS = 2
+CUE_OFFSET = OVERLAY_SECONDS + 1
+# Slow fake speech: one word per 2.5s, each shown for 2.25s, leaving 0.25s gaps to time against
+WORDS_PER_SECOND = 0.4
+# Variant captions use long words: a three-word line is then wider than a 9:16 crop of a landscape frame
+LONG_WORDS = ["INTERNATIONALLY", "UNDERSTANDABLE", "CONGRATULATIONS"]
+# Timing probes are compared as small grayscale frames split into square blocks;
+# a block whose mean difference from the source exceeds DRAWN_LEVEL means something is drawn there
+PROBE_SHORT_SIDE = 180
+PROBE_BLOCK = 10
+DRAWN_LEVEL = 24.0
+
+# Minimum SSIM / PSNR per candidate (lossy and downscaled outputs get looser bounds)
+THRESHOLDS = {
+    'pipeline': {'ssim': 0.97, 'psnr': 35.0},
+    'lite': {'ssim': 0.93, 'psnr': 30.0},
+    'preview': {'ssim': 0.85, 'psnr': 26.0},
+}
+DEFAULT_THRESHOLD = {'ssim': 0.97, 'psnr': 35.0}
+# Allowed output duration difference, seconds
+DURATION_TOLERANCE = 0.1
+
+SSIM_RE = re.compile(r"All:([\d.]+)")
+PSNR_RE = re.compile(r"PSNR .*average:([\d.]+|inf)")
+
+
+def _csv(value, cast=str):
+    return [cast(v) for v in value.split(',') if v]
+
+
+def timed_transcript(duration, words=None):
+    """fake_transcript at WORDS_PER_SECOND, shifted to start after the intro overlay (optionally with other words)."""
+    transcript = fake_transcript(duration - CUE_OFFSET - 0.5, WORDS_PER_SECOND)
+    for i, word in enumerate(transcript['words']):
+        word['start'] = round(word['start'] + CUE_OFFSET, 2)
+        word['end'] = round(word['end'] + CUE_OFFSET, 2)
+        if words:
+            word['word'] = words[i % len(words)]
+    return transcript
+
+
+def _ass_seconds(stamp):
+    hours, minutes, seconds = stamp.split(':')
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def cue_times(ass_content):
+    """(start, end) of every Dialogue event, merged where events touch."""
+    cues = []
+    for line in ass_content.splitlines():
+        if line.startswith("Dialogue:"):
+            fields = line.split(',', 3)
+            start, end = _ass_seconds(fields[1]), _ass_seconds(fields[2])
+            if cues and start <= cues[-1][1] + 0.01:
+                cues[-1] = (cues[-1][0], max(end, cues[-1][1]))
+            else:
+                cues.append((start, end))
+    return cues
+
+
+def probe_points(cues, tolerance):
+    """Times just inside and just outside each drawn interval, with the state the schedule expects."""
+    points = []
+    for start, end in cues:
+        points += [(start - tolerance, False), (start + tolerance, True), (end - tolerance, True), (end + tolerance, False)]
+    return [(round(t, 3), drawn) for t, drawn in points if t > 0]
+
+
+# --- Renders ---------------------------------------------------------------
+
+def render_reference(renderer, video, ass_path, overlay_path, output_path, metadata):
+    """One graph, lossless encode, audio copied: the picture every candidate is measured against."""
+    chain = (f"[0:v]{renderer._subtitles_filter(ass_path)}[subs];"
+             f"[subs][1:v]overlay=x=0:y=0:enable='between(t,0,{OVERLAY_SECONDS})'[v]")
+    renderer._run_ffmpeg(['ffmpeg', '-i', video, '-i', overlay_path, '-filter_complex', chain, '-map', '[v]',
+                          '-map', '0:a?', '-c:a', 'copy', '-c:v', 'libx264', '-preset', 'ultrafast', '-qp', '0',
+                          output_path, '-y'])
+    return output_path
+
+
+def render_pipeline(renderer, video, ass_path, overlay_path, output_path, metadata):
+    """What main.py does for a short portrait video: burn subtitles, then apply the intro overlay."""
+    from services.renderer import rendered_metadata
+    subtitled = output_path.replace('.mp4', '_subtitled.mp4')
+    renderer.burn_subtitles(video, ass_path, subtitled, source=metadata)
+    return renderer.apply_intro_overlay(subtitled, overlay_path, output_path, duration=OVERLAY_SECONDS,
+                                        source=rendered_metadata(metadata))
+
+
+def render_lite(renderer, video, ass_path, overlay_path, output_path, metadata):
+    """The 'lite' variant split from the overlay render."""
+    from services.renderer import rendered_metadata
+    subtitled = output_path.replace('.mp4', '_subtitled.mp4')
+    renderer.burn_subtitles(video, ass_path, subtitled, source=metadata)
+    main_path = output_path.replace('.mp4', '_main.mp4')
+    renderer.apply_intro_overlay(subtitled, overlay_path, main_path, duration=OVERLAY_SECONDS,
+                                 variants={'lite': output_path}, source=rendered_metadata(metadata))
+    return output_path if os.path.exists(output_path) else None
+
+
+def render_preview(renderer, video, ass_path, overlay_path, output_path, metadata):
+    return renderer.render_preview(video, ass_path, output_path, metadata['width'], metadata['height'],
+                                   overlay_path, duration=OVERLAY_SECONDS)
+
+
+# Candidate name -> render function(renderer, video, ass_path, overlay_path, output_path, metadata) -> path or None.
+# Register a new fast mode here (and in THRESHOLDS) to check it against the reference.
+CANDIDATES = {
+    'pipeline': render_pipeline,
+    'lite': render_lite,
+    'preview': render_preview,
+}
+
+
+# --- Comparisons -----------------------------------------------------------
+
+def compare_frames(reference, candidate, width, height, sample_every, work_dir):
+    """SSIM / PSNR of every `sample_every`th frame. Returns mean SSIM, worst-frame SSIM and mean PSNR."""
+    stats_path = os.path.join(work_dir, 'ssim_stats.txt')
+    select = f"select='not(mod(n\\,{sample_every}))'"
+    graph = (f"[0:v]scale={width}:{height}:flags=bicubic,format=yuv420p,{select},split[c1][c2];"
+             f"[1:v]format=yuv420p,{select},split[r1][r2];"
+             f"[c1][r1]ssim=stats_file={stats_path};[c2][r2]psnr")
+    result = subprocess.run(['ffmpeg', '-nostdin', '-i', candidate, '-i', reference, '-lavfi', graph, '-f', 'null', '-'],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Frame comparison failed: {result.stderr[-500:]}")
+
+    with open(stats_path) as f:
+        frame_ssim = [float(m.group(1)) for m in (SSIM_RE.search(line) for line in f) if m]
+    psnr = PSNR_RE.search(result.stderr)
+    return {
+        'frames': len(frame_ssim),
+        'ssim': round(sum(frame_ssim) / len(frame_ssim), 4) if frame_ssim else 0.0,
+        'ssim_min': round(min(frame_ssim), 4) if frame_ssim else 0.0,
+        'psnr': float(psnr.group(1)) if psnr else 0.0,
+    }
+
+
+def probe_size(width, height):
+    """Small even size with the video's aspect ratio, for timing probes."""
+    if width < height:
+        return PROBE_SHORT_SIDE, int(PROBE_SHORT_SIDE * height / width) // 2 * 2
+    return int(PROBE_SHORT_SIDE * width / height) // 2 * 2, PROBE_SHORT_SIDE
+
+
+def grab_frame(path, t, size, prefilter=None):
+    """Grayscale frame shown at t (after `prefilter`, e.g. a variant crop), scaled to size, as a float array."""
+    width, height = size
+    vf = f"scale={width}:{height},format=gray"
+    if prefilter:
+        vf = f"{prefilter},{vf}"
+    result = subprocess.run(['ffmpeg', '-nostdin', '-loglevel', 'error', '-ss', f"{t:.3f}", '-i', path, '-frames:v', '1',
+                             '-vf', vf, '-f', 'rawvideo', 'pipe:1'],
+                            capture_output=True, check=True)
+    return np.frombuffer(result.stdout, dtype=np.uint8)[:width * height].reshape(height, width).astype(np.float32)
+
+
+def drawn_blocks(frame, source_frame):
+    """Boolean grid of PROBE_BLOCK squares where `frame` differs from the source enough to be burned-in text or overlay."""
+    height, width = frame.shape
+    rows, cols = height // PROBE_BLOCK, width // PROBE_BLOCK
+    diff = np.abs(frame - source_frame)[:rows * PROBE_BLOCK, :cols * PROBE_BLOCK]
+    return diff.reshape(rows, PROBE_BLOCK, cols, PROBE_BLOCK).mean(axis=(1, 3)) > DRAWN_LEVEL
+
+
+def drawn(frame, source_frame):
+    """True if some block of `frame` differs from the source enough to be burned-in text or overlay."""
+    return bool(drawn_blocks(frame, source_frame).any())
+
+
+def check_timing(source, reference, candidate, points, size):
+    """
+    Drawn / not drawn at each probe point, for reference and candidate. A point where the candidate
+    disagrees with the reference is a timing miss; reference misses against the schedule are
+    reported too (they mean the probe itself is off, not the candidate).
+    """
+    misses = []
+    reference_misses = []
+    for t, expected in points:
+        source_frame = grab_frame(source, t, size)
+        reference_drawn = drawn(grab_frame(reference, t, size), source_frame)
+        candidate_drawn = drawn(grab_frame(candidate, t, size), source_frame)
+        if reference_drawn != expected:
+            reference_misses.append(t)
+        if candidate_drawn != reference_drawn:
+            misses.append({'t': t, 'reference': reference_drawn, 'candidate': candidate_drawn})
+    return {'points': len(points), 'misses': misses, 'reference_misses': reference_misses}
+
+
+def render_variants(renderer, video, ass_path, overlay_path, work_dir, metadata, names):
+    """
+    Variants the way main.py makes them for these test videos: portrait (short) ones from the intro
+    overlay render, landscape ones from the subtitle burn. Returns {name: path}.
+    """
+    from services.renderer import rendered_metadata
+    stem = os.path.splitext(os.path.basename(video))[0]
+    paths = {name: os.path.join(work_dir, f"{stem}_variant_{name}.mp4") for name in names}
+    subtitled = os.path.join(work_dir, f"{stem}_variant_main.mp4")
+    if metadata['orientation'] == 'portrait':
+        renderer.burn_subtitles(video, ass_path, subtitled, source=metadata)
+        renderer.apply_intro_overlay(subtitled, overlay_path, os.path.join(work_dir, f"{stem}_variant_final.mp4"),
+                                     duration=OVERLAY_SECONDS, variants=paths, source=rendered_metadata(metadata),
+                                     clean=(video, ass_path))
+    else:
+        renderer.burn_subtitles(video, ass_path, subtitled, variants=paths, source=metadata)
+    return paths
+
+
+def check_captions(source, variant, name, cues, metadata):
+    """
+    Cue midpoints where the variant's lower half shows no caption over the source cropped the same way
+    (misses), or one that runs into the left/right edge of the frame (clipped: the style keeps side margins).
+    """
+    from services.renderer import VARIANT_FILTERS, variant_size
+    width, height = variant_size(name, metadata['width'], metadata['height'])
+    size = probe_size(width, height)
+    misses, clipped = [], []
+    for start, end in cues:
+        t = round((start + end) / 2, 3)
+        lower = size[1] // 2
+        blocks = drawn_blocks(grab_frame(variant, t, size)[lower:], grab_frame(source, t, size, VARIANT_FILTERS[name])[lower:])
+        if not blocks.any():
+            misses.append(t)
+        elif blocks[:, 0].any() or blocks[:, -1].any():
+            clipped.append(t)
+    return {'cues': len(cues), 'misses': misses, 'clipped': clipped}
+
+
+def _stream_info(path):
+    from services.video_analysis import VideoAnalyzer
+    metadata = VideoAnalyzer.get_metadata(path) or {}
+    return metadata.get('duration', 0.0), bool(metadata.get('audio_codecs'))
+
+
+# --- Runner ----------------------------------------------------------------
+
+def check_video(renderer, video, candidates, args, work_dir):
+    from services.video_analysis import VideoAnalyzer
+    from services.subtitle_utils import json_to_ass_karaoke
+
+    metadata = VideoAnalyzer.get_metadata(video)
+    stem = os.path.splitext(os.path.basename(video))[0]
+    ass_content = json_to_ass_karaoke(timed_transcript(metadata['duration']))
+    ass_path = os.path.join(work_dir, f"{stem}.ass")
+    with open(ass_path, "w", encoding="utf-8") as f:
+        f.write(ass_content)
+    overlay_path = os.path.join(work_dir, f"{stem}_overlay.png")
+    renderer.create_intro_overlay("Render *CHECK* Title", metadata['width'], metadata['height'], overlay_path)
+
+    reference = render_reference(renderer, video, ass_path, overlay_path, os.path.join(work_dir, f"{stem}_reference.mp4"), metadata)
+    reference_duration, reference_audio = _stream_info(reference)
+    points = probe_points([(0, OVERLAY_SECONDS)] + cue_times(ass_content), args.timing_tolerance)
+    size = probe_size(metadata['width'], metadata['height'])
+
+    results = []
+    for name in candidates:
+        print(f"🔍 {stem}: {name}")
+        output_path = os.path.join(work_dir, f"{stem}_{name}.mp4")
+        started = time.perf_counter()
+        rendered = CANDIDATES[name](renderer, video, ass_path, overlay_path, output_path, metadata)
+        result = {'video': os.path.basename(video), 'candidate': name, 'render_s': round(time.perf_counter() - started, 2)}
+        if not (rendered and os.path.exists(rendered)):
+            result['regressions'] = ["render failed"]
+            results.append(result)
+            continue
+
+        threshold = dict(THRESHOLDS.get(name, DEFAULT_THRESHOLD))
+        if args.min_ssim is not None:
+            threshold['ssim'] = args.min_ssim
+        if args.min_psnr is not None:
+            threshold['psnr'] = args.min_psnr
+        duration, audio = _stream_info(rendered)
+        result.update(compare_frames(reference, rendered, metadata['width'], metadata['height'], args.sample_every, work_dir))
+        result['timing'] = check_timing(video, reference, rendered, points, size)
+        result['duration_delta'] = round(duration - reference_duration, 3)
+
+        regressions = []
+        if result['ssim'] < threshold['ssim']:
+            regressions.append(f"SSIM {result['ssim']} < {threshold['ssim']}")
+        if result['psnr'] < threshold['psnr']:
+            regressions.append(f"PSNR {result['psnr']} < {threshold['psnr']}")
+        if result['timing']['misses']:
+            regressions.append(f"timing: {len(result['timing']['misses'])}/{result['timing']['points']} probes differ "
+                               f"(first at {result['timing']['misses'][0]['t']}s)")
+        if abs(result['duration_delta']) > DURATION_TOLERANCE:
+            regressions.append(f"duration off by {result['duration_delta']}s")
+        if audio != reference_audio:
+            regressions.append("audio stream missing" if reference_audio else "unexpected audio stream")
+        result['threshold'] = threshold
+        result['regressions'] = regressions
+        results.append(result)
+
+    names = _csv(args.variants)
+    if names:
+        print(f"🔍 {stem}: variants {', '.join(names)}")
+        variant_ass = json_to_ass_karaoke(timed_transcript(metadata['duration'], LONG_WORDS))
+        variant_ass_path = os.path.join(work_dir, f"{stem}_long.ass")
+        with open(variant_ass_path, "w", encoding="utf-8") as f:
+            f.write(variant_ass)
+        cues = cue_times(variant_ass)
+        for name, path in render_variants(renderer, video, variant_ass_path, overlay_path, work_dir, metadata, names).items():
+            result = {'video': os.path.basename(video), 'candidate': name}
+            if not os.path.exists(path):
+                result['regressions'] = ["render failed"]
+            else:
+                result['captions'] = check_captions(video, path, name, cues, metadata)
+                regressions = []
+                for kind in ('misses', 'clipped'):
+                    times = result['captions'][kind]
+                    if times:
+                        label = "missing" if kind == 'misses' else "clipped"
+                        regressions.append(f"captions {label} at {len(times)}/{len(cues)} cues (first at {times[0]}s)")
+                result['regressions'] = regressions
+            results.append(result)
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline render equivalence check (reference vs candidate renders)")
+    parser.add_argument('--durations', default='12', help="Comma-separated seconds")
+    parser.add_argument('--resolutions', default='720', help="Comma-separated: 480, 720, 1080")
+    parser.add_argument('--orientations', default='portrait,landscape')
+    parser.add_argument('--candidates', default=",".join(CANDIDATES), help=f"Comma-separated, from: {', '.join(CANDIDATES)}")
+    parser.add_argument('--variants', default='vertical,square',
+                        help="Comma-separated cropped variants whose captions are checked (empty to skip)")
+    parser.add_argument('--sample-every', type=int, default=10, help="Compare every Nth frame")
+    parser.add_argument('--min-ssim', type=float, help="Override every candidate's SSIM threshold")
+    parser.add_argument('--min-psnr', type=float, help="Override every candidate's PSNR threshold (dB)")
+    parser.add_argument('--timing-tolerance', type=float, default=0.07,
+                        help="Seconds before/after each cue and overlay boundary that are probed")
+    parser.add_argument('--keep', action='store_true', help="Keep the rendered files (path is printed)")
+    parser.add_argument('--output', help="Results JSON path (default: benchmarks/results/render_check_<timestamp>.json)")
+    return parser.parse_args(argv)
+
+
+def run(args):
+    from services.renderer import RenderService
+
+    candidates = _csv(args.candidates)
+    unknown = [name for name in candidates if name not in CANDIDATES]
+    if unknown:
+        raise SystemExit(f"Unknown candidates: {', '.join(unknown)}")
+    durations = _csv(args.durations, int)
+    if min(durations) <= CUE_OFFSET + 2:
+        raise SystemExit(f"Durations must be over {CUE_OFFSET + 2}s to fit the overlay and subtitle cues")
+
+    videos = generate_matrix(MEDIA_DIR, durations, _csv(args.resolutions), _csv(args.orientations))
+    renderer = RenderService()
+    work_dir = tempfile.mkdtemp(prefix='render_check_')
+    results = []
+    try:
+        for video in videos:
+            results += check_video(renderer, video, candidates, args, work_dir)
+    finally:
+        if args.keep:
+            print(f"📁 Renders kept in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"render_check_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({'meta': {'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'args': vars(args)}, 'results': results}, f, indent=2)
+
+    print("\n📊 Render check (mean SSIM / worst SSIM / PSNR / timing misses):")
+    failed = [r for r in results if r['regressions']]
+    for r in results:
+        if 'ssim' in r:
+            line = (f"   {r['video']:<34}{r['candidate']:<10}{r['ssim']:>8.4f}{r['ssim_min']:>8.4f}{r['psnr']:>8.2f}dB"
+                    f"{len(r['timing']['misses']):>4}/{r['timing']['points']}")
+        else:
+            line = f"   {r['video']:<34}{r['candidate']:<10}"
+        print(line + ("  ❌ " + "; ".join(r['regressions']) if r['regressions'] else "  ✅"))
+    for r in results:
+        if r.get('timing', {}).get('reference_misses'):
+            print(f"⚠️  Reference missed the schedule at {r['timing']['reference_misses']} ({r['video']}); check DRAWN_LEVEL")
+            break
+    print(f"💾 Results written to {output}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(run(parse_args()))
@@ -0,0 +1,274 @@
+"""
+Offline benchmark suite for the Video Content Engine.
+
+Generates lavfi test media, stubs every external API with local fakes (configurable latency),
+then measures each RenderService / subtitle_utils function and the full main() pipeline.
+Results (per-stage wall time, CPU time and peak RSS) are written to JSON so runs can be diffed:
+
+    python benchmarks/run_benchmarks.py --durations 15,200 --resolutions 720,1080
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/<previous>.json
+    python benchmarks/run_benchmarks.py --transcribe-backend local --compare <api run>.json   # local vs API Whisper
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import subprocess
+import tempfile
+from types import SimpleNamespace
+
+# Setup paths (same convention as the debug scripts: run from the project root)
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(project_root, 'execution'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+bin_dir = os.path.join(project_root, 'bin')
+if os.path.exists(bin_dir):
+    os.environ["PATH"] += os.pathsep + bin_dir
+
+from media import generate_matrix
+from fakes import Latency, FakeOpenAI, FakeAnthropic, FakeDriveService, FakeSheetsBackend, fake_transcript
+from measure import StageRecorder
+
+RESULTS_DIR = os.path.join(project_root, 'benchmarks', 'results')
+MEDIA_DIR = os.path.join(project_root, 'benchmarks', 'media_cache')
+
+
+def _csv(value, cast=str):
+    return [cast(v) for v in value.split(',') if v]
+
+
+def _install_api_fakes(args):
+    """Point AIService at fake OpenAI/Anthropic clients (the real AIService code still runs)."""
+    from services import ai_generation
+    openai_latency = Latency(args.openai_latency, args.upload_bandwidth_mbps * 125000)
+    anthropic_latency = Latency(args.anthropic_latency)
+    ai_generation.OpenAI = lambda **kw: FakeOpenAI(openai_latency)
+    ai_generation.anthropic = SimpleNamespace(
+        Anthropic=lambda **kw: FakeAnthropic(anthropic_latency),
+        AsyncAnthropic=lambda **kw: FakeAnthropic(anthropic_latency),
+    )
+
+
+def bench_stages(recorder, videos, work_dir, repeat, transcribe_backend='openai'):
+    """Measure every RenderService and subtitle_utils function on each synthetic video."""
+    from services.video_analysis import VideoAnalyzer
+    from services.renderer import RenderService
+    from services.ai_generation import AIService
+    from services import subtitle_utils
+
+    renderer = RenderService()
+    ai = AIService(transcribe_backend=transcribe_backend)
+
+    for video in videos:
+        labels = {'video': os.path.basename(video)}
+        print(f"⏱️  Stage benchmarks: {labels['video']}")
+        with recorder.measure('analyze.get_metadata', **labels):
+            metadata = VideoAnalyzer.get_metadata(video)
+        if not metadata:
+            print(f"❌ Could not probe {video}, skipping")
+            continue
+        labels.update(orientation=metadata['orientation'], height=metadata['height'], duration=metadata['duration'])
+
+        with recorder.measure('ai.transcribe_audio', backend=transcribe_backend, **labels):
+            ai.transcribe_audio(video)
+
+        transcript = fake_transcript(metadata['duration'])
+        for _ in range(repeat):
+            with recorder.measure('subtitles.json_to_ass_karaoke', **labels):
+                ass_content = subtitle_utils.json_to_ass_karaoke(transcript)
+            with recorder.measure('subtitles.json_to_ass_modern', **labels):
+                subtitle_utils.json_to_ass_modern(transcript)
+            with recorder.measure('subtitles.json_to_srt', **labels):
+                subtitle_utils.json_to_srt(transcript)
+
+        stem = os.path.splitext(os.path.basename(video))[0]
+        ass_path = os.path.join(work_dir, f"{stem}.ass")
+        overlay_path = os.path.join(work_dir, f"{stem}_overlay.png")
+        subtitled_path = os.path.join(work_dir, f"{stem}_subtitled.mp4")
+        final_path = os.path.join(work_dir, f"{stem}_final.mp4")
+        with open(ass_path, "w", encoding="utf-8") as f:
+            f.write(ass_content)
+
+        with recorder.measure('render.create_intro_overlay', **labels):
+            renderer.create_intro_overlay("Benchmark *FAST* Render Title", metadata['width'], metadata['height'], overlay_path)
+        with recorder.measure('render.burn_subtitles', **labels):
+            renderer.burn_subtitles(video, ass_path, subtitled_path)
+        with recorder.measure('render.apply_intro_overlay', **labels):
+            renderer.apply_intro_overlay(subtitled_path if os.path.exists(subtitled_path) else video, overlay_path, final_path)
+
+    if transcribe_backend == 'local' and len(videos) > 1:
+        # Cross-video throughput: every video through the one loaded model at once
+        from services.local_transcriber import get_local_transcriber
+        with recorder.measure('local.transcribe_many', videos=len(videos)):
+            get_local_transcriber().transcribe_many(videos)
+
+
+def bench_pipeline(recorder, videos, work_dir, args):
+    """Run the real main() end to end against local fakes for Drive, Sheets, OpenAI and Anthropic."""
+    import main as pipeline
+    from services import journal, artifacts
+    from services.sheets import SheetsService, get_journal_syncer
+
+    upload_dir = os.path.join(work_dir, 'upload')
+    final_dir = os.path.join(work_dir, 'final')
+    os.makedirs(upload_dir, exist_ok=True)
+    os.makedirs(final_dir, exist_ok=True)
+    for video in videos:
+        shutil.copy(video, upload_dir)
+
+    folders = {'bench-upload': upload_dir, 'bench-final': final_dir}
+    drive_latency = Latency(args.drive_latency, args.drive_bandwidth_mbps * 125000)
+    sheets_backend = FakeSheetsBackend(Latency(args.sheets_latency))
+    # Journaled writes are replayed into the fake sheet by the background syncer
+    journal.JOURNAL_PATH = os.path.join(work_dir, 'journal.db')
+    syncer = get_journal_syncer()
+    if syncer.journal.path != journal.JOURNAL_PATH:
+        syncer.journal = journal.Journal()
+    syncer.service = sheets_backend
+    artifacts.ARTIFACT_DIR = os.path.join(work_dir, 'artifacts')
+
+    original = (pipeline.DriveService, pipeline.SheetsService, pipeline.AIService,
+                pipeline.RenderService, pipeline.VideoAnalyzer)
+    AIService, RenderService, VideoAnalyzer = original[2], original[3], original[4]
+
+    def make_sheets():
+        sheets = SheetsService()
+        sheets.service = sheets_backend
+        return recorder.wrap(sheets, ['log_processing_start', 'update_log_completion', 'get_processed_ids', 'update_status'], 'pipeline.sheets')
+
+    pipeline.DriveService = lambda: recorder.wrap(FakeDriveService(folders, drive_latency), ['list_files', 'download_file', 'upload_file'], 'pipeline.drive')
+    pipeline.SheetsService = make_sheets
+    pipeline.AIService = lambda: recorder.wrap(AIService(), ['transcribe_audio', 'generate_content_strategy'], 'pipeline.ai')
+    pipeline.RenderService = lambda: recorder.wrap(RenderService(), ['create_intro_overlay', 'burn_subtitles', 'apply_intro_overlay'], 'pipeline.render')
+    pipeline.VideoAnalyzer = lambda: recorder.wrap(VideoAnalyzer(), ['get_metadata'], 'pipeline.analyze')
+
+    os.environ.update({
+        'GOOGLE_SHEET_ID': 'bench-sheet',
+        'GOOGLE_DRIVE_FOLDER_ID_UPLOAD': 'bench-upload',
+        'GOOGLE_DRIVE_FOLDER_ID_FINAL': 'bench-final',
+        'MAX_VIDEOS_PER_RUN': str(len(videos)),
+    })
+    try:
+        with recorder.measure('pipeline.main', videos=len(videos)):
+            exit_code = pipeline.main()
+    finally:
+        (pipeline.DriveService, pipeline.SheetsService, pipeline.AIService,
+         pipeline.RenderService, pipeline.VideoAnalyzer) = original
+
+    return {
+        'exit_code': exit_code,
+        'videos': len(videos),
+        'uploaded': len(os.listdir(final_dir)),
+        'artifacts': len(os.listdir(artifacts.ARTIFACT_DIR)) if os.path.isdir(artifacts.ARTIFACT_DIR) else 0,
+        'sheets_calls': sheets_backend.calls,
+        'sheet_rows': sheets_backend.tabs['Content Engine'][1:],
+        'dashboard_summary': sheets_backend.tabs.get('Dashboard Summary', []),
+    }
+
+
+def _environment():
+    try:
+        ffmpeg_version = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True).stdout.splitlines()[0]
+    except Exception:
+        ffmpeg_version = None
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, cwd=project_root).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'ffmpeg': ffmpeg_version,
+        'commit': commit,
+    }
+
+
+def compare(current, previous_path):
+    """Print mean wall-time deltas per stage against a previous results file."""
+    with open(previous_path) as f:
+        previous = json.load(f)
+    print(f"\n📈 Compared with {previous_path} ({previous['meta'].get('commit')}):")
+    print(f"   {'stage':<38}{'before':>10}{'after':>10}{'delta':>9}")
+    for stage, after in sorted(current['stages'].items()):
+        before = previous['stages'].get(stage)
+        if not before:
+            print(f"   {stage:<38}{'-':>10}{after['mean_wall_s']:>10.3f}{'new':>9}")
+            continue
+        delta = (after['mean_wall_s'] - before['mean_wall_s']) / before['mean_wall_s'] * 100 if before['mean_wall_s'] else 0.0
+        print(f"   {stage:<38}{before['mean_wall_s']:>10.3f}{after['mean_wall_s']:>10.3f}{delta:>+8.1f}%")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline Video Content Engine benchmarks")
+    parser.add_argument('--durations', default='15,200', help="Comma-separated seconds (>180s is the 'long' category)")
+    parser.add_argument('--resolutions', default='720,1080', help="Comma-separated: 480, 720, 1080")
+    parser.add_argument('--orientations', default='portrait,landscape')
+    parser.add_argument('--repeat', type=int, default=3, help="Repetitions of the pure-Python subtitle functions")
+    parser.add_argument('--openai-latency', type=float, default=1.5, help="Seconds per fake Whisper call")
+    parser.add_argument('--anthropic-latency', type=float, default=2.0, help="Seconds per fake Claude call")
+    parser.add_argument('--drive-latency', type=float, default=0.2, help="Seconds per fake Drive call")
+    parser.add_argument('--sheets-latency', type=float, default=0.3, help="Seconds per fake Sheets call")
+    parser.add_argument('--drive-bandwidth-mbps', type=float, default=200.0)
+    parser.add_argument('--upload-bandwidth-mbps', type=float, default=50.0, help="Fake Whisper upload bandwidth")
+    parser.add_argument('--transcribe-backend', choices=['openai', 'local'], default='openai',
+                        help="'local' runs faster-whisper on CPU instead of the fake Whisper API")
+    parser.add_argument('--real-quotas', action='store_true', help="Keep production rate limits instead of lifting them")
+    parser.add_argument('--skip-stages', action='store_true')
+    parser.add_argument('--skip-pipeline', action='store_true')
+    parser.add_argument('--output', help="Results JSON path (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument('--compare', help="Previous results JSON to diff against")
+    return parser.parse_args(argv)
+
+
+def run(args):
+    if not args.real_quotas:
+        # Measure our code, not the production quotas
+        for api in ('OPENAI', 'ANTHROPIC', 'DRIVE', 'SHEETS'):
+            os.environ.setdefault(f'RATE_LIMIT_{api}_RPS', '1000')
+            os.environ.setdefault(f'RATE_LIMIT_{api}_BURST', '1000')
+
+    _install_api_fakes(args)
+    from services import ai_generation
+    ai_generation.TRANSCRIBE_BACKEND = args.transcribe_backend
+    videos = generate_matrix(MEDIA_DIR, _csv(args.durations, int), _csv(args.resolutions), _csv(args.orientations))
+
+    recorder = StageRecorder()
+    recorder.start()
+    results = {'meta': {'started_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'args': vars(args), **_environment()}}
+    work_dir = tempfile.mkdtemp(prefix='bench_')
+    try:
+        if not args.skip_stages:
+            stage_dir = os.path.join(work_dir, 'stages')
+            os.makedirs(stage_dir)
+            bench_stages(recorder, videos, stage_dir, args.repeat, args.transcribe_backend)
+        if not args.skip_pipeline:
+            results['pipeline'] = bench_pipeline(recorder, videos, os.path.join(work_dir, 'pipeline'), args)
+    finally:
+        recorder.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    results['stages'] = recorder.summary()
+    results['samples'] = recorder.samples
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d_%H%M%S')}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    print("\n📊 Benchmark summary (mean wall / total CPU / peak RSS):")
+    for stage, agg in sorted(results['stages'].items()):
+        print(f"   {stage:<38}{agg['mean_wall_s']:>9.3f}s {agg['cpu_s']:>9.3f}s {agg['peak_rss_mb']:>8.1f}MB  x{agg['count']}")
+    print(f"💾 Results written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+    return results
+
+
+if __name__ == "__main__":
+    run(parse_args())
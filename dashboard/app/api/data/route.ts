@@ -4,6 +4,54 @@ import path from 'path';
 
 export const dynamic = 'force-dynamic';
 
+// 'Dashboard Summary' layout written by the engine (execution/services/dashboard_summary.py), 0-based rows
+const SUMMARY_RANGE = "'Dashboard Summary'!A1:H54";
+const TOTALS_ROW = 1, PLATFORM_ROW = 10, STAGE_ROW = 22, ACTIVITY_ROW = 44;
+const MAX_PLATFORMS = 10, MAX_STAGES = 20, ACTIVITY_SIZE = 10;
+
+// Fixed-size payload: the engine keeps these aggregates up to date as videos finish
+function fromSummary(rows: any[][]) {
+    const cell = (r: number, c: number) => rows[r]?.[c] ?? '';
+    const number = (r: number, c: number) => Number(String(cell(r, c)).replace(/,/g, '')) || 0;
+
+    const platformDistribution = [];
+    for (let r = PLATFORM_ROW; r < PLATFORM_ROW + MAX_PLATFORMS; r++) {
+        if (cell(r, 0)) platformDistribution.push({ name: cell(r, 0), value: number(r, 1) });
+    }
+
+    const stageTimes = [];
+    for (let r = STAGE_ROW; r < STAGE_ROW + MAX_STAGES; r++) {
+        if (cell(r, 0)) stageTimes.push({ stage: cell(r, 0), count: number(r, 1), p50: number(r, 2), p90: number(r, 3), p99: number(r, 4) });
+    }
+
+    // Stored newest first
+    const activity = [];
+    for (let r = ACTIVITY_ROW; r < ACTIVITY_ROW + ACTIVITY_SIZE; r++) {
+        if (!cell(r, 0)) continue;
+        activity.push({
+            timestamp: cell(r, 0),
+            title: cell(r, 1),
+            status: cell(r, 2),
+            platforms: cell(r, 3),
+            originalLink: cell(r, 4),
+            finalLink: cell(r, 5),
+            duration: cell(r, 6),
+        });
+    }
+
+    return {
+        stats: {
+            total: number(TOTALS_ROW, 1),
+            success: number(TOTALS_ROW + 4, 1),
+            processing: 0,
+            lastActivity: cell(TOTALS_ROW + 5, 1) || 'Never',
+        },
+        activity,
+        platformDistribution,
+        stageTimes,
+    };
+}
+
 export async function GET() {
     try {
         console.log('API called - checking env vars');
@@ -31,13 +79,13 @@ export async function GET() {
         const sheets = google.sheets({ version: 'v4', auth });
         const spreadsheetId = process.env.GOOGLE_SHEET_ID || '1JTJzRwHIFe25MFFmOxofVNbymWUEr9M7VCM3F1zWlfA';
 
-        // Fetch Data and Status in parallel
-        const [response, statusResponse] = await Promise.all([
+        // Precomputed summary first: one fixed-size read however long the history is
+        const [summaryResponse, statusResponse] = await Promise.all([
             sheets.spreadsheets.values.get({
                 spreadsheetId,
-                range: "'Content Engine'!A:H", // Expanded to include Duration
+                range: SUMMARY_RANGE,
                 valueRenderOption: 'FORMATTED_VALUE',
-            }),
+            }).catch(() => ({ data: { values: [] as any[][] } })),
             sheets.spreadsheets.values.get({
                 spreadsheetId,
                 range: "'Backend Monitoring'!A:B",
@@ -48,10 +96,33 @@ export async function GET() {
         const engineStatus = statusResponse.data.values?.[0]?.[0] || 'Idle';
         const statusMessage = statusResponse.data.values?.[0]?.[1] || 'System ready';
 
+        const summaryRows = summaryResponse.data.values || [];
+        if (summaryRows[TOTALS_ROW]?.[0] === 'Total Videos') {
+            return NextResponse.json({ ...fromSummary(summaryRows), spreadsheetId, engineStatus, statusMessage });
+        }
+
+        // No summary yet (the engine writes it when the next video finishes): compute from the log.
+        // 'Content Engine' only holds the active window; older rows are archived by the engine
+        // and counted from the one-column status list of 'Processed Index'.
+        const [response, archivedResponse] = await Promise.all([
+            sheets.spreadsheets.values.get({
+                spreadsheetId,
+                range: "'Content Engine'!A:H", // Expanded to include Duration
+                valueRenderOption: 'FORMATTED_VALUE',
+            }),
+            sheets.spreadsheets.values.get({
+                spreadsheetId,
+                range: "'Processed Index'!B2:B",
+                valueRenderOption: 'FORMATTED_VALUE',
+            }).catch(() => ({ data: { values: [] as string[][] } }))
+        ]);
+
+        const archivedCount = (archivedResponse.data.values || []).filter(row => row && row[0] !== 'Duplicate').length;
+
         const rows = response.data.values;
         if (!rows || rows.length <= 1) {
             return NextResponse.json({
-                stats: { total: 0, success: 100, processing: 0, lastActivity: 'Never' },
+                stats: { total: archivedCount, success: 100, processing: 0, lastActivity: archivedCount ? 'Archived' : 'Never' },
                 activity: [],
                 platformDistribution: [],
             });
@@ -59,7 +130,8 @@ export async function GET() {
 
         // Process rows (skip header and filter out empty footer rows)
         const header = rows[0];
-        const rawDataRows = rows.slice(1).filter(row => row && row[0]); // Must have a timestamp
+        // Must have a timestamp; 'Duplicate' rows are claims that lost a race to another runner
+        const rawDataRows = rows.slice(1).filter(row => row && row[0] && row[4] !== 'Duplicate');
         const dataRows = rawDataRows.map((row, index) => {
             const obj: any = {};
             header.forEach((key, i) => {
@@ -88,7 +160,7 @@ export async function GET() {
         });
 
         // Calculate Stats
-        const total = dataRows.length;
+        const total = dataRows.length + archivedCount;
         const success = dataRows.length > 0 ? 100 : 0; // Simple logic for now
         const processing = 0;
 
@@ -96,7 +168,7 @@ export async function GET() {
         const lastRow = dataRows[dataRows.length - 1];
         const lastActivity = lastRow ? (lastRow.timestamp || 'None') : 'None';
 
-        // Distribution from all rows
+        // Distribution from the active window
         const platforms: any = {};
         dataRows.forEach(row => {
             const pList = row.platforms ? row.platforms.split(',') : [];
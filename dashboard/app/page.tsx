@@ -175,7 +175,7 @@ export default function Dashboard() {
                     />
                     <StatCard
                         title="Success Rate"
-                        value={`${stats.total > 0 ? 100 : 0}%`}
+                        value={`${stats.total > 0 ? stats.success : 0}%`}
                         icon={<CheckCircle />}
                         color="emerald"
                     />
@@ -243,7 +243,7 @@ export default function Dashboard() {
 
                                                 <div className="flex items-center gap-4 pl-13 sm:pl-0">
                                                     <div className="flex flex-wrap gap-1.5 max-w-[200px]">
-                                                        {(row.platform || '').split(',').map((p: string, j: number) => (
+                                                        {(row.platforms || '').split(',').map((p: string, j: number) => (
                                                             <span key={j} className="text-[9px] font-medium px-2 py-0.5 bg-white/5 text-white/40 border border-white/5 rounded-[4px] tracking-wide uppercase">
                                                                 {p.trim()}
                                                             </span>
@@ -0,0 +1,282 @@
+import os
+import time
+import asyncio
+import inspect
+import datetime
+from main import (select_pending_files, target_platforms, build_strategy_text, job_disk_bytes, load_config,
+                  render_plan, render_steps, render_stages, finish_render, upload_outputs, upload_preview,
+                  link_copy, link_reencode, SHEETS_STAGE_BREAKDOWN, RENDER_STATUS_INTERVAL, DEDUPE)
+from services.drive import AsyncDriveService
+from services.video_analysis import AsyncVideoAnalyzer
+from services.ai_generation import AsyncAIService
+from services.renderer import RenderService, format_progress
+from services.sheets import AsyncSheetsService, flush_journal
+from services.workspace import JobWorkspace
+from services.metrics import PipelineMetrics
+from services.rate_limiter import get_rate_controller
+from services.artifacts import artifact_store, build_artifacts
+from services.stage_graph import AsyncStageGraph
+
+# Stages that run ffmpeg; each waits for one of the MAX_CONCURRENT_RENDERS slots
+RENDER_STAGES = ('preview', 'burn', 'intro_overlay')
+
+
+def render_progress_reporter(sheets, sheet_id, loop, label, span=None):
+    """
+    Async twin of main.render_progress_reporter. The render steps run in worker threads, so status
+    updates are handed to `loop` with run_coroutine_threadsafe.
+    """
+    last_update = [0.0]
+
+    def report(progress):
+        if span is not None and progress.get('frame'):
+            span['frames'] = progress['frame']
+        now = time.time()
+        if progress.get('progress') != 'end' and now - last_update[0] >= RENDER_STATUS_INTERVAL:
+            last_update[0] = now
+            asyncio.run_coroutine_threadsafe(sheets.update_status(sheet_id, f"{label} ({format_progress(progress)})"), loop)
+
+    return report
+
+
+class Blocking:
+    """
+    Blocking view of an async service for main's shared helpers, which async_main runs in worker threads:
+    each coroutine method is scheduled on `loop` and waited for, so the I/O itself still happens on the loop.
+    """
+
+    def __init__(self, service, loop):
+        self.service = service
+        self.loop = loop
+
+    def __getattr__(self, name):
+        attr = getattr(self.service, name)
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            return asyncio.run_coroutine_threadsafe(attr(*args, **kwargs), self.loop).result()
+        return call
+
+
+def offload(name, fn, render_slots):
+    """Run one of main.render_steps in a worker thread; ffmpeg stages hold a render slot while they run."""
+    async def run(results):
+        if name in RENDER_STAGES:
+            async with render_slots:
+                return await asyncio.to_thread(fn, results)
+        return await asyncio.to_thread(fn, results)
+    return run
+
+
+async def process_video(file, services, config, render_slots, metrics):
+    """
+    Run one video through the pipeline.
+    Network stages (download, Whisper, Claude, upload, Sheets) only await I/O, so many videos
+    overlap on the loop. The render stages are main's, run in worker threads; ffmpeg ones are gated by `render_slots`.
+    Returns True on success, False on failure, None if skipped (claimed elsewhere or linked as a duplicate).
+    """
+    drive, analyzer, ai, renderer, sheets = services
+    sheet_id = config['sheet_id']
+    video_start_time = time.time()
+    base_name, _ = os.path.splitext(file['name'])
+    video_metrics = metrics.start_video(file['id'], file['name'])
+    video_status = "Failed"
+    workspace = JobWorkspace(file['id'], job_disk_bytes(file))
+
+    try:
+        print(f"🎬 Processing: {file['name']}")
+
+        # Admission: don't claim a video we have no disk for; it stays pending for a later run
+        if not workspace.admit():
+            print(f"💾 Not enough free disk for {file['name']} (~{workspace.expected_bytes / 1e6:.0f} MB needed), deferring")
+            video_status = "Deferred"
+            return None
+        temp_input_path = workspace.path(f"temp_input_{base_name}.mp4")
+
+        # 0. LOCK: Claim the video (leased row in the sheet)
+        current_timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if not await sheets.log_processing_start(sheet_id, file['id'], file.get('webViewLink', 'N/A'), file['name'], timestamp_str=current_timestamp):
+            video_status = "Skipped"
+            return None
+
+        # 0b. DEDUPE: a byte-identical re-upload is linked to the existing output before any download
+        # (main's dedupe and upload helpers, run in a worker thread against blocking views of our services)
+        loop = asyncio.get_running_loop()
+        blocking_drive, blocking_sheets = Blocking(drive, loop), Blocking(sheets, loop)
+        content_index, original = await asyncio.to_thread(link_copy, blocking_sheets, sheet_id, file)
+        if original:
+            video_status = "Duplicate"
+            return None
+
+        # 1. Download
+        print(f"⬇️  Downloading {file['name']}...")
+        with video_metrics.span('download') as span:
+            await drive.download_file(file['id'], temp_input_path)
+            span['bytes'] = os.path.getsize(temp_input_path) if os.path.exists(temp_input_path) else None
+
+        # 2. Analyze
+        with video_metrics.span('probe'):
+            metadata = await analyzer.get_metadata(temp_input_path)
+        if not metadata:
+            print(f"❌ Could not analyze {file['name']}, skipping.")
+            await sheets.update_log_completion(sheet_id, file['id'], "N/A", "N/A", "Failed: Metadata Analysis Error", status="Failed")
+            return False
+
+        # 2b. Re-encoded copies: same audio, different bytes
+        fingerprint, original = await asyncio.to_thread(link_reencode, blocking_sheets, sheet_id, file, content_index,
+                                                        temp_input_path, metadata['duration'], video_metrics)
+        if original:
+            video_status = "Duplicate"
+            return None
+
+        # 3. Transcribe
+        print(f"🎙️  Transcribing {file['name']}...")
+        audio_dir = workspace.small_dir(int(metadata['duration'] * 16000))  # 128 kbps mp3
+        transcript = await ai.transcribe_audio(temp_input_path, metrics=video_metrics, work_dir=audio_dir)
+        transcript_text = transcript.get('text', "") if transcript else ""
+
+        # 4-6. Strategy and render: the same stages as main.process_video (render_steps/render_stages), with
+        # the local steps in worker threads and the Claude call, artifact mirror and preview upload on the loop
+        plan = render_plan(workspace, base_name, metadata)
+        store = artifact_store(config)
+
+        async def generate_strategy(_):
+            print(f"🤖 Generating content strategy for {file['name']}...")
+            return await ai.generate_content_strategy(transcript_text, metadata, metrics=video_metrics,
+                                                      words=transcript.get('words') if transcript else None)
+
+        async def save_artifacts(results):
+            # Kept so a later restyle (restyle.py) re-renders without new Whisper/Claude calls; local copy only, never raises
+            return await asyncio.to_thread(store.save, file['id'], build_artifacts(file, metadata, transcript, results['strategy']))
+
+        async def mirror_artifacts(results):
+            if results['artifacts']:
+                try:
+                    await drive.upload_file(results['artifacts'], store.folder_id)
+                except Exception as e:
+                    print(f"⚠️  Could not mirror artifacts for {file['id']}: {e}")
+
+        async def publish_preview(results):
+            if results['preview']:
+                await asyncio.to_thread(upload_preview, blocking_drive, blocking_sheets, sheet_id, file, plan,
+                                        config['final_folder_id'], video_metrics)
+
+        steps = render_steps(file['name'], plan, temp_input_path, metadata, transcript, renderer, video_metrics,
+                             reporter=lambda label, span: render_progress_reporter(sheets, sheet_id, loop, label, span),
+                             status=lambda text: asyncio.run_coroutine_threadsafe(sheets.update_status(sheet_id, text), loop))
+        steps = {name: offload(name, fn, render_slots) for name, fn in steps.items()}
+        steps.update(strategy=generate_strategy, artifacts=save_artifacts)
+        if store.folder_id:
+            steps['artifacts_mirror'] = mirror_artifacts
+        if 'preview' in steps:
+            steps['preview_upload'] = publish_preview
+
+        strategy = (await render_stages(steps, plan['needs_intro'], AsyncStageGraph()).run())['strategy']
+        final_video_path = finish_render(plan)
+
+        if not final_video_path:
+            print(f"❌ No final video generated for {file['name']}")
+            await sheets.update_log_completion(sheet_id, file['id'], "N/A", "N/A", "Failed: Render Error", status="Failed")
+            return False
+
+        # 7. Upload Final Video
+        print(f"☁️  Uploading {final_video_path}...")
+        with video_metrics.span('upload', bytes=os.path.getsize(final_video_path)):
+            upload_result = await drive.upload_file(final_video_path, config['final_folder_id'])
+        if not upload_result:
+            print(f"❌ Upload failed for {file['name']}")
+            await sheets.update_log_completion(sheet_id, file['id'], "N/A", "N/A", "Failed: Upload Error", status="Failed")
+            return False
+
+        # 7b. Upload the cover frame and platform variants (concurrently)
+        output_cells = await asyncio.to_thread(upload_outputs, blocking_drive, plan, config['final_folder_id'],
+                                               video_metrics, parallel=True)
+        if output_cells:
+            await sheets.update_log_cells(sheet_id, file['id'], output_cells)
+
+        # 8. Log to Sheets (Completion Update)
+        video_time = time.time() - video_start_time
+        await sheets.update_log_completion(
+            sheet_id,
+            file['id'],
+            upload_result.get('webViewLink', 'N/A'),
+            target_platforms(metadata),
+            build_strategy_text(strategy),
+            status="Completed",
+            duration=f"{video_time:.1f}s",
+            stage_breakdown=video_metrics.breakdown() if SHEETS_STAGE_BREAKDOWN else None,
+            stages=video_metrics.stage_seconds()
+        )
+        if DEDUPE:
+            await sheets.add_content_index(sheet_id, file, upload_result.get('webViewLink', 'N/A'), fingerprint)
+        video_status = "Completed"
+        print(f"✅ Successfully processed {file['name']} in {video_time:.1f}s")
+        return True
+
+    except Exception as e:
+        print(f"❌ Error processing {file.get('name', 'unknown')}: {e}")
+        await sheets.update_log_completion(sheet_id, file['id'], "N/A", "N/A", f"Failed: {str(e)}", status="Failed")
+        return False
+
+    finally:
+        metrics.finish_video(video_metrics, video_status)
+        workspace.close()
+
+
+async def main_async():
+    """
+    Video Content Engine - asyncio driver.
+    Same stages as main.py, but all pending videos are in flight at once on one event loop:
+    their network stages overlap while at most MAX_CONCURRENT_RENDERS ffmpeg renders run.
+    """
+    print("🎬 Starting Video Content Engine (asyncio driver)...")
+    start_time = time.time()
+
+    config = load_config()
+
+    drive = AsyncDriveService()
+    sheets = AsyncSheetsService()
+    services = (drive, AsyncVideoAnalyzer(), AsyncAIService(), RenderService(), sheets)
+    sheet_id = config['sheet_id']
+
+    try:
+        # Keep the hot tab small before anything is claimed
+        await sheets.archive_rows(sheet_id)
+        processed_ids, files = await asyncio.gather(
+            sheets.get_processed_ids(sheet_id),
+            drive.list_files(config['upload_folder_id'])
+        )
+        pending_files = select_pending_files(files, processed_ids)
+        max_videos = int(os.getenv('MAX_VIDEOS_PER_RUN', '5'))
+        videos_to_process = pending_files[:max_videos]
+        print(f"📹 Found {len(pending_files)} pending videos, processing {len(videos_to_process)}")
+
+        if not videos_to_process:
+            print("✅ No new videos to process. Exiting successfully.")
+            return 0
+
+        await sheets.update_status(sheet_id, f"🔄 Processing {len(videos_to_process)} videos concurrently")
+        render_slots = asyncio.Semaphore(int(os.getenv('MAX_CONCURRENT_RENDERS', '1')))
+        metrics = PipelineMetrics(rate_controller=get_rate_controller())
+        results = await asyncio.gather(*(
+            process_video(file, services, config, render_slots, metrics) for file in videos_to_process
+        ))
+
+        processed_count = sum(1 for ok in results if ok)
+        failed_count = sum(1 for ok in results if ok is False)
+        print("\n📊 Processing Summary:")
+        print(f"   ✅ Videos processed: {processed_count}")
+        print(f"   ❌ Videos failed: {failed_count}")
+        print(f"   ⏱️  Total time: {time.time() - start_time:.1f}s")
+
+        await sheets.update_status(sheet_id, f"✅ Completed: {processed_count} processed, {failed_count} failed", state="Idle")
+        return 0 if failed_count == 0 else 1
+    finally:
+        await drive.aclose()
+        await sheets.aclose()
+        await asyncio.to_thread(flush_journal)
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main_async()))
@@ -0,0 +1,84 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from main import process_video, select_pending_files, DEDUPE
+from services.dedupe import content_key
+from services.video_analysis import VideoAnalyzer
+from services.ai_generation import AIService
+from services.renderer import RenderService
+from services.local_io import LocalFolderService, ManifestService, MANIFEST_FILE
+from services.metrics import PipelineMetrics
+from services.rate_limiter import get_rate_controller
+
+# Videos processed in parallel by `--input-dir` batch runs; each worker owns its own warm services
+BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', '2'))
+# Transcripts and strategies of batch runs (for --restyle) live under the output directory
+ARTIFACT_SUBDIR = "artifacts"
+
+
+def batch_config(input_dir, output_dir, manifest_path=None):
+    """process_video's config for a batch run: folder ids are directories, the "sheet" is the manifest."""
+    return {'sheet_id': manifest_path or os.path.join(output_dir, MANIFEST_FILE), 'upload_folder_id': input_dir,
+            'final_folder_id': output_dir, 'artifact_dir': os.path.join(output_dir, ARTIFACT_SUBDIR)}
+
+
+def run_batch(input_dir, output_dir, workers=None, manifest_path=None, limit=None):
+    """
+    Backfill mode: every video in input_dir goes through main.process_video with Drive and Sheets
+    replaced by local stand-ins (services.local_io). Results land in output_dir, the per-video log in a
+    JSON manifest (default: <output_dir>/manifest.json) and transcripts/strategies for --restyle in
+    <output_dir>/artifacts. Rerunning resumes where the last run stopped.
+    """
+    workers = max(1, workers or BATCH_WORKERS)
+    config = batch_config(input_dir, output_dir, manifest_path)
+    manifest_path = config['sheet_id']
+    print(f"🎬 Starting Video Content Engine (batch: {input_dir} -> {output_dir}, {workers} workers)...")
+    if not os.path.isdir(input_dir):
+        print(f"💥 Input directory not found: {input_dir}")
+        return 1
+    os.makedirs(output_dir, exist_ok=True)
+
+    folder = LocalFolderService(checksums=DEDUPE)
+    manifest = ManifestService(manifest_path)
+    metrics = PipelineMetrics(rate_controller=get_rate_controller())
+
+    copies = []
+    pending_files = select_pending_files(folder.list_files(input_dir), manifest.get_processed_ids(manifest_path), copies)
+    if limit:
+        pending_files = pending_files[:limit]
+    # Copies of a file outside this run's limit wait for their original
+    keys = {content_key(file) for file in pending_files}
+    copies = [file for file in copies if content_key(file) in keys]
+    print(f"📹 Found {len(pending_files)} videos to process (manifest: {manifest_path})")
+    if not pending_files:
+        return 0
+
+    local = threading.local()
+
+    def process(file):
+        # Analyzer, AI clients and renderer per worker thread; folder and manifest are shared (locked)
+        if not hasattr(local, 'services'):
+            local.services = (folder, VideoAnalyzer(), AIService(), RenderService(), manifest)
+        try:
+            return process_video(file, local.services, config, metrics)
+        except Exception as e:
+            print(f"❌ Batch error on {file.get('name', 'unknown')}: {e}")
+            return False
+
+    start_time = time.time()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch') as pool:
+        results = list(pool.map(process, pending_files))
+        # Same-batch copies go last: their original is in the content index now, so each one is
+        # recorded in the manifest as 'Duplicate Content' with the original's output
+        results += list(pool.map(process, copies))
+
+    processed_count = sum(1 for r in results if r)
+    failed_count = sum(1 for r in results if r is False)
+    print("\n📊 Batch Summary:")
+    print(f"   ✅ Videos processed: {processed_count}")
+    print(f"   ❌ Videos failed: {failed_count}")
+    print(f"   ⏭️  Skipped or linked: {len(results) - processed_count - failed_count}")
+    print(f"   ⏱️  Total time: {time.time() - start_time:.1f}s")
+    print(f"💾 Manifest: {manifest_path}")
+    return 0 if failed_count == 0 else 1
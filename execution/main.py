@@ -3,13 +3,20 @@ import datetime
 import os
 import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from services.drive import DriveService
 from services.video_analysis import VideoAnalyzer
 from services.ai_generation import AIService
-from services.renderer import RenderService
+from services.renderer import RenderService, format_progress, rendered_metadata, cover_work_bytes, VARIANT_FILTERS
 from services.subtitle_utils import json_to_srt, json_to_ass, json_to_ass_karaoke
-from services.sheets import SheetsService
+from services.sheets import SheetsService, VARIANTS_COLUMN, PREVIEW_COLUMN, COVER_COLUMN, CONTENT_DUPLICATE_STATUS, flush_journal
+from services.dedupe import content_key, match_content, match_fingerprint, audio_fingerprint
+from services.workspace import JobWorkspace, expected_job_bytes
+from services.metrics import PipelineMetrics
+from services.rate_limiter import get_rate_controller
+from services.artifacts import artifact_store, build_artifacts, ARTIFACT_FOLDER_ID
+from services.stage_graph import StageGraph
 
 
 # Load Config
@@ -35,6 +42,28 @@ if os.path.exists(bin_dir):
 
 PROCESSED_LOG_FILE = "processed_videos.json"
 
+# Write a per-stage timing summary to column I of the Content Engine sheet
+SHEETS_STAGE_BREAKDOWN = os.getenv('SHEETS_STAGE_BREAKDOWN', '').lower() in ('1', 'true', 'yes')
+
+# Minimum seconds between render ETA updates in 'Backend Monitoring'
+RENDER_STATUS_INTERVAL = float(os.getenv('RENDER_STATUS_INTERVAL', '15'))
+
+# Render and upload a low-res preview (PREVIEW_SHORT_SIDE, default 480p) before the full-quality encode
+PREVIEW_RENDER = os.getenv('PREVIEW_RENDER', '').lower() in ('1', 'true', 'yes')
+
+# Pick a cover frame from keyframes, add the title styling, upload it next to the video
+COVER_FRAME = os.getenv('COVER_FRAME', '').lower() in ('1', 'true', 'yes')
+
+# Extra outputs from the final render: empty (off), 'auto' (per target platform) or e.g. 'square,lite'
+RENDER_VARIANTS = os.getenv('RENDER_VARIANTS', '').strip().lower()
+
+# Link re-uploads of already processed content (same Drive md5 + size) instead of reprocessing them.
+# Opt-in: it reads the Content Index once per video (and hashes every input in batch mode).
+DEDUPE = os.getenv('DEDUPE', '').lower() in ('1', 'true', 'yes')
+
+# Also catch re-encoded copies: fingerprint the audio after download and compare with the content index
+AUDIO_FINGERPRINT = os.getenv('AUDIO_FINGERPRINT', '').lower() in ('1', 'true', 'yes')
+
 def load_processed_log():
     if os.path.exists(PROCESSED_LOG_FILE):
         with open(PROCESSED_LOG_FILE, 'r') as f:
@@ -45,11 +74,475 @@ def save_processed_log(log):
     with open(PROCESSED_LOG_FILE, 'w') as f:
         json.dump(log, f)
 
+def select_pending_files(files, processed_ids, copies=None):
+    """
+    Drop already processed uploads, our own output files and same-batch copies of another upload.
+    The copies are appended to `copies` if given, to be linked once their original is indexed.
+    """
+    pending_files = []
+    seen_content = set()
+    for file in files:
+        # Skip already processed
+        if file['id'] in processed_ids:
+            continue
+        # Skip output files
+        if file['name'].startswith(("Final_", "Subtitled_", "Preview_", "Cover_")):
+            continue
+        # Identical bytes uploaded twice: process one now, the other gets linked to it afterwards
+        key = content_key(file) if DEDUPE else None
+        if key and key in seen_content:
+            if copies is not None:
+                copies.append(file)
+            continue
+        if key:
+            seen_content.add(key)
+        pending_files.append(file)
+    return pending_files
+
+def target_platforms(metadata):
+    return ["TikTok", "Instagram Reels", "YouTube Shorts"] if metadata.get('orientation') == 'portrait' else ["YouTube Long-form", "LinkedIn"]
+
+def render_variants(metadata):
+    """Variant names to encode alongside the main output (see renderer.VARIANT_FILTERS)."""
+    if not RENDER_VARIANTS:
+        return []
+    if RENDER_VARIANTS == 'auto':
+        # Portrait masters already are 9:16; landscape also gets a vertical cut for Shorts/Reels/TikTok
+        return ['square', 'lite'] if metadata.get('orientation') == 'portrait' else ['vertical', 'square', 'lite']
+    return [name.strip() for name in RENDER_VARIANTS.split(',') if name.strip() in VARIANT_FILTERS]
+
+def format_variant_links(links):
+    return "\n".join(f"{name}: {link}" for name, link in links.items())
+
+def job_disk_bytes(file):
+    """Disk to reserve before admitting a job: source plus subtitled pass, final and variants (worst case for 'auto')."""
+    return expected_job_bytes(file.get('size'), outputs=2 + len(render_variants({})))
+
+def duplicate_note(original, match):
+    """Strategy-column text for an upload linked to existing output."""
+    return f"Duplicate of {original['filename']} ({original['id']}, {match} match)"
+
+def build_strategy_text(strategy):
+    """Flatten the strategy JSON into the text stored in the sheet's strategy column."""
+    strategy_text = f"TITLE: {strategy.get('title', 'N/A')}\n\nCAPTION: {strategy.get('caption', 'N/A')}\n\nHASHTAGS: {strategy.get('hashtags', 'N/A')}"
+    if strategy.get('linkedin_post'):
+        strategy_text += f"\n\nLINKEDIN: {strategy['linkedin_post']}"
+    if strategy.get('tiktok_caption'):
+        strategy_text += f"\n\nTIKTOK: {strategy['tiktok_caption']}"
+    return strategy_text
+
+def render_progress_reporter(sheets, sheet_id, label, span=None):
+    """
+    Build an ffmpeg progress callback: refreshes the status cell with %/speed/ETA (throttled)
+    and records the real encoded frame count on the metrics span.
+    """
+    last_update = [0.0]
+
+    def report(progress):
+        if span is not None and progress.get('frame'):
+            span['frames'] = progress['frame']
+        now = time.time()
+        if progress.get('progress') != 'end' and now - last_update[0] >= RENDER_STATUS_INTERVAL:
+            last_update[0] = now
+            sheets.update_status(sheet_id, f"{label} ({format_progress(progress)})")
+
+    return report
+
+def build_services():
+    """Construct one set of pipeline services: (drive, video_analyzer, ai, renderer, sheets)."""
+    return (DriveService(), VideoAnalyzer(), AIService(), RenderService(), SheetsService())
+
+def load_config():
+    config = {
+        'sheet_id': os.getenv('GOOGLE_SHEET_ID'),
+        'upload_folder_id': os.getenv('GOOGLE_DRIVE_FOLDER_ID_UPLOAD'),
+        'final_folder_id': os.getenv('GOOGLE_DRIVE_FOLDER_ID_FINAL'),
+    }
+    if not all(config.values()):
+        raise ValueError("Missing required environment variables: GOOGLE_SHEET_ID, GOOGLE_DRIVE_FOLDER_ID_UPLOAD, GOOGLE_DRIVE_FOLDER_ID_FINAL")
+    config['artifact_folder_id'] = ARTIFACT_FOLDER_ID
+    return config
+
+def render_plan(workspace, base_name, metadata):
+    """Where one video's render stages write in its workspace, and which optional ones run."""
+    needs_intro = metadata.get('length_category') == 'short' and metadata.get('orientation') == 'portrait'
+    # Platform variants are split off whichever render step comes last (one decode, several encodes)
+    variant_paths = {name: workspace.path(f"Final_{base_name}_{name}.mp4") for name in render_variants(metadata)}
+    media_seconds = metadata.get('duration')
+    return {
+        'needs_intro': needs_intro,
+        'ass_path': workspace.small(f"temp_{base_name}.ass"),
+        'srt_path': workspace.small(f"temp_{base_name}.srt"),
+        'subtitled_path': workspace.path(f"temp_subtitled_{base_name}.mp4"),
+        'final_path': workspace.path(f"Final_{base_name}.mp4"),
+        'variant_paths': variant_paths,
+        'burn_variants': None if needs_intro else variant_paths,
+        'overlay_path': workspace.small(f"temp_overlay_{base_name}.png") if needs_intro else None,
+        'cover_path': workspace.small(f"Cover_{base_name}.jpg") if COVER_FRAME else None,
+        # Candidate keyframes are decoded into the workspace too (tmpfs when it has room)
+        'cover_dir': workspace.small_dir(cover_work_bytes(metadata.get('width'), metadata.get('height'))) if COVER_FRAME else None,
+        'preview_path': workspace.path(f"Preview_{base_name}.mp4") if PREVIEW_RENDER else None,
+        'media_seconds': media_seconds,
+        'media_frames': int(media_seconds * metadata['fps']) if media_seconds and metadata.get('fps') else None,
+    }
+
+def render_steps(name, plan, input_path, metadata, transcript, renderer, video_metrics, reporter, status):
+    """
+    The local render steps of one video (name -> fn(results), see render_stages), shared by process_video,
+    async_main and restyle. They only touch the renderer and the workspace: reporter(label, span) builds the
+    ffmpeg progress callback and status(text) posts a status line. Strategy, artifacts and the preview
+    upload are the caller's steps.
+    """
+    def write_subtitles(_):
+        """Subtitle file (ASS karaoke preferred, SRT fallback); None without a transcript."""
+        ass_content = json_to_ass_karaoke(transcript) if transcript else None
+        if ass_content:
+            with open(plan['ass_path'], "w", encoding="utf-8") as f:
+                f.write(ass_content)
+            return plan['ass_path']
+        srt_content = json_to_srt(transcript) if transcript else None
+        if srt_content:
+            with open(plan['srt_path'], "w", encoding="utf-8") as f:
+                f.write(srt_content)
+            return plan['srt_path']
+        return None
+
+    def create_overlay_image(results):
+        # Intro overlay image for portrait shorts (used by the preview and the final render)
+        print(f"📱 Generating intro overlay for short portrait video...")
+        renderer.create_intro_overlay(results['strategy'].get('title', 'Watch This!'),
+                                      metadata.get('width', 1080), metadata.get('height', 1920), plan['overlay_path'])
+
+    def create_cover(results):
+        # Keyframes only, so it stays cheap even for long videos
+        with video_metrics.span('cover_frame'):
+            renderer.create_cover_frame(input_path, results['strategy'].get('title', ''), plan['cover_path'],
+                                        metadata.get('duration'), plan['cover_dir'])
+
+    def preview(results):
+        # Low-res render of the same graph; the caller's preview_upload step publishes it
+        print(f"👀 Rendering review preview...")
+        overlay_path = plan['overlay_path']
+        overlay_for_preview = overlay_path if overlay_path and os.path.exists(overlay_path) else None
+        with video_metrics.span('preview_render', media_seconds=plan['media_seconds'], frames=plan['media_frames']):
+            return renderer.render_preview(input_path, results['subtitles'], plan['preview_path'],
+                                           metadata.get('width', 1080), metadata.get('height', 1920), overlay_for_preview)
+
+    def burn(results):
+        subtitle_path = results['subtitles']
+        if subtitle_path:
+            print(f"🔥 Burning {'ASS' if subtitle_path == plan['ass_path'] else 'SRT'} subtitles...")
+            status(f"🎨 Rendering: {name}")
+            with video_metrics.span('burn_subtitles', media_seconds=plan['media_seconds'], frames=plan['media_frames']) as span:
+                renderer.burn_subtitles(input_path, subtitle_path, plan['subtitled_path'], variants=plan['burn_variants'], source=metadata,
+                                        progress_callback=reporter(f"🎨 Rendering: {name}", span))
+        else:
+            print("⚠️  No transcription available, copying without subtitles")
+            renderer.remux(input_path, plan['subtitled_path'])
+
+    def apply_overlay(results):
+        # Portrait short intro (overlay style) on the subtitled video
+        print(f"🔗 Applying intro overlay...")
+        # If subtitles failed, use original temp input
+        source_for_overlay = plan['subtitled_path'] if os.path.exists(plan['subtitled_path']) else input_path
+        # Burned subtitles left the audio as AAC
+        overlay_source = rendered_metadata(metadata) if results['subtitles'] and source_for_overlay == plan['subtitled_path'] else metadata
+        with video_metrics.span('intro_overlay', media_seconds=plan['media_seconds'], frames=plan['media_frames']) as span:
+            # Cropped variants are cut from the clean source so their captions are laid out for the crop
+            renderer.apply_intro_overlay(source_for_overlay, plan['overlay_path'], plan['final_path'], variants=plan['variant_paths'],
+                                         source=overlay_source, progress_callback=reporter(f"📱 Applying intro: {name}", span),
+                                         clean=(input_path, results['subtitles']))
+
+    steps = {'subtitles': write_subtitles, 'burn': burn}
+    if plan['needs_intro']:
+        steps.update(overlay_image=create_overlay_image, intro_overlay=apply_overlay)
+    if plan['cover_path']:
+        steps['cover'] = create_cover
+    if plan['preview_path']:
+        steps['preview'] = preview
+    return steps
+
+def finish_render(plan):
+    """Path of the final video once the render stages ran, or None if nothing was rendered."""
+    if not plan['needs_intro'] and os.path.exists(plan['subtitled_path']):
+        # Just use subtitled video as final
+        os.rename(plan['subtitled_path'], plan['final_path'])
+    return plan['final_path'] if os.path.exists(plan['final_path']) else None
+
+def rendered_outputs(plan):
+    """Cover frame (or None) and {variant: path} actually written next to the final video."""
+    cover_path = plan['cover_path'] if plan['cover_path'] and os.path.exists(plan['cover_path']) else None
+    return cover_path, {name: path for name, path in plan['variant_paths'].items() if os.path.exists(path)}
+
+def upload_outputs(drive, plan, folder_id, video_metrics, parallel=False):
+    """
+    Upload the cover frame and platform variants rendered alongside the final video; returns the sheet cells linking them.
+    parallel: drive may be called from several threads at once (async_main's view of AsyncDriveService), so variants upload concurrently.
+    """
+    cells = {}
+    cover_path, variants = rendered_outputs(plan)
+    if cover_path:
+        with video_metrics.span('upload_cover', bytes=os.path.getsize(cover_path)):
+            cover_result = drive.upload_file(cover_path, folder_id)
+        if cover_result:
+            cells[COVER_COLUMN] = cover_result.get('webViewLink', 'N/A')
+    if variants:
+        print(f"☁️  Uploading {len(variants)} variants...")
+        upload = lambda path: drive.upload_file(path, folder_id)
+        with video_metrics.span('upload_variants', bytes=sum(os.path.getsize(p) for p in variants.values())):
+            if parallel:
+                with ThreadPoolExecutor(max_workers=len(variants), thread_name_prefix='upload') as pool:
+                    variant_results = list(pool.map(upload, variants.values()))
+            else:
+                variant_results = [upload(path) for path in variants.values()]
+        variant_links = {name: r.get('webViewLink', 'N/A') for name, r in zip(variants, variant_results) if r}
+        cells[VARIANTS_COLUMN] = format_variant_links(variant_links)
+    return cells
+
+def upload_preview(drive, sheets, sheet_id, file, plan, folder_id, video_metrics):
+    """Publish the review preview (the preview_upload stage): upload it and link it in the video's row."""
+    with video_metrics.span('preview_upload', bytes=os.path.getsize(plan['preview_path'])):
+        preview_result = drive.upload_file(plan['preview_path'], folder_id)
+    if preview_result:
+        sheets.update_log_cells(sheet_id, file['id'], {PREVIEW_COLUMN: preview_result.get('webViewLink', 'N/A')})
+        sheets.update_status(sheet_id, f"👀 Preview ready: {file['name']}")
+
+def link_copy(sheets, sheet_id, file):
+    """
+    DEDUPE before download: returns (content index, entry this upload is a byte-identical copy of).
+    A copy's row is completed as 'Duplicate Content' with the original's output. The index is [] without DEDUPE.
+    """
+    content_index = sheets.get_content_index(sheet_id) if DEDUPE else []
+    original = match_content(content_index, file)
+    if original:
+        print(f"♻️  {file['name']} is a copy of {original['filename']}, linking existing output")
+        sheets.update_log_completion(sheet_id, file['id'], original['final_link'], "Linked",
+                                     duplicate_note(original, "md5"), status=CONTENT_DUPLICATE_STATUS)
+    return content_index, original
+
+def link_reencode(sheets, sheet_id, file, content_index, input_path, duration, video_metrics):
+    """
+    AUDIO_FINGERPRINT after download: returns (audio fingerprint, entry with the same audio). A re-encoded copy
+    is linked like link_copy, and its bytes are indexed too. (None, None) unless DEDUPE and AUDIO_FINGERPRINT.
+    """
+    if not (DEDUPE and AUDIO_FINGERPRINT):
+        return None, None
+    with video_metrics.span('fingerprint'):
+        fingerprint = audio_fingerprint(input_path, duration)
+    original = match_fingerprint(content_index, file, fingerprint)
+    if original:
+        print(f"♻️  {file['name']} has the same audio as {original['filename']}, linking existing output")
+        sheets.update_log_completion(sheet_id, file['id'], original['final_link'], "Linked",
+                                     duplicate_note(original, "audio"), status=CONTENT_DUPLICATE_STATUS)
+        # Index these bytes too, so the next identical upload is caught before download
+        sheets.add_content_index(sheet_id, file, original['final_link'], fingerprint)
+    return fingerprint, original
+
+def render_stages(steps, needs_intro, graph=None):
+    """
+    Wire one video's strategy and render steps (name -> fn(results)) into a stage graph; optional steps
+    left out of `steps` are skipped. The Claude call, local artifact write, overlay image and cover frame
+    run on worker threads. Renders and anything that talks to Drive or Sheets run on the caller, the
+    preview and its upload before the full-quality burn so its link lands first.
+    """
+    graph = graph if graph is not None else StageGraph()
+    graph.add('subtitles', steps['subtitles'])
+    graph.add('strategy', steps['strategy'])
+    if 'artifacts' in steps:
+        graph.add('artifacts', steps['artifacts'], after=['strategy'])
+    if 'artifacts_mirror' in steps:
+        graph.add('artifacts_mirror', steps['artifacts_mirror'], after=['artifacts'], on_caller=True)
+    if needs_intro:
+        graph.add('overlay_image', steps['overlay_image'], after=['strategy'])
+    if 'cover' in steps:
+        graph.add('cover', steps['cover'], after=['strategy'])
+    burn_after = ['subtitles']
+    if 'preview' in steps:
+        graph.add('preview', steps['preview'], after=['subtitles'] + (['overlay_image'] if needs_intro else []), on_caller=True)
+        burn_after.append('preview')
+    if 'preview_upload' in steps:
+        # Added before the burn, so the caller uploads the preview first (the asyncio graph overlaps them)
+        graph.add('preview_upload', steps['preview_upload'], after=['preview'], on_caller=True)
+    graph.add('burn', steps['burn'], after=burn_after, on_caller=True)
+    if needs_intro:
+        graph.add('intro_overlay', steps['intro_overlay'], after=['burn', 'overlay_image'], on_caller=True)
+    return graph
+
+def process_video(file, services, config, metrics):
+    """
+    Run one video through the pipeline: claim, download, analyze, transcribe, strategy, render, upload, log.
+    Used by the one-shot run below and by the daemon workers.
+    Returns True on success, False on failure, None if skipped (claimed elsewhere or linked as a duplicate).
+    """
+    drive, video_analyzer, ai, renderer, sheets = services
+    sheet_id = config['sheet_id']
+    video_start_time = time.time()
+    video_metrics = metrics.start_video(file['id'], file['name'])
+    video_status = "Failed"
+    workspace = JobWorkspace(file['id'], job_disk_bytes(file))
+
+    try:
+        print(f"🎬 Processing: {file['name']}")
+
+        # Admission: don't claim a video we have no disk for; it stays pending for a later run
+        if not workspace.admit():
+            print(f"💾 Not enough free disk for {file['name']} (~{workspace.expected_bytes / 1e6:.0f} MB needed), deferring")
+            video_status = "Deferred"
+            return None
+
+        sheets.update_status(sheet_id, f"🔄 Processing: {file['name']}")
+
+        # 0. LOCK: Claim the video (leased row in the sheet)
+        # Create a human-readable timestamp
+        current_timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if not sheets.log_processing_start(sheet_id, file['id'], file.get('webViewLink', 'N/A'), file['name'], timestamp_str=current_timestamp):
+            video_status = "Skipped"
+            return None
+
+        # 0b. DEDUPE: a byte-identical re-upload is linked to the existing output before any download
+        content_index, original = link_copy(sheets, sheet_id, file)
+        if original:
+            video_status = "Duplicate"
+            return None
+
+        # 1. Download
+        original_filename = file['name']
+        base_name, _ = os.path.splitext(original_filename)
+        temp_input_path = workspace.path(f"temp_input_{base_name}.mp4")
+
+        print(f"⬇️  Downloading video...")
+        with video_metrics.span('download') as span:
+            drive.download_file(file['id'], temp_input_path)
+            span['bytes'] = os.path.getsize(temp_input_path) if os.path.exists(temp_input_path) else None
+
+        # 2. Analyze
+        print(f"🔍 Analyzing video metadata...")
+        sheets.update_status(sheet_id, f"🔍 Analyzing: {file['name']}")
+        with video_metrics.span('probe'):
+            metadata = video_analyzer.get_metadata(temp_input_path)
+        print(f"📊 Metadata: {metadata}")
+
+        if not metadata:
+            print("❌ Could not analyze video, skipping.")
+            sheets.update_log_completion(sheet_id, file['id'], "N/A", "N/A", "Failed: Metadata Analysis Error", status="Failed")
+            return False
+
+        # 2b. Re-encoded copies: same audio, different bytes
+        fingerprint, original = link_reencode(sheets, sheet_id, file, content_index, temp_input_path,
+                                              metadata['duration'], video_metrics)
+        if original:
+            video_status = "Duplicate"
+            return None
+
+        # 3. Transcribe
+        print(f"🎙️  Transcribing audio...")
+        sheets.update_status(sheet_id, f"🎙️ Transcribing: {file['name']}")
+        audio_dir = workspace.small_dir(int(metadata['duration'] * 16000))  # 128 kbps mp3
+        transcript = ai.transcribe_audio(temp_input_path, metrics=video_metrics, work_dir=audio_dir)
+        # FIX: transcript is a dict (model_dump), not an object
+        transcript_text = transcript.get('text', "") if transcript else ""
+
+        # 4-6. Strategy and render, as a stage graph (render_stages): the Claude call, overlay image and
+        # cover frame run on worker threads while this thread renders the preview and burns the subtitles.
+        plan = render_plan(workspace, base_name, metadata)
+        store = artifact_store(config)
+
+        def generate_strategy(_):
+            print(f"🤖 Generating content strategy...")
+            strategy = ai.generate_content_strategy(transcript_text, metadata, metrics=video_metrics,
+                                                    words=transcript.get('words') if transcript else None)
+            print(f"📝 Strategy generated: {strategy.get('title', 'N/A')}")
+            return strategy
+
+        def save_artifacts(results):
+            # Kept so a later restyle (restyle.py) re-renders without new Whisper/Claude calls; local copy only, never raises
+            return store.save(file['id'], build_artifacts(file, metadata, transcript, results['strategy']))
+
+        def mirror_artifacts(results):
+            if results['artifacts']:
+                try:
+                    drive.upload_file(results['artifacts'], store.folder_id)
+                except Exception as e:
+                    print(f"⚠️  Could not mirror artifacts for {file['id']}: {e}")
+
+        def publish_preview(results):
+            if results['preview']:
+                upload_preview(drive, sheets, sheet_id, file, plan, config['final_folder_id'], video_metrics)
+
+        steps = render_steps(file['name'], plan, temp_input_path, metadata, transcript, renderer, video_metrics,
+                             reporter=lambda label, span: render_progress_reporter(sheets, sheet_id, label, span),
+                             status=lambda text: sheets.update_status(sheet_id, text))
+        steps.update(strategy=generate_strategy, artifacts=save_artifacts)
+        if store.folder_id:
+            steps['artifacts_mirror'] = mirror_artifacts
+        if 'preview' in steps:
+            steps['preview_upload'] = publish_preview
+
+        sheets.update_status(sheet_id, f"🤖 Generating strategy: {file['name']}")
+        strategy = render_stages(steps, plan['needs_intro']).run()['strategy']
+        final_video_path = finish_render(plan)
+
+        # 7. Upload Final Video
+        if not final_video_path:
+            print(f"❌ No final video generated for {file['name']}")
+            sheets.update_log_completion(sheet_id, file['id'], "N/A", "N/A", "Failed: Render Error", status="Failed")
+            return False
+
+        print(f"☁️  Uploading final video...")
+        sheets.update_status(sheet_id, f"☁️ Uploading: {file['name']}")
+        with video_metrics.span('upload', bytes=os.path.getsize(final_video_path)):
+            upload_result = drive.upload_file(final_video_path, config['final_folder_id'])
+
+        if not upload_result:
+            print(f"❌ Upload failed for {file['name']}")
+            sheets.update_log_completion(sheet_id, file['id'], "N/A", "N/A", "Failed: Upload Error", status="Failed")
+            return False
+
+        # 7b. Upload the cover frame and platform variants rendered alongside the final video
+        output_cells = upload_outputs(drive, plan, config['final_folder_id'], video_metrics)
+        if output_cells:
+            sheets.update_log_cells(sheet_id, file['id'], output_cells)
+
+        # 8. Log to Sheets (Completion Update)
+        print(f"📊 Logging to Google Sheets...")
+        platforms_list = target_platforms(metadata)
+        strategy_text = build_strategy_text(strategy)
+
+        video_time = time.time() - video_start_time
+        
+        sheets.update_log_completion(
+            sheet_id,
+            file['id'],
+            upload_result.get('webViewLink', 'N/A'),
+            platforms_list,
+            strategy_text,
+            status="Completed",
+            duration=f"{video_time:.1f}s",
+            stage_breakdown=video_metrics.breakdown() if SHEETS_STAGE_BREAKDOWN else None,
+            stages=video_metrics.stage_seconds()
+        )
+        if DEDUPE:
+            sheets.add_content_index(sheet_id, file, upload_result.get('webViewLink', 'N/A'), fingerprint)
+        video_status = "Completed"
+        print(f"✅ Successfully processed {file['name']} in {video_time:.1f}s")
+        return True
+
+    except Exception as e:
+        print(f"❌ Error processing {file.get('name', 'unknown')}: {e}")
+        sheets.update_log_completion(sheet_id, file['id'], "N/A", "N/A", f"Failed: {str(e)}", status="Failed")
+        return False
+
+    finally:
+        metrics.finish_video(video_metrics, video_status)
+
+        # Cleanup: every intermediate and output lives in the job workspace
+        workspace.close()
+
 def main():
     """
     Video Content Engine - GitHub Actions Edition
     Processes pending videos once and exits cleanly.
-    Designed for automated execution, not continuous polling.
+    Designed for automated execution; `--daemon` (worker_daemon.py) keeps running instead.
     """
     print("🎬 Starting Video Content Engine (GitHub Actions Edition)...")
     print(f"⏰ Execution started at: {time.strftime('%Y-%m-%d %H:%M:%S UTC', time.gmtime())}")
@@ -60,19 +553,17 @@ def main():
 
     try:
         # Initialize services
-        drive = DriveService()
-        video_analyzer = VideoAnalyzer()
-        ai = AIService()
-        renderer = RenderService()
-        sheets = SheetsService()
+        services = build_services()
+        drive, sheets = services[0], services[4]
+        metrics = PipelineMetrics(rate_controller=get_rate_controller())
 
         # Get configuration
         sheet_id = os.getenv('GOOGLE_SHEET_ID')
-        upload_folder_id = os.getenv('GOOGLE_DRIVE_FOLDER_ID_UPLOAD')
-        final_folder_id = os.getenv('GOOGLE_DRIVE_FOLDER_ID_FINAL')
+        config = load_config()
 
-        if not all([sheet_id, upload_folder_id, final_folder_id]):
-            raise ValueError("Missing required environment variables: GOOGLE_SHEET_ID, GOOGLE_DRIVE_FOLDER_ID_UPLOAD, GOOGLE_DRIVE_FOLDER_ID_FINAL")
+        # Keep the hot tab small before anything is claimed
+        if sheet_id:
+            sheets.archive_rows(sheet_id)
 
         # Load processed IDs from Google Sheets (primary source for GitHub Actions)
         print("📊 Loading processed video tracking from Google Sheets...")
@@ -83,17 +574,8 @@ def main():
 
         # Get pending videos
         print("🔍 Scanning for new videos in upload folder...")
-        files = drive.list_files(upload_folder_id)
-        pending_files = []
-
-        for file in files:
-            # Skip already processed
-            if file['id'] in processed_ids:
-                continue
-            # Skip output files
-            if file['name'].startswith("Final_") or file['name'].startswith("Subtitled_"):
-                continue
-            pending_files.append(file)
+        files = drive.list_files(config['upload_folder_id'])
+        pending_files = select_pending_files(files, processed_ids)
 
         print(f"📹 Found {len(pending_files)} pending videos to process")
 
@@ -108,177 +590,12 @@ def main():
         print(f"🎯 Processing {len(videos_to_process)} videos (max {max_videos} per run)")
 
         for file in videos_to_process:
-            video_start_time = time.time()
-            temp_input_path = None
-            srt_path = None
-            ass_path = None
-            final_video_path = None
-            subtitled_video_path = None
-            frame_path = None
-            titled_image_path = None
-            intro_video_path = None
-            base_name = ""
-
-            try:
-                print(f"🎬 Processing: {file['name']}")
-                sheets.update_status(sheet_id, f"🔄 Processing: {file['name']}")
-
-                # 0. LOCK: Log processing start
-                # Create a human-readable timestamp
-                current_timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                sheets.log_processing_start(sheet_id, file['id'], file.get('webViewLink', 'N/A'), file['name'], timestamp_str=current_timestamp)
-
-                # 1. Download
-                original_filename = file['name']
-                base_name, _ = os.path.splitext(original_filename)
-                temp_input_path = f"temp_input_{base_name}.mp4"
-
-                print(f"⬇️  Downloading video...")
-                drive.download_file(file['id'], temp_input_path)
-
-                # 2. Analyze
-                print(f"🔍 Analyzing video metadata...")
-                sheets.update_status(sheet_id, f"🔍 Analyzing: {file['name']}")
-                metadata = video_analyzer.get_metadata(temp_input_path)
-                print(f"📊 Metadata: {metadata}")
-
-                if not metadata:
-                    print("❌ Could not analyze video, skipping.")
-                    sheets.update_log_completion(sheet_id, file['id'], "N/A", "N/A", "Failed: Metadata Analysis Error", status="Failed")
-                    failed_count += 1
-                    continue
-
-                # 3. Transcribe
-                print(f"🎙️  Transcribing audio...")
-                sheets.update_status(sheet_id, f"🎙️ Transcribing: {file['name']}")
-                transcript = ai.transcribe_audio(temp_input_path)
-                # FIX: transcript is a dict (model_dump), not an object
-                transcript_text = transcript.get('text', "") if transcript else ""
-
-                # Generate subtitles
-                # Use Karaoke style by default for ASS
-                ass_content = json_to_ass_karaoke(transcript) if transcript else None
-                ass_path = f"temp_{base_name}.ass"
-                srt_content = json_to_srt(transcript) if transcript else None
-                srt_path = f"temp_{base_name}.srt"
-
-                # 4. Generate Content Strategy
-                print(f"🤖 Generating content strategy...")
-                sheets.update_status(sheet_id, f"🤖 Generating strategy: {file['name']}")
-                strategy = ai.generate_content_strategy(transcript_text, metadata)
-                print(f"📝 Strategy generated: {strategy.get('title', 'N/A')}")
-
-                # 5. Render Pipeline
-                print(f"🎨 Rendering subtitles...")
-                sheets.update_status(sheet_id, f"🎨 Rendering: {file['name']}")
-                subtitled_video_path = f"temp_subtitled_{base_name}.mp4"
-
-                # Burn subtitles
-                if ass_content:
-                    with open(ass_path, "w", encoding="utf-8") as f:
-                        f.write(ass_content)
-                    print(f"🔥 Burning ASS subtitles...")
-                    renderer.burn_subtitles(temp_input_path, ass_path, subtitled_video_path)
-                elif srt_content:
-                    with open(srt_path, "w", encoding="utf-8") as f:
-                        f.write(srt_content)
-                    print(f"🔥 Burning SRT subtitles...")
-                    renderer.burn_subtitles(temp_input_path, srt_path, subtitled_video_path)
-                else:
-                    print("⚠️  No transcription available, copying without subtitles")
-                    import shutil
-                    shutil.copy(temp_input_path, subtitled_video_path)
-
-                # 6. Handle Portrait Short Intro (OVERLAY STYLE)
-                if metadata.get('length_category') == 'short' and metadata.get('orientation') == 'portrait':
-                    print(f"📱 Generating intro overlay for short portrait video...")
-                    sheets.update_status(sheet_id, f"📱 Generating intro: {file['name']}")
-
-                    # Create overlay image
-                    titled_image_path = f"temp_overlay_{base_name}.png"
-                    title_text = strategy.get('title', 'Watch This!')
-                    
-                    # Get dimensions from metadata
-                    w = metadata.get('width', 1080)
-                    h = metadata.get('height', 1920)
-                    
-                    renderer.create_intro_overlay(title_text, w, h, titled_image_path)
-
-                    # Apply overlay to subtitled video
-                    final_video_path = f"Final_{base_name}.mp4"
-                    print(f"🔗 Applying intro overlay...")
-                    
-                    # If subtitles failed, use original temp input
-                    source_for_overlay = subtitled_video_path if os.path.exists(subtitled_video_path) else temp_input_path
-                    
-                    renderer.apply_intro_overlay(source_for_overlay, titled_image_path, final_video_path)
-                else:
-                    # Just use subtitled video as final
-                    final_video_path = f"Final_{base_name}.mp4"
-                    if os.path.exists(subtitled_video_path):
-                        os.rename(subtitled_video_path, final_video_path)
-
-                # 7. Upload Final Video
-                if final_video_path and os.path.exists(final_video_path):
-                    print(f"☁️  Uploading final video...")
-                    sheets.update_status(sheet_id, f"☁️ Uploading: {file['name']}")
-                    upload_result = drive.upload_file(final_video_path, final_folder_id)
-
-                    if upload_result:
-                        # 8. Log to Sheets (Completion Update)
-                        print(f"📊 Logging to Google Sheets...")
-                        platforms_list = ["TikTok", "Instagram Reels", "YouTube Shorts"] if metadata.get('orientation') == 'portrait' else ["YouTube Long-form", "LinkedIn"]
-
-                        strategy_text = f"TITLE: {strategy.get('title', 'N/A')}\n\nCAPTION: {strategy.get('caption', 'N/A')}\n\nHASHTAGS: {strategy.get('hashtags', 'N/A')}"
-                        if strategy.get('linkedin_post'):
-                            strategy_text += f"\n\nLINKEDIN: {strategy['linkedin_post']}"
-                        if strategy.get('tiktok_caption'):
-                            strategy_text += f"\n\nTIKTOK: {strategy['tiktok_caption']}"
-
-                        video_time = time.time() - video_start_time
-                        
-                        sheets.update_log_completion(
-                            sheet_id,
-                            file['id'],
-                            upload_result.get('webViewLink', 'N/A'),
-                            platforms_list,
-                            strategy_text,
-                            status="Completed",
-                            duration=f"{video_time:.1f}s"
-                        )
-
-                        processed_count += 1
-                        print(f"✅ Successfully processed {file['name']} in {video_time:.1f}s")
-                    else:
-                        print(f"❌ Upload failed for {file['name']}")
-                        sheets.update_log_completion(sheet_id, file['id'], "N/A", "N/A", "Failed: Upload Error", status="Failed")
-                        failed_count += 1
-                else:
-                    print(f"❌ No final video generated for {file['name']}")
-                    sheets.update_log_completion(sheet_id, file['id'], "N/A", "N/A", "Failed: Render Error", status="Failed")
-                    failed_count += 1
-
-            except Exception as e:
-                print(f"❌ Error processing {file.get('name', 'unknown')}: {e}")
-                if 'file' in locals() and 'id' in file:
-                     sheets.update_log_completion(sheet_id, file['id'], "N/A", "N/A", f"Failed: {str(e)}", status="Failed")
+            result = process_video(file, services, config, metrics)
+            if result:
+                processed_count += 1
+            elif result is False:
                 failed_count += 1
 
-            finally:
-                # Cleanup temporary files
-                files_to_clean = [
-                    temp_input_path, srt_path, ass_path,
-                    final_video_path, subtitled_video_path,
-                    frame_path, titled_image_path, intro_video_path
-                ]
-                for p in files_to_clean:
-                    if p and os.path.exists(p):
-                        try:
-                            os.remove(p)
-                            print(f"🧹 Cleaned up: {p}")
-                        except Exception as cleanup_err:
-                            print(f"⚠️  Cleanup warning: Could not delete {p}: {cleanup_err}")
-
         # Summary
         total_time = time.time() - start_time
         print("\n📊 Processing Summary:")
@@ -306,6 +623,38 @@ def main():
             except:
                 pass
         return 1
+    finally:
+        flush_journal()
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Video Content Engine")
+    parser.add_argument('--daemon', action='store_true',
+                        help="Keep running: poll for new uploads and process them with DAEMON_WORKERS workers until SIGTERM")
+    parser.add_argument('--transcribe-backend', choices=['openai', 'local'],
+                        help="Override TRANSCRIBE_BACKEND for this run")
+    parser.add_argument('--input-dir', help="Batch mode: process the videos in this local directory (no Drive or Sheets)")
+    parser.add_argument('--output-dir', help="Batch mode: where results and manifest.json are written")
+    parser.add_argument('--manifest', help="Batch mode: manifest path (default: <output-dir>/manifest.json)")
+    parser.add_argument('--workers', type=int, help="Batch/restyle mode: videos processed in parallel (default: BATCH_WORKERS / RESTYLE_WORKERS)")
+    parser.add_argument('--limit', type=int, help="Batch mode: process at most this many videos")
+    parser.add_argument('--restyle', metavar='IDS',
+                        help="Re-render processed videos (comma-separated IDs, or 'all' with local artifacts) from their "
+                             "stored transcript and strategy; only render and upload run. Combine with --input-dir/--output-dir for batch runs")
+    args = parser.parse_args()
+    if args.transcribe_backend:
+        import services.ai_generation
+        services.ai_generation.TRANSCRIBE_BACKEND = args.transcribe_backend
+    if (args.input_dir or args.output_dir) and not (args.input_dir and args.output_dir):
+        parser.error("--input-dir and --output-dir go together")
+    if args.restyle:
+        from restyle import run_restyle
+        ids = [i.strip() for i in args.restyle.split(',') if i.strip()]
+        raise SystemExit(run_restyle(ids, args.workers, args.input_dir, args.output_dir, args.manifest))
+    if args.input_dir:
+        from batch import run_batch
+        raise SystemExit(run_batch(args.input_dir, args.output_dir, args.workers, args.manifest, args.limit))
+    if args.daemon:
+        from worker_daemon import run_daemon
+        raise SystemExit(run_daemon())
     main()
@@ -0,0 +1,153 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from main import (load_config, job_disk_bytes, render_progress_reporter, render_plan, render_steps, render_stages,
+                  finish_render, upload_outputs)
+from services.drive import DriveService
+from services.renderer import RenderService
+from services.sheets import SheetsService, FINAL_LINK_COLUMN, flush_journal
+from services.artifacts import artifact_store
+from services.workspace import JobWorkspace
+from services.metrics import PipelineMetrics
+from services.rate_limiter import get_rate_controller
+
+# Videos re-rendered in parallel by `--restyle`; each worker owns its own renderer and API clients
+RESTYLE_WORKERS = int(os.getenv('RESTYLE_WORKERS', '2'))
+
+
+def restyle_video(original_id, services, config, store, metrics):
+    """
+    Re-render one processed video with the current subtitle and overlay styles from its stored
+    transcript and strategy: download, then main's render stages with the stored strategy in place of
+    the Claude call (no preview, no new artifacts), upload, relink. No Whisper or Claude call.
+    The previous final, cover and variant files stay in Drive: duplicate rows and the content index
+    link the old final, and they are what the new render gets compared with. Only the row is repointed.
+    Returns True on success, False on failure, None if deferred (no disk).
+    """
+    drive, renderer, sheets = services
+    sheet_id = config['sheet_id']
+    video_start_time = time.time()
+    artifacts = store.load(original_id, drive)
+    if not artifacts:
+        print(f"❌ No stored transcript/strategy for {original_id}; it has to be processed again instead")
+        return False
+
+    name = artifacts['filename']
+    base_name, _ = os.path.splitext(name)
+    metadata = artifacts['metadata']
+    transcript = artifacts['transcript']
+    strategy = artifacts['strategy'] or {}
+    video_metrics = metrics.start_video(original_id, name)
+    video_status = "Failed"
+    workspace = JobWorkspace(original_id, job_disk_bytes(artifacts))
+
+    try:
+        print(f"🎨 Restyling: {name}")
+        if not workspace.admit():
+            print(f"💾 Not enough free disk for {name}, deferring")
+            video_status = "Deferred"
+            return None
+        sheets.update_status(sheet_id, f"🎨 Restyling: {name}")
+
+        temp_input_path = workspace.path(f"temp_input_{base_name}.mp4")
+        with video_metrics.span('download') as span:
+            drive.download_file(original_id, temp_input_path)
+            span['bytes'] = os.path.getsize(temp_input_path) if os.path.exists(temp_input_path) else None
+        if not os.path.exists(temp_input_path):
+            print(f"❌ Could not fetch the source of {name}")
+            return False
+
+        # The same stages as a first run, with the stored strategy standing in for the Claude call
+        plan = render_plan(workspace, base_name, metadata)
+        plan['preview_path'] = None
+        steps = render_steps(name, plan, temp_input_path, metadata, transcript, renderer, video_metrics,
+                             reporter=lambda label, span: render_progress_reporter(sheets, sheet_id, label, span),
+                             status=lambda text: sheets.update_status(sheet_id, text))
+        steps['strategy'] = lambda _: strategy
+        render_stages(steps, plan['needs_intro']).run()
+        final_video_path = finish_render(plan)
+        if not final_video_path:
+            print(f"❌ No restyled video generated for {name}")
+            return False
+
+        with video_metrics.span('upload', bytes=os.path.getsize(final_video_path)):
+            upload_result = drive.upload_file(final_video_path, config['final_folder_id'])
+        if not upload_result:
+            print(f"❌ Upload failed for {name}")
+            return False
+
+        # Point the existing row at the new outputs; status, strategy and timings stay as they were
+        cells = {FINAL_LINK_COLUMN: upload_result.get('webViewLink', 'N/A')}
+        cells.update(upload_outputs(drive, plan, config['final_folder_id'], video_metrics))
+        sheets.update_log_cells(sheet_id, original_id, cells)
+
+        video_status = "Restyled"
+        print(f"✅ Restyled {name} in {time.time() - video_start_time:.1f}s")
+        return True
+
+    except Exception as e:
+        print(f"❌ Error restyling {name}: {e}")
+        return False
+
+    finally:
+        metrics.finish_video(video_metrics, video_status)
+        workspace.close()
+
+
+def run_restyle(ids, workers=None, input_dir=None, output_dir=None, manifest_path=None):
+    """
+    Entry point for `python execution/main.py --restyle ID,ID,...` ('all' = every ID with local artifacts).
+    With input_dir/output_dir the sources, outputs and log are the batch-mode directory and manifest.
+    """
+    workers = max(1, workers or RESTYLE_WORKERS)
+    print(f"🎬 Starting Video Content Engine (restyle, {workers} workers)...")
+    if input_dir:
+        from batch import batch_config
+        from services.local_io import LocalFolderService, ManifestService
+        config = batch_config(input_dir, output_dir, manifest_path)
+        folder = LocalFolderService(checksums=False)
+        folder.list_files(input_dir)  # id -> path for download_file
+        manifest = ManifestService(config['sheet_id'])
+        make_services = lambda: (folder, RenderService(), manifest)
+    else:
+        try:
+            config = load_config()
+        except Exception as e:
+            print(f"💥 Could not start restyle: {e}")
+            return 1
+        make_services = lambda: (DriveService(), RenderService(), SheetsService())
+
+    store = artifact_store(config)
+    if ids == ['all']:
+        ids = store.ids()
+    print(f"📹 Restyling {len(ids)} videos")
+    if not ids:
+        return 0
+
+    metrics = PipelineMetrics(rate_controller=get_rate_controller())
+    local = threading.local()
+
+    def restyle(original_id):
+        if not hasattr(local, 'services'):
+            local.services = make_services()
+        try:
+            return restyle_video(original_id, local.services, config, store, metrics)
+        except Exception as e:
+            print(f"❌ Restyle error on {original_id}: {e}")
+            return False
+
+    start_time = time.time()
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='restyle') as pool:
+            results = list(pool.map(restyle, ids))
+    finally:
+        flush_journal()
+
+    restyled_count = sum(1 for r in results if r)
+    failed_count = sum(1 for r in results if r is False)
+    print("\n📊 Restyle Summary:")
+    print(f"   ✅ Videos restyled: {restyled_count}")
+    print(f"   ❌ Videos failed: {failed_count}")
+    print(f"   ⏱️  Total time: {time.time() - start_time:.1f}s")
+    return 0 if failed_count == 0 else 1
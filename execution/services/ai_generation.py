@@ -1,79 +1,449 @@
 import os
-from openai import OpenAI
+import shutil
+import asyncio
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from openai import OpenAI, AsyncOpenAI
 import anthropic
 import json
+from .rate_limiter import get_rate_controller
+from .metrics import NULL_METRICS
+from .local_transcriber import get_local_transcriber
+
+# Transcription engine for this run: 'openai' (whisper-1 API) or 'local' (faster-whisper on CPU)
+TRANSCRIBE_BACKEND = os.getenv('TRANSCRIBE_BACKEND', 'openai').lower()
+
+# Audio sent to Whisper: 'mp3' (128 kbps) or 'opus' (speech-tuned Ogg/Opus, ~5x smaller uploads)
+WHISPER_AUDIO_CODEC = os.getenv('WHISPER_AUDIO_CODEC', 'mp3').lower()
+WHISPER_OPUS_BITRATE = os.getenv('WHISPER_OPUS_BITRATE', '24k')
+AUDIO_FORMATS = {
+    'mp3': ('mp3', ['-ab', '128k', '-f', 'mp3']),
+    'opus': ('ogg', ['-c:a', 'libopus', '-b:a', WHISPER_OPUS_BITRATE, '-application', 'voip', '-f', 'ogg']),
+}
+# Extracted audio stays in memory up to this size, then spools to a temp file in the job workspace
+AUDIO_SPOOL_BYTES = int(float(os.getenv('AUDIO_SPOOL_MB', '32')) * 1024 * 1024)
+AUDIO_READ_CHUNK = 256 * 1024
+
+# Transcripts longer than this (estimated tokens) are summarised chunk by chunk before the strategy call
+LONG_TRANSCRIPT_TOKENS = int(os.getenv('LONG_TRANSCRIPT_TOKENS', '1500'))
+# Target size of each chunk; grows when a video would need more than STRATEGY_MAX_CHUNKS
+STRATEGY_CHUNK_TOKENS = int(os.getenv('STRATEGY_CHUNK_TOKENS', '2500'))
+# Map calls run concurrently, so capping the fan-out keeps latency flat as videos get longer
+STRATEGY_MAX_CHUNKS = int(os.getenv('STRATEGY_MAX_CHUNKS', '12'))
+SUMMARY_MODEL = os.getenv('STRATEGY_SUMMARY_MODEL', 'claude-3-haiku-20240307')
+CHARS_PER_TOKEN = 4
+
+
+def _audio_format(codec=None):
+    codec = codec or WHISPER_AUDIO_CODEC
+    return AUDIO_FORMATS.get(codec, AUDIO_FORMATS['mp3'])
+
+
+def _audio_extract_cmd(file_path, codec=None):
+    """FFmpeg command that writes 16kHz mono audio for Whisper to stdout."""
+    return [
+        'ffmpeg', '-nostdin', '-loglevel', 'error', '-i', file_path,
+        '-vn', '-ar', '16000', '-ac', '1', *_audio_format(codec)[1],
+        'pipe:1'
+    ]
+
+
+def _audio_upload_name(file_path, codec=None):
+    # Whisper detects the container from the extension
+    return f"audio_{os.path.splitext(os.path.basename(file_path))[0]}.{_audio_format(codec)[0]}"
+
+
+def _new_audio_spool(work_dir=None):
+    return tempfile.SpooledTemporaryFile(max_size=AUDIO_SPOOL_BYTES, dir=work_dir)
+
+
+def _extract_audio(file_path, work_dir=None):
+    """Pipe ffmpeg's audio straight into a spooled buffer (memory, or work_dir above AUDIO_SPOOL_BYTES)."""
+    spool = _new_audio_spool(work_dir)
+    try:
+        with subprocess.Popen(_audio_extract_cmd(file_path), stdout=subprocess.PIPE, stderr=subprocess.PIPE) as process:
+            # Drain stderr alongside stdout: a full stderr pipe would block ffmpeg while we wait for stdout EOF
+            stderr = []
+            reader = threading.Thread(target=lambda: stderr.append(process.stderr.read()), daemon=True)
+            reader.start()
+            shutil.copyfileobj(process.stdout, spool, AUDIO_READ_CHUNK)
+            reader.join()
+        if process.returncode != 0:
+            raise RuntimeError(f"ffmpeg audio extraction failed: {b''.join(stderr).decode(errors='replace')[-500:]}")
+    except Exception:
+        spool.close()
+        raise
+    return spool
+
+
+def _estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _clock(seconds):
+    seconds = int(seconds or 0)
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+def chunk_transcript(transcript_text, words=None, chunk_tokens=None, max_chunks=None):
+    """
+    Split a transcript into token-bounded chunks, returned as [{'start', 'end', 'text'}].
+    Uses Whisper's word timeline when available so each summary can be anchored in time;
+    plain text is split on whitespace with no timestamps.
+    """
+    chunk_tokens = chunk_tokens or STRATEGY_CHUNK_TOKENS
+    max_chunks = max_chunks or STRATEGY_MAX_CHUNKS
+    if not words:
+        words = [{'word': w} for w in transcript_text.split()]
+    costs = [_estimate_tokens(w.get('word', '')) for w in words]
+    total = sum(costs)
+    # Long videos get bigger chunks rather than more calls
+    count = max(1, min(max_chunks, -(-total // chunk_tokens)))
+    budget = total / count
+
+    chunks, current, used = [], [], 0
+    for word, cost in zip(words, costs):
+        # Cut on cumulative targets so rounding never produces an extra chunk
+        if current and used + cost > budget * (len(chunks) + 1) and len(chunks) < count - 1:
+            chunks.append(current)
+            current = []
+        current.append(word)
+        used += cost
+    if current:
+        chunks.append(current)
+
+    return [{
+        'start': chunk[0].get('start'),
+        'end': chunk[-1].get('end'),
+        'text': " ".join(w.get('word', '').strip() for w in chunk),
+    } for chunk in chunks]
+
+
+def _summary_request(chunk, index, count):
+    span = f" ({_clock(chunk['start'])}-{_clock(chunk['end'])})" if chunk['start'] is not None else ""
+    prompt = f"""
+        Part {index + 1} of {count} of a video transcript{span}:
+        {chunk['text']}
+
+        Task: Summarise this part in 3-5 short bullet points. Keep concrete claims, numbers,
+        names and any quotable line verbatim. Output plain text only.
+        """
+    return {
+        "model": SUMMARY_MODEL,
+        "max_tokens": 300,
+        "temperature": 0.2,
+        "messages": [{"role": "user", "content": prompt}],
+    }
+
+
+def _merge_summaries(chunks, summaries):
+    parts = []
+    for chunk, summary in zip(chunks, summaries):
+        label = f"[{_clock(chunk['start'])}-{_clock(chunk['end'])}]" if chunk['start'] is not None else "[part]"
+        parts.append(f"{label}\n{summary.strip()}")
+    return "\n\n".join(parts)
+
+
+def _is_long(transcript_text):
+    return _estimate_tokens(transcript_text) > LONG_TRANSCRIPT_TOKENS
+
+
+# Extra round-trips allowed when the model returns an incomplete strategy
+STRATEGY_REPAIR_ATTEMPTS = int(os.getenv('STRATEGY_REPAIR_ATTEMPTS', '1'))
+
+STRATEGY_SYSTEM = """You are a social media expert writing copy for short- and long-form video.
+You receive a transcript (or a chronological summary of one) plus the video's duration category and orientation.
+Always answer by calling the publish_content_strategy tool, never with plain text.
+
+Fields:
+- title: a short hook for the on-screen intro overlay, at most 8 words. Wrap the 1-2 most important "impact" keywords in asterisks (*) for highlighting.
+  Example: "Watch This *INSANE* Trick" or "How to *FIX* Your *SLEEP*"
+- caption: 1-3 sentences for the post body, written for the platform audience.
+- hashtags: 5-10 relevant hashtags separated by spaces.
+- linkedin_post: only for landscape or long videos. A professional post of 3-6 short paragraphs.
+- tiktok_caption: only for portrait videos. Punchy, under 150 characters, may include emojis.
+
+Stay faithful to what is actually said in the video; do not invent facts, names or numbers."""
+
+STRATEGY_TOOL = {
+    "name": "publish_content_strategy",
+    "description": "Publish the social media copy for this video.",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "title": {"type": "string", "description": "Intro overlay hook with 1-2 *impact* keywords in asterisks"},
+            "caption": {"type": "string"},
+            "hashtags": {"type": "string", "description": "Space-separated hashtags"},
+            "linkedin_post": {"type": "string", "description": "Only for landscape or long videos"},
+            "tiktok_caption": {"type": "string", "description": "Only for portrait videos"},
+        },
+        "required": ["title", "caption", "hashtags"],
+    },
+}
+
+STRATEGY_REQUEST = {
+    "model": "claude-3-haiku-20240307",
+    "max_tokens": 1000,
+    "temperature": 0.7,
+    # Static instructions and tool schema; per-video context lives only in the user message.
+    # Not marked for prompt caching: this prefix is far below Haiku's 2048-token caching minimum.
+    "system": STRATEGY_SYSTEM,
+    "tools": [STRATEGY_TOOL],
+    "tool_choice": {"type": "tool", "name": STRATEGY_TOOL["name"]},
+}
+
+
+class StrategyError(Exception):
+    """Claude did not produce a usable content strategy, even after the repair retries."""
+
+
+def _strategy_prompt(transcript_text, duration_checks, summarised=False):
+    if summarised:
+        context = f"Transcript summary (chronological, whole video):\n{transcript_text}"
+    else:
+        context = f"Transcript: {transcript_text}"
+    return f"""
+        Video Context:
+        {context}
+        Duration Category: {duration_checks['length_category']}
+        Orientation: {duration_checks['orientation']}
+        """
+
+
+def _parse_strategy(raw_text):
+    # Simple cleanup in case of markdown blocks
+    if "```json" in raw_text:
+        raw_text = raw_text.split("```json")[1].split("```")[0]
+    elif "```" in raw_text:
+        raw_text = raw_text.split("```")[1].split("```")[0]
+
+    return json.loads(raw_text.strip())
+
+
+def _strategy_problem(strategy):
+    """Why a strategy is unusable, or None if it is fine."""
+    if not isinstance(strategy, dict):
+        return "expected a JSON object"
+    missing = [k for k in STRATEGY_TOOL["input_schema"]["required"]
+               if not isinstance(strategy.get(k), str) or not strategy[k].strip()]
+    if missing:
+        return f"missing or empty fields: {', '.join(missing)}"
+    return None
+
+
+def _read_strategy(message):
+    """Returns (strategy, problem, tool_use_id) for a strategy response."""
+    for block in message.content:
+        if getattr(block, 'type', None) == 'tool_use':
+            return block.input, _strategy_problem(block.input), block.id
+    # Tool use is forced, but accept a plain JSON answer rather than burn a repair on it
+    text = "".join(getattr(block, 'text', '') for block in message.content)
+    try:
+        strategy = _parse_strategy(text)
+    except ValueError as e:
+        return None, f"no {STRATEGY_TOOL['name']} call and no valid JSON ({e})", None
+    return strategy, _strategy_problem(strategy), None
+
+
+def _repair_messages(messages, message, problem, tool_use_id):
+    """Conversation for a repair attempt: the bad answer plus an error the model can act on."""
+    reply = f"Invalid strategy: {problem}. Call {STRATEGY_TOOL['name']} again with every required field filled in."
+    assistant = [b.model_dump(exclude_none=True) if hasattr(b, 'model_dump') else dict(vars(b)) for b in message.content]
+    if tool_use_id:
+        content = [{"type": "tool_result", "tool_use_id": tool_use_id, "is_error": True, "content": reply}]
+    else:
+        content = reply
+    return messages + [{"role": "assistant", "content": assistant}, {"role": "user", "content": content}]
+
 
 class AIService:
-    def __init__(self):
-        self.openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
-        self.anthropic_client = anthropic.Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
+    def __init__(self, transcribe_backend=None):
+        self.transcribe_backend = transcribe_backend or TRANSCRIBE_BACKEND
+        # SDK retries are off: the shared RateController owns backoff so quotas are tracked in one place
+        # (no OpenAI client, and so no OPENAI_API_KEY needed, when transcribing locally)
+        self.openai_client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'), max_retries=0) if self.transcribe_backend != 'local' else None
+        self.anthropic_client = anthropic.Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'), max_retries=0)
+        self.rate = get_rate_controller()
 
-    def transcribe_audio(self, file_path):
-        """Transcribe audio using Whisper. Extracts audio first to bypass 25MB limit."""
-        temp_audio = f"temp_audio_{os.path.basename(file_path)}.mp3"
+    def transcribe_audio(self, file_path, metrics=None, work_dir=None):
+        """Transcribe audio using Whisper. Extracts audio first to bypass 25MB limit (spills to work_dir only if large)."""
+        metrics = metrics or NULL_METRICS
+        if self.transcribe_backend == 'local':
+            try:
+                return get_local_transcriber().transcribe(file_path, metrics)
+            except Exception as e:
+                print(f"Transcription failed: {e}")
+                return None
+        audio = None
         try:
-            # Extract audio using FFmpeg
-            import subprocess
-            cmd = [
-                'ffmpeg', '-y', '-i', file_path, 
-                '-vn', '-ar', '16000', '-ac', '1', '-ab', '128k', '-f', 'mp3', 
-                temp_audio
-            ]
-            subprocess.run(cmd, capture_output=True, check=True)
-
-            with open(temp_audio, "rb") as audio_file:
-                transcript = self.openai_client.audio.transcriptions.create(
-                    model="whisper-1", 
-                    file=audio_file,
+            with metrics.span('audio_extract') as span:
+                audio = _extract_audio(file_path, work_dir)
+                size = audio.tell()
+                span['bytes'] = size
+
+            def send():
+                # Rewind so a retried request re-sends the same bytes
+                audio.seek(0)
+                return self.openai_client.audio.transcriptions.create(
+                    model="whisper-1",
+                    file=(_audio_upload_name(file_path), audio),
                     response_format="verbose_json",
                     timestamp_granularities=["word"]
                 )
-            
-            # Cleanup
-            if os.path.exists(temp_audio):
-                os.remove(temp_audio)
-                
+
+            with metrics.span('whisper', bytes=size):
+                transcript = self.rate.call('openai', send)
+
             # Convert Transcription object to dict for robust serialization/processing
             return transcript.model_dump() if hasattr(transcript, 'model_dump') else transcript
         except Exception as e:
             print(f"Transcription failed: {e}")
-            if os.path.exists(temp_audio):
-                os.remove(temp_audio)
             return None
+        finally:
+            if audio:
+                audio.close()
 
-    def generate_content_strategy(self, transcript_text, duration_checks):
-        """Generate titles, captions, etc. using Claude."""
-        
-        prompt = f"""
-        Video Context:
-        Transcript: {transcript_text[:4000]}... (truncated)
-        Duration Category: {duration_checks['length_category']}
-        Orientation: {duration_checks['orientation']}
+    def summarise_transcript(self, transcript_text, words=None, metrics=None):
+        """Map step for long transcripts: summarise each chunk concurrently with the cheap model."""
+        chunks = chunk_transcript(transcript_text, words)
+        with (metrics or NULL_METRICS).span('claude_map'):
+            # The rate controller still bounds how many of these are in flight
+            with ThreadPoolExecutor(max_workers=len(chunks)) as pool:
+                messages = list(pool.map(
+                    lambda i: self.rate.call('anthropic', self.anthropic_client.messages.create,
+                                             **_summary_request(chunks[i], i, len(chunks))),
+                    range(len(chunks))
+                ))
+        print(f"🧩 Summarised {len(chunks)} transcript chunks")
+        return _merge_summaries(chunks, [m.content[0].text for m in messages])
 
-        Task: Generate social media content.
-        Output JSON with keys: 'title', 'caption', 'hashtags', 'linkedin_post' (if landscape/long), 'tiktok_caption' (if portrait).
-        
-        IMPORTANT: For the 'title', wrap 1-2 most important "impact" keywords in asterisks (*) for highlighting. 
-        Example: "Watch This *INSANE* Trick" or "How to *FIX* Your *SLEEP*"
-        """
-        
+    def generate_content_strategy(self, transcript_text, duration_checks, metrics=None, words=None):
+        """Generate titles, captions, etc. using Claude. Long transcripts are map-reduced first.
+        Raises StrategyError instead of returning an empty strategy."""
+        try:
+            summarised = _is_long(transcript_text)
+            if summarised:
+                transcript_text = self.summarise_transcript(transcript_text, words, metrics)
+            prompt = _strategy_prompt(transcript_text, duration_checks, summarised)
+
+            messages = [{"role": "user", "content": prompt}]
+            with (metrics or NULL_METRICS).span('claude'):
+                for attempt in range(STRATEGY_REPAIR_ATTEMPTS + 1):
+                    message = self.rate.call(
+                        'anthropic',
+                        self.anthropic_client.messages.create,
+                        messages=messages,
+                        **STRATEGY_REQUEST
+                    )
+                    strategy, problem, tool_use_id = _read_strategy(message)
+                    if not problem:
+                        return strategy
+                    print(f"⚠️  Strategy attempt {attempt + 1} unusable ({problem})")
+                    messages = _repair_messages(messages, message, problem, tool_use_id)
+            raise StrategyError(problem)
+        except StrategyError:
+            raise
+        except Exception as e:
+            raise StrategyError(f"Content generation failed: {e}") from e
+
+
+class AsyncAIService:
+    """Asyncio variant of AIService built on AsyncOpenAI / AsyncAnthropic."""
+
+    def __init__(self, transcribe_backend=None):
+        self.transcribe_backend = transcribe_backend or TRANSCRIBE_BACKEND
+        self.openai_client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'), max_retries=0) if self.transcribe_backend != 'local' else None
+        self.anthropic_client = anthropic.AsyncAnthropic(api_key=os.getenv('ANTHROPIC_API_KEY'), max_retries=0)
+        self.rate = get_rate_controller()
+
+    async def transcribe_audio(self, file_path, metrics=None, work_dir=None):
+        """Transcribe audio using Whisper. Extracts audio first to bypass 25MB limit (spills to work_dir only if large)."""
+        metrics = metrics or NULL_METRICS
+        if self.transcribe_backend == 'local':
+            # CPU-bound (and the first call loads the model): keep it off the loop. Threads from
+            # several videos share one model, up to LOCAL_WHISPER_WORKERS at a time.
+            try:
+                return await asyncio.to_thread(lambda: get_local_transcriber().transcribe(file_path, metrics))
+            except Exception as e:
+                print(f"Transcription failed: {e}")
+                return None
+        audio = _new_audio_spool(work_dir)
         try:
-            message = self.anthropic_client.messages.create(
-                model="claude-3-haiku-20240307",
-                max_tokens=1000,
-                temperature=0.7,
-                system="You are a social media expert. Output ONLY valid raw JSON.",
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            raw_text = message.content[0].text
-            # Simple cleanup in case of markdown blocks
-            if "```json" in raw_text:
-                raw_text = raw_text.split("```json")[1].split("```")[0]
-            elif "```" in raw_text:
-                raw_text = raw_text.split("```")[1].split("```")[0]
-                
-            return json.loads(raw_text.strip())
+            with metrics.span('audio_extract') as span:
+                process = await asyncio.create_subprocess_exec(
+                    *_audio_extract_cmd(file_path),
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+
+                async def pump():
+                    while chunk := await process.stdout.read(AUDIO_READ_CHUNK):
+                        audio.write(chunk)
+
+                _, stderr = await asyncio.gather(pump(), process.stderr.read())
+                if await process.wait() != 0:
+                    raise RuntimeError(f"ffmpeg audio extraction failed: {stderr.decode(errors='replace')[-500:]}")
+                size = audio.tell()
+                span['bytes'] = size
+
+            async def send():
+                audio.seek(0)
+                return await self.openai_client.audio.transcriptions.create(
+                    model="whisper-1",
+                    file=(_audio_upload_name(file_path), audio),
+                    response_format="verbose_json",
+                    timestamp_granularities=["word"]
+                )
+
+            with metrics.span('whisper', bytes=size):
+                transcript = await self.rate.acall('openai', send)
+
+            return transcript.model_dump() if hasattr(transcript, 'model_dump') else transcript
+        except Exception as e:
+            print(f"Transcription failed: {e}")
+            return None
+        finally:
+            audio.close()
+
+    async def summarise_transcript(self, transcript_text, words=None, metrics=None):
+        """Map step for long transcripts: summarise each chunk concurrently with the cheap model."""
+        chunks = chunk_transcript(transcript_text, words)
+        with (metrics or NULL_METRICS).span('claude_map'):
+            messages = await asyncio.gather(*[
+                self.rate.acall('anthropic', self.anthropic_client.messages.create,
+                                **_summary_request(chunk, i, len(chunks)))
+                for i, chunk in enumerate(chunks)
+            ])
+        print(f"🧩 Summarised {len(chunks)} transcript chunks")
+        return _merge_summaries(chunks, [m.content[0].text for m in messages])
+
+    async def generate_content_strategy(self, transcript_text, duration_checks, metrics=None, words=None):
+        """Generate titles, captions, etc. using Claude. Long transcripts are map-reduced first.
+        Raises StrategyError instead of returning an empty strategy."""
+        try:
+            summarised = _is_long(transcript_text)
+            if summarised:
+                transcript_text = await self.summarise_transcript(transcript_text, words, metrics)
+            prompt = _strategy_prompt(transcript_text, duration_checks, summarised)
+
+            messages = [{"role": "user", "content": prompt}]
+            with (metrics or NULL_METRICS).span('claude'):
+                for attempt in range(STRATEGY_REPAIR_ATTEMPTS + 1):
+                    message = await self.rate.acall(
+                        'anthropic',
+                        self.anthropic_client.messages.create,
+                        messages=messages,
+                        **STRATEGY_REQUEST
+                    )
+                    strategy, problem, tool_use_id = _read_strategy(message)
+                    if not problem:
+                        return strategy
+                    print(f"⚠️  Strategy attempt {attempt + 1} unusable ({problem})")
+                    messages = _repair_messages(messages, message, problem, tool_use_id)
+            raise StrategyError(problem)
+        except StrategyError:
+            raise
         except Exception as e:
-            print(f"Content generation failed: {e}")
-            return {}
+            raise StrategyError(f"Content generation failed: {e}") from e
@@ -0,0 +1,99 @@
+import os
+import re
+import json
+import datetime
+
+# Transcript and strategy of every processed video, kept so a restyle can re-render without new Whisper/Claude calls
+ARTIFACT_DIR = os.getenv('ARTIFACT_DIR', 'artifacts')
+# Optional Drive folder mirroring the artifacts, for runners whose disk does not survive the run (GitHub Actions)
+ARTIFACT_FOLDER_ID = os.getenv('GOOGLE_DRIVE_FOLDER_ID_ARTIFACTS')
+ARTIFACT_VERSION = 1
+
+
+def artifact_name(original_id):
+    return f"artifacts_{re.sub(r'[^A-Za-z0-9_.-]', '_', str(original_id))}.json"
+
+
+def build_artifacts(file, metadata, transcript, strategy):
+    """Everything a restyle needs besides the source video itself."""
+    return {
+        'version': ARTIFACT_VERSION,
+        'id': file['id'],
+        'filename': file['name'],
+        'size': file.get('size'),
+        'md5': file.get('md5Checksum'),
+        'metadata': metadata,
+        'transcript': transcript,
+        'strategy': strategy,
+        'saved_at': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+class ArtifactStore:
+    """
+    One JSON file per original ID in `directory`, optionally mirrored to a Drive folder.
+    Loads read the local copy first and fall back to the newest Drive copy.
+    """
+
+    def __init__(self, directory=None, folder_id=None):
+        self.directory = directory or ARTIFACT_DIR
+        self.folder_id = folder_id
+
+    def path(self, original_id):
+        return os.path.join(self.directory, artifact_name(original_id))
+
+    def write(self, original_id, artifacts):
+        """Write the local copy (write-then-rename). Returns its path."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(original_id)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(artifacts, f, default=str)
+        os.replace(tmp_path, path)
+        return path
+
+    def save(self, original_id, artifacts, drive=None):
+        """Store the artifacts locally and, with a folder set, on Drive. Never raises: a restyle is optional."""
+        try:
+            path = self.write(original_id, artifacts)
+            if self.folder_id and drive:
+                drive.upload_file(path, self.folder_id)
+            return path
+        except Exception as e:
+            print(f"⚠️  Could not store artifacts for {original_id}: {e}")
+            return None
+
+    def load(self, original_id, drive=None):
+        """Stored artifacts for original_id, or None."""
+        path = self.path(original_id)
+        try:
+            if not os.path.exists(path) and self.folder_id and drive:
+                found = drive.find_file(artifact_name(original_id), self.folder_id)
+                if found:
+                    os.makedirs(self.directory, exist_ok=True)
+                    drive.download_file(found['id'], path)
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"⚠️  Could not load artifacts for {original_id}: {e}")
+        return None
+
+    def ids(self):
+        """Original IDs with a local copy."""
+        if not os.path.isdir(self.directory):
+            return []
+        ids = []
+        for name in sorted(os.listdir(self.directory)):
+            if name.startswith("artifacts_") and name.endswith(".json"):
+                try:
+                    with open(os.path.join(self.directory, name), encoding='utf-8') as f:
+                        ids.append(json.load(f)['id'])
+                except Exception:
+                    continue
+        return ids
+
+
+def artifact_store(config):
+    """The store a pipeline run uses: config['artifact_dir'] / config['artifact_folder_id'] when set."""
+    return ArtifactStore(config.get('artifact_dir'), config.get('artifact_folder_id'))
@@ -0,0 +1,180 @@
+import re
+import bisect
+import datetime
+
+# 'Dashboard Summary' tab: a fixed-size grid the dashboard reads instead of the whole log.
+# Rows 2-8 totals, 11-20 platforms, 23-42 stage times, 45-54 recent activity (newest first).
+SUMMARY_TAB = "Dashboard Summary"
+SUMMARY_RANGE = "'Dashboard Summary'!A1:H54"
+TOTALS_ROW, PLATFORM_ROW, STAGE_ROW, ACTIVITY_ROW = 2, 11, 23, 45
+MAX_PLATFORMS, MAX_STAGES, ACTIVITY_SIZE = 10, 20, 10
+TOTAL_KEYS = [("total", "Total Videos"), ("completed", "Completed"), ("failed", "Failed"),
+              ("duplicates", "Duplicates"), ("success_rate", "Success Rate (%)"),
+              ("last_activity", "Last Activity"), ("updated_at", "Updated At")]
+ACTIVITY_HEADER = ["Timestamp", "Title", "Status", "Platforms", "Original Link", "Final Link", "Duration", "Original ID"]
+# Histogram bucket upper bounds (seconds) for stage-time percentiles; the last bucket is open-ended
+BUCKETS = [0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300, 600, 1200, 1800, 3600]
+
+
+def empty_summary():
+    return {'total': 0, 'completed': 0, 'failed': 0, 'duplicates': 0, 'last_activity': "",
+            'platforms': {}, 'stages': {}, 'activity': []}
+
+
+def _title(strategy_content):
+    match = re.search(r"TITLE:\s*(.*?)(?=\n\n|$)", strategy_content or "")
+    return match.group(1).strip() if match else (strategy_content or "").split("\n")[0][:80]
+
+
+def completion_event(original_id, original_link, final_link, platforms, strategy_content, status, duration, stages=None):
+    """One finished video, as folded into the summary."""
+    if isinstance(platforms, str):
+        platforms = [p.strip() for p in platforms.split(",") if p.strip() and p.strip() not in ("N/A", "Linked")]
+    stages = dict(stages or {})
+    if duration:
+        try:
+            stages['total'] = float(str(duration).rstrip('s'))
+        except ValueError:
+            pass
+    return {
+        'timestamp': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'id': original_id,
+        'title': _title(strategy_content),
+        'status': status,
+        'platforms': list(platforms or []),
+        'original_link': original_link or "",
+        'final_link': final_link or "",
+        'duration': str(duration) if duration else "",
+        'stages': {stage: round(seconds, 3) for stage, seconds in stages.items()},
+    }
+
+
+def _bucket_counts(cell):
+    counts = [int(c) for c in str(cell or "").split()]
+    return counts + [0] * (len(BUCKETS) + 1 - len(counts))
+
+
+def percentile(counts, q):
+    """q-th percentile (0-1) from bucket counts, interpolated inside the bucket."""
+    total = sum(counts)
+    if not total:
+        return ""
+    target = q * total
+    seen = 0
+    for i, count in enumerate(counts):
+        if count and seen + count >= target:
+            low = BUCKETS[i - 1] if i else 0
+            high = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1] * 2
+            return round(low + (high - low) * (target - seen) / count, 1)
+        seen += count
+    return BUCKETS[-1]
+
+
+def fold(summary, event):
+    """Add one finished video. Replays of an event already in the activity list are ignored."""
+    if any(a['id'] == event['id'] and a['status'] == event['status'] and a['final_link'] == event['final_link']
+           for a in summary['activity']):
+        return summary
+    summary['total'] += 1
+    if event['status'] == "Completed":
+        summary['completed'] += 1
+        for name in event['platforms']:
+            summary['platforms'][name] = summary['platforms'].get(name, 0) + 1
+    elif event['status'] == "Failed":
+        summary['failed'] += 1
+    else:
+        summary['duplicates'] += 1
+    for stage, seconds in event['stages'].items():
+        counts = summary['stages'].setdefault(stage, [0] * (len(BUCKETS) + 1))
+        counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+    summary['last_activity'] = event['timestamp']
+    entry = {k: event[k] for k in ('timestamp', 'title', 'status', 'original_link', 'final_link', 'duration', 'id')}
+    entry['platforms'] = ", ".join(event['platforms'])
+    summary['activity'] = ([entry] + summary['activity'])[:ACTIVITY_SIZE]
+    return summary
+
+
+def _cell(values, row, col):
+    cells = values[row - 1] if row - 1 < len(values) else []
+    return cells[col] if col < len(cells) and cells[col] is not None else ""
+
+
+def _int(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return 0
+
+
+def parse_summary(values):
+    """The grid read back from SUMMARY_RANGE -> summary dict (None if the tab is still empty)."""
+    if not values or not any(values):
+        return None
+    summary = empty_summary()
+    for i, (key, _) in enumerate(TOTAL_KEYS[:4]):
+        summary[key] = _int(_cell(values, TOTALS_ROW + i, 1))
+    summary['last_activity'] = str(_cell(values, TOTALS_ROW + 5, 1))
+    for row in range(PLATFORM_ROW, PLATFORM_ROW + MAX_PLATFORMS):
+        if _cell(values, row, 0):
+            summary['platforms'][str(_cell(values, row, 0))] = _int(_cell(values, row, 1))
+    for row in range(STAGE_ROW, STAGE_ROW + MAX_STAGES):
+        if _cell(values, row, 0):
+            summary['stages'][str(_cell(values, row, 0))] = _bucket_counts(_cell(values, row, 5))
+    for row in range(ACTIVITY_ROW, ACTIVITY_ROW + ACTIVITY_SIZE):
+        if _cell(values, row, 0):
+            cells = [str(_cell(values, row, c)) for c in range(len(ACTIVITY_HEADER))]
+            summary['activity'].append(dict(zip(('timestamp', 'title', 'status', 'platforms', 'original_link',
+                                                 'final_link', 'duration', 'id'), cells)))
+    return summary
+
+
+def summary_values(summary):
+    """Summary dict -> the full fixed-size grid for SUMMARY_RANGE (blank cells clear stale rows)."""
+    grid = [[""] * len(ACTIVITY_HEADER) for _ in range(ACTIVITY_ROW + ACTIVITY_SIZE - 1)]
+
+    def put(row, cells):
+        grid[row - 1][:len(cells)] = cells
+
+    finished = summary['completed'] + summary['failed']
+    totals = dict(summary, success_rate=round(100 * summary['completed'] / finished, 1) if finished else 100,
+                  updated_at=datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+    put(1, ["Metric", "Value"])
+    for i, (key, label) in enumerate(TOTAL_KEYS):
+        put(TOTALS_ROW + i, [label, totals[key]])
+
+    put(PLATFORM_ROW - 1, ["Platform", "Videos"])
+    platforms = sorted(summary['platforms'].items(), key=lambda p: -p[1])[:MAX_PLATFORMS]
+    for i, (name, count) in enumerate(platforms):
+        put(PLATFORM_ROW + i, [name, count])
+
+    put(STAGE_ROW - 1, ["Stage", "Count", "p50 (s)", "p90 (s)", "p99 (s)", "Histogram"])
+    for i, (stage, counts) in enumerate(sorted(summary['stages'].items())[:MAX_STAGES]):
+        put(STAGE_ROW + i, [stage, sum(counts), percentile(counts, 0.5), percentile(counts, 0.9),
+                            percentile(counts, 0.99), " ".join(str(c) for c in counts)])
+
+    put(ACTIVITY_ROW - 1, ACTIVITY_HEADER)
+    for i, a in enumerate(summary['activity'][:ACTIVITY_SIZE]):
+        put(ACTIVITY_ROW + i, [a['timestamp'], a['title'], a['status'], a['platforms'], a['original_link'],
+                               a['final_link'], a['duration'], a['id']])
+    return grid
+
+
+def summary_from_rows(rows, archived_statuses=()):
+    """
+    Bootstrap from the log itself: rows of 'Content Engine'!A2:H (oldest first) plus the statuses of
+    archived rows. Stage times start empty; the log only keeps them as text.
+    """
+    summary = empty_summary()
+    for status in archived_statuses:
+        if status and status not in ("Duplicate", "Lease Expired"):
+            summary['total'] += 1
+            key = 'completed' if status == "Completed" else 'failed' if status == "Failed" else 'duplicates'
+            summary[key] += 1
+    for cells in rows:
+        cells = [str(c) for c in cells] + [""] * (8 - len(cells))
+        if not cells[0] or cells[4] in ("Processing", "Duplicate", "Lease Expired"):
+            continue
+        fold(summary, {'timestamp': cells[0], 'id': cells[5], 'title': _title(cells[6]), 'status': cells[4],
+                       'platforms': [p.strip() for p in cells[3].split(",") if p.strip()] if cells[4] == "Completed" else [],
+                       'original_link': cells[1], 'final_link': cells[2], 'duration': cells[7], 'stages': {}})
+    return summary
@@ -0,0 +1,98 @@
+import os
+import array
+import subprocess
+
+# Seconds of audio decoded for the fingerprint; enough to tell clips apart, cheap for long videos
+FINGERPRINT_SECONDS = int(os.getenv('FINGERPRINT_SECONDS', '120'))
+# Fraction of fingerprint bits allowed to differ between a re-encode and its original
+FINGERPRINT_MAX_DISTANCE = float(os.getenv('FINGERPRINT_MAX_DISTANCE', '0.1'))
+FINGERPRINT_RATE = 4000     # Hz, mono; loudness contours survive any re-encode at this rate
+FINGERPRINT_WINDOW = 0.5    # seconds per energy window (one bit per window boundary)
+FINGERPRINT_MIN_BITS = 24   # shorter clips are too easy to confuse
+DURATION_TOLERANCE = 1.0    # seconds
+
+
+def content_key(file):
+    """(md5, size) from a Drive file listing, or None if Drive did not report a checksum."""
+    md5 = file.get('md5Checksum')
+    if not md5:
+        return None
+    return md5, str(file.get('size', ''))
+
+
+def match_content(entries, file):
+    """Index entry for a byte-identical upload (same Drive md5 and size), else None."""
+    key = content_key(file)
+    if not key:
+        return None
+    for entry in entries:
+        if entry['id'] != file['id'] and (entry['md5'], entry['size']) == key:
+            return entry
+    return None
+
+
+def _fingerprint_cmd(file_path, seconds):
+    return [
+        'ffmpeg', '-v', 'error', '-i', file_path, '-t', str(seconds),
+        '-vn', '-ac', '1', '-ar', str(FINGERPRINT_RATE), '-f', 's16le', '-'
+    ]
+
+
+def fingerprint_from_pcm(pcm, duration):
+    """
+    '<duration>:<hex>' where bit i says whether loudness rises from window i to i+1.
+    Loudness contours survive transcoding, resampling and bitrate changes, unlike file bytes.
+    """
+    samples = array.array('h')
+    samples.frombytes(pcm[:len(pcm) - len(pcm) % 2])
+    window = int(FINGERPRINT_RATE * FINGERPRINT_WINDOW)
+    energies = [sum(s * s for s in samples[i:i + window]) for i in range(0, len(samples) - window + 1, window)]
+    if len(energies) <= FINGERPRINT_MIN_BITS or not any(energies):
+        return None
+    bits = "".join('1' if b > a else '0' for a, b in zip(energies, energies[1:]))
+    return f"{duration:.1f}:{len(bits)}:{int(bits, 2):x}"
+
+
+def audio_fingerprint(file_path, duration, seconds=None):
+    """Fingerprint the first FINGERPRINT_SECONDS of audio. None for silent/short/unreadable files."""
+    try:
+        result = subprocess.run(_fingerprint_cmd(file_path, seconds or FINGERPRINT_SECONDS), capture_output=True, check=True)
+        return fingerprint_from_pcm(result.stdout, duration)
+    except Exception as e:
+        print(f"⚠️  Audio fingerprint failed: {e}")
+        return None
+
+
+def _parse_fingerprint(fingerprint):
+    try:
+        duration, length, value = fingerprint.split(':')
+        return float(duration), int(length), int(value, 16)
+    except (AttributeError, ValueError):
+        return None
+
+
+def fingerprint_distance(a, b):
+    """Fraction of differing bits over the common length, or None if the clips can't be the same."""
+    pa, pb = _parse_fingerprint(a), _parse_fingerprint(b)
+    if not pa or not pb or abs(pa[0] - pb[0]) > DURATION_TOLERANCE:
+        return None
+    length = min(pa[1], pb[1])
+    if length < FINGERPRINT_MIN_BITS:
+        return None
+    # Align on the leading bits (same start of audio), drop the tail of the longer one
+    xa, xb = pa[2] >> (pa[1] - length), pb[2] >> (pb[1] - length)
+    return bin(xa ^ xb).count('1') / length
+
+
+def match_fingerprint(entries, file, fingerprint):
+    """Closest index entry whose audio matches within FINGERPRINT_MAX_DISTANCE, else None."""
+    if not fingerprint:
+        return None
+    best, best_distance = None, FINGERPRINT_MAX_DISTANCE
+    for entry in entries:
+        if entry['id'] == file['id']:
+            continue
+        distance = fingerprint_distance(fingerprint, entry['fingerprint'])
+        if distance is not None and distance <= best_distance:
+            best, best_distance = entry, distance
+    return best
@@ -1,46 +1,80 @@
 import os
+import re
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
 import io
+import asyncio
+import httpx
+import google.auth.transport.requests
+from .rate_limiter import get_rate_controller
+
+DRIVE_API = "https://www.googleapis.com/drive/v3"
+DRIVE_UPLOAD_API = "https://www.googleapis.com/upload/drive/v3"
+LIST_FIELDS = "nextPageToken, files(id, name, webViewLink, webContentLink, createdTime, mimeType, md5Checksum, size)"
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # Must be a multiple of 256 KiB for resumable uploads
+
+
+def _persisted_bytes(range_header):
+    """Bytes a resumable upload session holds, from a 308's `Range: bytes=0-N` (no header: nothing yet)."""
+    match = re.match(r"bytes=0-(\d+)$", (range_header or "").strip())
+    return int(match.group(1)) + 1 if match else 0
+
+
+def _load_credentials(scopes):
+    """Service account credentials from GOOGLE_SERVICE_ACCOUNT_JSON or the key file, else None."""
+    # Try loading from ENV variable first (Content)
+    json_creds = os.getenv('GOOGLE_SERVICE_ACCOUNT_JSON')
+    creds_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS', 'service_account.json')
+
+    if json_creds:
+        import json
+        info = json.loads(json_creds)
+        return service_account.Credentials.from_service_account_info(info, scopes=scopes)
+    if os.path.exists(creds_path):
+        return service_account.Credentials.from_service_account_file(creds_path, scopes=scopes)
+    print(f"Warning: {creds_path} not found. Drive service will fail if used.")
+    return None
+
 
 class DriveService:
     def __init__(self):
-        self.creds = None
         SCOPES = ['https://www.googleapis.com/auth/drive']
-        
-        # Try loading from ENV variable first (Content)
-        json_creds = os.getenv('GOOGLE_SERVICE_ACCOUNT_JSON')
-        creds_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS', 'service_account.json')
-
-        if json_creds:
-            import json
-            info = json.loads(json_creds)
-            self.creds = service_account.Credentials.from_service_account_info(
-                info, scopes=SCOPES)
-            self.service = build('drive', 'v3', credentials=self.creds)
-        elif os.path.exists(creds_path):
-            self.creds = service_account.Credentials.from_service_account_file(
-                creds_path, scopes=SCOPES)
-            self.service = build('drive', 'v3', credentials=self.creds)
-        else:
-            print(f"Warning: {creds_path} not found. Drive service will fail if used.")
-            self.service = None
+        self.creds = _load_credentials(SCOPES)
+        self.service = build('drive', 'v3', credentials=self.creds) if self.creds else None
+        self.rate = get_rate_controller()
 
     def list_files(self, folder_id):
         """List video files in a specific folder."""
         if not self.service: return []
         
         query = f"'{folder_id}' in parents and (mimeType contains 'video/')"
-        results = self.service.files().list(
+        request = self.service.files().list(
             q=query,
-            fields="nextPageToken, files(id, name, webViewLink, webContentLink, createdTime, mimeType)",
+            fields=LIST_FIELDS,
             orderBy="createdTime desc",
             supportsAllDrives=True,
             includeItemsFromAllDrives=True
-        ).execute()
+        )
+        results = self.rate.call('drive', request.execute)
         return results.get('files', [])
 
+    def find_file(self, name, folder_id):
+        """Newest file called `name` in a folder, or None."""
+        if not self.service: return None
+
+        escaped = name.replace("\\", "\\\\").replace("'", "\\'")
+        request = self.service.files().list(
+            q=f"name = '{escaped}' and '{folder_id}' in parents and trashed = false",
+            fields="files(id, name, createdTime)",
+            orderBy="createdTime desc",
+            pageSize=1,
+            supportsAllDrives=True,
+            includeItemsFromAllDrives=True
+        )
+        files = self.rate.call('drive', request.execute).get('files', [])
+        return files[0] if files else None
+
     def download_file(self, file_id, destination_path):
         """Download a file from Drive."""
         if not self.service: return
@@ -50,7 +84,7 @@ class DriveService:
         downloader = MediaIoBaseDownload(fh, request)
         done = False
         while done is False:
-            status, done = downloader.next_chunk()
+            status, done = self.rate.call('drive', downloader.next_chunk)
             print(f"Download {int(status.progress() * 100)}%.")
 
     def upload_file(self, file_path, folder_id):
@@ -61,9 +95,110 @@ class DriveService:
             'name': os.path.basename(file_path),
             'parents': [folder_id]
         }
-        media = MediaFileUpload(file_path, resumable=True)
-        file = self.service.files().create(body=file_metadata,
-                                            media_body=media,
-                                            supportsAllDrives=True,
-                                            fields='id, webViewLink').execute()
+        media = MediaFileUpload(file_path, resumable=True, chunksize=UPLOAD_CHUNK_SIZE)
+        request = self.service.files().create(body=file_metadata,
+                                              media_body=media,
+                                              supportsAllDrives=True,
+                                              fields='id, webViewLink')
+        # Chunk by chunk so a throttled chunk is retried without restarting the whole upload
+        file = None
+        while file is None:
+            _, file = self.rate.call('drive', request.next_chunk)
         return file
+
+
+class AsyncDriveService:
+    """
+    Asyncio variant of DriveService.
+    googleapiclient is blocking (httplib2), so this talks to the Drive v3 REST API
+    directly over httpx.AsyncClient, reusing the same service account credentials.
+    """
+
+    def __init__(self, client=None):
+        SCOPES = ['https://www.googleapis.com/auth/drive']
+        self.creds = _load_credentials(SCOPES)
+        self.client = client or httpx.AsyncClient(timeout=httpx.Timeout(60.0, connect=10.0))
+        self.rate = get_rate_controller()
+
+    async def _headers(self):
+        # Token refresh uses the blocking google-auth transport; keep it off the loop.
+        if not self.creds.valid:
+            await asyncio.to_thread(self.creds.refresh, google.auth.transport.requests.Request())
+        return {"Authorization": f"Bearer {self.creds.token}"}
+
+    async def _request(self, method, url, headers=None, **kwargs):
+        async def send():
+            response = await self.client.request(method, url, headers={**await self._headers(), **(headers or {})}, **kwargs)
+            response.raise_for_status()
+            return response
+        return await self.rate.acall('drive', send)
+
+    async def list_files(self, folder_id):
+        """List video files in a specific folder."""
+        if not self.creds: return []
+
+        params = {
+            "q": f"'{folder_id}' in parents and (mimeType contains 'video/')",
+            "fields": LIST_FIELDS,
+            "orderBy": "createdTime desc",
+            "supportsAllDrives": "true",
+            "includeItemsFromAllDrives": "true",
+        }
+        response = await self._request("GET", f"{DRIVE_API}/files", params=params)
+        return response.json().get('files', [])
+
+    async def download_file(self, file_id, destination_path):
+        """Stream a file from Drive to disk."""
+        if not self.creds: return
+
+        params = {"alt": "media", "supportsAllDrives": "true"}
+
+        async def stream_to_disk():
+            async with self.client.stream("GET", f"{DRIVE_API}/files/{file_id}", params=params,
+                                          headers=await self._headers()) as response:
+                response.raise_for_status()
+                with open(destination_path, 'wb') as fh:
+                    async for chunk in response.aiter_bytes(UPLOAD_CHUNK_SIZE):
+                        fh.write(chunk)
+
+        await self.rate.acall('drive', stream_to_disk)
+
+    async def upload_file(self, file_path, folder_id):
+        """Resumable upload of a file to Drive. Returns {'id', 'webViewLink'}."""
+        if not self.creds: return None
+
+        total_size = os.path.getsize(file_path)
+        session = await self._request(
+            "POST",
+            f"{DRIVE_UPLOAD_API}/files",
+            params={"uploadType": "resumable", "supportsAllDrives": "true", "fields": "id, webViewLink"},
+            headers={"X-Upload-Content-Length": str(total_size)},
+            json={'name': os.path.basename(file_path), 'parents': [folder_id]},
+        )
+        upload_url = session.headers["Location"]
+
+        offset = 0
+        with open(file_path, 'rb') as fh:
+            while True:
+                chunk = await asyncio.to_thread(fh.read, UPLOAD_CHUNK_SIZE)
+                end = offset + len(chunk) - 1
+                content_range = f"bytes {offset}-{end}/{total_size}" if chunk else f"bytes */{total_size}"
+                response = await self.rate.acall('drive', self._put_chunk, upload_url, chunk, content_range)
+                if response.status_code == 308:  # Resume Incomplete: continue after what the server actually kept
+                    offset = _persisted_bytes(response.headers.get("Range"))
+                    await asyncio.to_thread(fh.seek, offset)
+                    continue
+                return response.json()
+
+    async def _put_chunk(self, upload_url, chunk, content_range):
+        response = await self.client.put(
+            upload_url,
+            content=chunk,
+            headers={**await self._headers(), "Content-Range": content_range},
+        )
+        if response.status_code != 308:
+            response.raise_for_status()
+        return response
+
+    async def aclose(self):
+        await self.client.aclose()
@@ -0,0 +1,137 @@
+import os
+import re
+import shutil
+import tempfile
+import threading
+import subprocess
+
+# Our subtitle fonts (Montserrat-Bold.ttf, see download_font.py); relative to the working directory like the rest of assets/
+FONTS_DIR = os.path.abspath(os.path.join('assets', 'fonts'))
+# fontconfig cache and config dedicated to FONTS_DIR + fallbacks. Keep it on a persistent path (or a CI cache)
+# so libass finds a warm cache instead of scanning fonts on every burn. Empty = let libass use the system fontconfig.
+FONT_CACHE_DIR = os.getenv('FONT_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'content-engine-fonts'))
+# Family the karaoke style asks for (subtitle_utils.json_to_ass_karaoke) and the file it should resolve to
+SUBTITLE_FONT = "Montserrat Bold"
+SUBTITLE_FONT_FILE = "Montserrat-Bold.ttf"
+# Bold sans fallbacks, in order; only the directories that exist are indexed
+FALLBACK_FONT_DIRS = [
+    "/usr/share/fonts/truetype/liberation",
+    "/usr/share/fonts/truetype/liberation2",
+    "/usr/share/fonts/truetype/dejavu",
+]
+FALLBACK_FAMILIES = ["Liberation Sans", "DejaVu Sans"]
+
+FONTSELECT_RE = re.compile(r"fontselect: \((.*?), \d+, \d+\) -> (.*?), \d+, ")
+
+PROBE_ASS = """[Script Info]
+ScriptType: v4.00+
+PlayResX: 64
+PlayResY: 64
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,{font},20,&H00FFFFFF,&H00FFFFFF,&H00000000,&H00000000,-1,0,0,0,100,100,0,0,1,1,0,2,0,0,0,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+Dialogue: 0,0:00:00.00,0:00:01.00,Default,,0,0,0,,Ag
+"""
+
+
+def fonts_conf(cache_dir):
+    """fonts.conf indexing only our fonts and the fallbacks (not the whole system), with its own cachedir."""
+    dirs = [FONTS_DIR] + [d for d in FALLBACK_FONT_DIRS if os.path.isdir(d)]
+    prefer = "".join(f"<family>{family}</family>" for family in ["Montserrat"] + FALLBACK_FAMILIES)
+    lines = ['<?xml version="1.0"?>', '<!DOCTYPE fontconfig SYSTEM "fonts.dtd">', '<fontconfig>']
+    lines += [f"  <dir>{d}</dir>" for d in dirs]
+    lines.append(f"  <cachedir>{os.path.join(cache_dir, 'cache')}</cachedir>")
+    # Anything we ask for that is missing resolves straight to a bold sans we ship, not a system-wide search
+    for family in [SUBTITLE_FONT, "sans-serif"]:
+        lines.append(f"  <alias binding=\"same\"><family>{family}</family><prefer>{prefer}</prefer></alias>")
+    lines.append('</fontconfig>')
+    return "\n".join(lines) + "\n"
+
+
+class FontSetup:
+    """
+    The fontconfig environment every ffmpeg/libass invocation runs with: FONTCONFIG_FILE points at a
+    fonts.conf covering only FONTS_DIR and the fallbacks, with a persistent cache. prepare() writes the
+    config (only if it changed), prewarms the cache with a one-frame subtitle render and checks which file
+    SUBTITLE_FONT resolves to, so a missing or broken font shows up at startup instead of in the output.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = FONT_CACHE_DIR if cache_dir is None else cache_dir
+        self.conf_path = os.path.join(self.cache_dir, 'fonts.conf') if self.cache_dir else None
+        self.env = None  # subprocess env for ffmpeg; None = inherit (no managed config)
+        self.resolved = None  # file SUBTITLE_FONT resolved to in the startup check
+
+    @property
+    def active(self):
+        return self.env is not None
+
+    def prepare(self):
+        if not self.conf_path:
+            return self
+        try:
+            os.makedirs(os.path.join(self.cache_dir, 'cache'), exist_ok=True)
+            conf = fonts_conf(self.cache_dir)
+            current = None
+            if os.path.exists(self.conf_path):
+                with open(self.conf_path, encoding='utf-8') as f:
+                    current = f.read()
+            if current != conf:
+                # Atomic replace so concurrent processes never read half a config
+                fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.conf')
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(conf)
+                os.chmod(tmp_path, 0o644)
+                os.replace(tmp_path, self.conf_path)
+            self.env = dict(os.environ, FONTCONFIG_FILE=self.conf_path)
+        except OSError as e:
+            print(f"⚠️  Font cache unavailable ({e}); subtitles use the system fontconfig")
+            return self
+        self.check()
+        return self
+
+    def check(self):
+        """One-frame subtitle render (also builds the cache on a cold runner); returns the resolved font file."""
+        probe_dir = tempfile.mkdtemp(prefix="fontcheck_")
+        probe_path = os.path.join(probe_dir, "probe.ass")
+        try:
+            with open(probe_path, "w", encoding="utf-8") as f:
+                f.write(PROBE_ASS.format(font=SUBTITLE_FONT))
+            result = subprocess.run([
+                'ffmpeg', '-hide_banner', '-v', 'verbose', '-f', 'lavfi', '-i', 'color=black:s=64x64:d=0.1',
+                '-vf', f"ass={probe_path}", '-frames:v', '1', '-f', 'null', '-'
+            ], capture_output=True, env=self.env, timeout=120)
+            output = result.stderr.decode('utf-8', errors='replace')
+            match = FONTSELECT_RE.search(output)
+            self.resolved = match.group(2) if match else None
+        except (OSError, subprocess.SubprocessError) as e:
+            print(f"⚠️  Font check failed: {e}")
+            return None
+        finally:
+            shutil.rmtree(probe_dir, ignore_errors=True)
+
+        if self.resolved and os.path.basename(self.resolved) == SUBTITLE_FONT_FILE:
+            print(f"🔤 Subtitle font: {SUBTITLE_FONT} -> {self.resolved}")
+        elif self.resolved:
+            print(f"⚠️  Subtitle font '{SUBTITLE_FONT}' not usable, burns fall back to {self.resolved} "
+                  f"(check {os.path.join(FONTS_DIR, SUBTITLE_FONT_FILE)}; download_font.py)")
+        else:
+            print(f"⚠️  Could not resolve subtitle font '{SUBTITLE_FONT}'")
+        return self.resolved
+
+
+_font_setup = None
+_font_lock = threading.Lock()
+
+
+def get_font_setup():
+    """Process-wide font setup, prepared (and checked) once by the first renderer."""
+    global _font_setup
+    with _font_lock:
+        if _font_setup is None:
+            _font_setup = FontSetup().prepare()
+    return _font_setup
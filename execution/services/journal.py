@@ -0,0 +1,98 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+# Local system of record for sheet writes; survives crashes and is replayed on the next start
+JOURNAL_PATH = os.getenv('JOURNAL_PATH', 'content_engine_journal.db')
+# Sync attempts before an entry is left aside (it stays in the journal for inspection)
+JOURNAL_MAX_ATTEMPTS = int(os.getenv('JOURNAL_MAX_ATTEMPTS', '20'))
+# Synced entries are kept this long, then pruned
+JOURNAL_RETENTION_DAYS = float(os.getenv('JOURNAL_RETENTION_DAYS', '7'))
+
+
+class Journal:
+    """
+    Append-only log of pending sheet writes in SQLite (WAL mode, fsync on commit). An entry is
+    durable once append() returns; the syncer marks it synced after the sheet has taken it.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or JOURNAL_PATH
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=FULL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                sheet_id TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                original_id TEXT,
+                claim TEXT,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                synced_at REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT
+            )""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS entries_pending ON entries (synced_at, id)")
+
+    def append(self, sheet_id, kind, payload, original_id=None, claim=None):
+        with self.lock:
+            cursor = self.db.execute(
+                "INSERT INTO entries (sheet_id, kind, original_id, claim, payload, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (sheet_id, kind, original_id, claim, json.dumps(payload), time.time())
+            )
+            return cursor.lastrowid
+
+    def pending(self, limit=500):
+        """Unsynced entries in write order, oldest first."""
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT id, sheet_id, kind, original_id, claim, payload, created_at, attempts FROM entries "
+                "WHERE synced_at IS NULL AND attempts < ? ORDER BY id LIMIT ?",
+                (JOURNAL_MAX_ATTEMPTS, limit)
+            ).fetchall()
+        return [{'id': r[0], 'sheet_id': r[1], 'kind': r[2], 'original_id': r[3], 'claim': r[4],
+                 'payload': json.loads(r[5]), 'created_at': r[6], 'attempts': r[7]} for r in rows]
+
+    def pending_count(self):
+        with self.lock:
+            return self.db.execute(
+                "SELECT COUNT(*) FROM entries WHERE synced_at IS NULL AND attempts < ?", (JOURNAL_MAX_ATTEMPTS,)
+            ).fetchone()[0]
+
+    def _update_many(self, sql, params):
+        # One transaction (one fsync) for the whole batch
+        with self.lock:
+            self.db.execute("BEGIN")
+            try:
+                self.db.executemany(sql, params)
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+
+    def mark_synced(self, ids):
+        if ids:
+            now = time.time()
+            self._update_many("UPDATE entries SET synced_at = ?, last_error = NULL WHERE id = ?", [(now, i) for i in ids])
+
+    def mark_failed(self, ids, error):
+        if ids:
+            self._update_many("UPDATE entries SET attempts = attempts + 1, last_error = ? WHERE id = ?",
+                              [(str(error)[:500], i) for i in ids])
+
+    def prune(self):
+        with self.lock:
+            self.db.execute("DELETE FROM entries WHERE synced_at IS NOT NULL AND synced_at < ?",
+                            (time.time() - JOURNAL_RETENTION_DAYS * 86400,))
+
+    def close(self):
+        with self.lock:
+            self.db.close()
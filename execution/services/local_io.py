@@ -0,0 +1,148 @@
+import os
+import json
+import shutil
+import hashlib
+import datetime
+import mimetypes
+import threading
+from .sheets import FINAL_LINK_COLUMN, VARIANTS_COLUMN, PREVIEW_COLUMN, COVER_COLUMN, CONTENT_DUPLICATE_STATUS
+
+MANIFEST_FILE = "manifest.json"
+# update_log_cells() columns -> manifest keys
+CELL_KEYS = {FINAL_LINK_COLUMN: 'final_link', VARIANTS_COLUMN: 'variants', PREVIEW_COLUMN: 'preview', COVER_COLUMN: 'cover'}
+# Manifest statuses that are not started again on the next batch run
+DONE_STATUSES = ("Completed", CONTENT_DUPLICATE_STATUS)
+
+
+def file_md5(path, chunk_size=1024 * 1024):
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class LocalFolderService:
+    """
+    DriveService stand-in for batch runs: folder ids are local directories. Inputs are hard-linked
+    into the job workspace (copied across filesystems), results are moved into the output directory.
+    """
+
+    def __init__(self, checksums=True):
+        self.checksums = checksums  # md5 per input, for the same dedupe as Drive's md5Checksum
+        self.lock = threading.Lock()
+        self.paths = {}  # listed file id -> path
+
+    def list_files(self, folder_id):
+        """Video files directly in the directory, sorted by name, in Drive's listing shape."""
+        files = []
+        for name in sorted(os.listdir(folder_id)):
+            path = os.path.join(folder_id, name)
+            mime_type = mimetypes.guess_type(name)[0] or ""
+            if not (os.path.isfile(path) and mime_type.startswith('video/')):
+                continue
+            file = {'id': name, 'name': name, 'size': str(os.path.getsize(path)), 'mimeType': mime_type,
+                    'webViewLink': os.path.abspath(path)}
+            if self.checksums:
+                file['md5Checksum'] = file_md5(path)
+            files.append(file)
+            with self.lock:
+                self.paths[name] = path
+        return files
+
+    def download_file(self, file_id, destination_path):
+        source = self.paths[file_id]
+        try:
+            os.link(source, destination_path)
+        except OSError:
+            shutil.copyfile(source, destination_path)
+
+    def upload_file(self, file_path, folder_id):
+        """Move a result into the output directory (name made unique if taken). Returns {'id', 'webViewLink'}."""
+        os.makedirs(folder_id, exist_ok=True)
+        base, ext = os.path.splitext(os.path.basename(file_path))
+        with self.lock:
+            destination = os.path.join(folder_id, base + ext)
+            n = 1
+            while os.path.exists(destination):
+                destination = os.path.join(folder_id, f"{base}_{n}{ext}")
+                n += 1
+            shutil.move(file_path, destination)
+        return {'id': os.path.basename(destination), 'webViewLink': os.path.abspath(destination)}
+
+
+class ManifestService:
+    """
+    SheetsService stand-in for batch runs: the log lives in one JSON manifest (one record per input,
+    plus the content index) that is rewritten atomically after every change. A rerun over the same
+    manifest skips finished inputs and retries failed or interrupted ones.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.data = {'videos': {}, 'content_index': []}
+        if os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.data.update(json.load(f))
+
+    def _save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _update(self, original_id, fields):
+        with self.lock:
+            self.data['videos'].setdefault(original_id, {'id': original_id}).update(fields)
+            self._save()
+
+    def log_processing_start(self, sheet_id, original_id, original_link, filename, timestamp_str=None):
+        self._update(original_id, {
+            'timestamp': timestamp_str or datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'source': original_link, 'filename': filename, 'status': "Processing",
+        })
+        return True
+
+    def update_log_completion(self, sheet_id, original_id, final_link, platforms, strategy_content, status="Completed", duration=None, stage_breakdown=None, stages=None):
+        fields = {
+            'status': status,
+            'final_link': final_link,
+            'platforms': platforms if isinstance(platforms, list) else [p.strip() for p in str(platforms).split(",") if p.strip()],
+            'strategy': strategy_content,
+            'duration': duration or "",
+            'finished_at': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        if stage_breakdown:
+            fields['stage_breakdown'] = stage_breakdown
+        if stages:
+            fields['stages'] = {stage: round(seconds, 3) for stage, seconds in stages.items()}
+        self._update(original_id, fields)
+
+    def update_log_cells(self, sheet_id, original_id, cells):
+        self._update(original_id, {CELL_KEYS.get(column, column): value for column, value in cells.items()})
+
+    def get_content_index(self, sheet_id):
+        with self.lock:
+            return list(self.data['content_index'])
+
+    def add_content_index(self, sheet_id, file, final_link, fingerprint=None):
+        with self.lock:
+            self.data['content_index'].append({
+                'md5': file.get('md5Checksum', ""), 'size': str(file.get('size', "")), 'fingerprint': fingerprint or "",
+                'id': file['id'], 'final_link': final_link, 'filename': file.get('name', ""),
+            })
+            self._save()
+
+    def get_processed_ids(self, sheet_id):
+        with self.lock:
+            return [video_id for video_id, video in self.data['videos'].items() if video.get('status') in DONE_STATUSES]
+
+    def archive_rows(self, sheet_id):
+        return 0
+
+    def update_status(self, sheet_id, status_text, state="Processing"):
+        pass  # process_video already prints every step
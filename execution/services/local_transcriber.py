@@ -0,0 +1,124 @@
+import os
+import time
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from .metrics import NULL_METRICS
+
+# CTranslate2 Whisper model: a size ('tiny', 'base', 'small', 'medium', 'large-v3', 'distil-large-v3') or a local path
+LOCAL_WHISPER_MODEL = os.getenv('LOCAL_WHISPER_MODEL', 'small')
+LOCAL_WHISPER_COMPUTE_TYPE = os.getenv('LOCAL_WHISPER_COMPUTE_TYPE', 'int8')
+# CPU threads per worker (0 = CTranslate2 default)
+LOCAL_WHISPER_THREADS = int(os.getenv('LOCAL_WHISPER_THREADS', '0'))
+# Videos transcribed at once on the one loaded model (weights are shared between workers)
+LOCAL_WHISPER_WORKERS = int(os.getenv('LOCAL_WHISPER_WORKERS', '2'))
+# Speech chunks of one video decoded per batch
+LOCAL_WHISPER_BATCH = int(os.getenv('LOCAL_WHISPER_BATCH', '8'))
+LOCAL_WHISPER_LANGUAGE = os.getenv('LOCAL_WHISPER_LANGUAGE') or None
+SAMPLE_RATE = 16000
+
+
+def _decode_cmd(file_path):
+    """FFmpeg command that writes 16kHz mono float32 PCM (the model's input format) to stdout."""
+    return [
+        'ffmpeg', '-nostdin', '-loglevel', 'error', '-i', file_path,
+        '-vn', '-ac', '1', '-ar', str(SAMPLE_RATE), '-f', 'f32le', 'pipe:1'
+    ]
+
+
+def decode_audio(file_path):
+    import numpy as np
+    result = subprocess.run(_decode_cmd(file_path), capture_output=True, check=True)
+    return np.frombuffer(result.stdout, dtype=np.float32)
+
+
+def to_verbose_json(segments, info):
+    """faster-whisper output -> the dict shape of OpenAI's verbose_json with word timestamps."""
+    out_segments = []
+    words = []
+    for segment in segments:
+        out_segments.append({
+            'id': segment.id,
+            'seek': segment.seek,
+            'start': segment.start,
+            'end': segment.end,
+            'text': segment.text,
+            'tokens': list(segment.tokens),
+            'temperature': segment.temperature,
+            'avg_logprob': segment.avg_logprob,
+            'compression_ratio': segment.compression_ratio,
+            'no_speech_prob': segment.no_speech_prob,
+        })
+        for word in segment.words or []:
+            # API words carry no leading space
+            words.append({'word': word.word.strip(), 'start': round(word.start, 2), 'end': round(word.end, 2)})
+    return {
+        'task': 'transcribe',
+        'language': info.language,
+        'duration': info.duration,
+        'text': "".join(s['text'] for s in out_segments).strip(),
+        'segments': out_segments,
+        'words': words,
+    }
+
+
+class LocalTranscriber:
+    """
+    Whisper on CPU via faster-whisper (CTranslate2, int8 by default). Loading the model takes seconds
+    and hundreds of MB, so there is one per process (get_local_transcriber): every AIService, daemon
+    worker and async task shares it, and up to LOCAL_WHISPER_WORKERS videos run through it at once.
+    """
+
+    def __init__(self, model=None, compute_type=None, workers=None):
+        try:
+            from faster_whisper import WhisperModel, BatchedInferencePipeline
+        except ImportError as e:
+            raise RuntimeError("TRANSCRIBE_BACKEND=local needs faster-whisper (pip install faster-whisper)") from e
+
+        self.model_name = model or LOCAL_WHISPER_MODEL
+        self.compute_type = compute_type or LOCAL_WHISPER_COMPUTE_TYPE
+        self.workers = max(1, workers or LOCAL_WHISPER_WORKERS)
+        started = time.perf_counter()
+        self.model = WhisperModel(self.model_name, device='cpu', compute_type=self.compute_type,
+                                  cpu_threads=LOCAL_WHISPER_THREADS, num_workers=self.workers)
+        self.pipeline = BatchedInferencePipeline(model=self.model)
+        self.slots = threading.BoundedSemaphore(self.workers)
+        print(f"🧠 Loaded local Whisper '{self.model_name}' ({self.compute_type}, {self.workers} workers) in {time.perf_counter() - started:.1f}s")
+
+    def transcribe(self, file_path, metrics=None):
+        """Transcribe one video. Returns verbose_json-shaped dict; raises on failure."""
+        metrics = metrics or NULL_METRICS
+        with metrics.span('audio_extract') as span:
+            audio = decode_audio(file_path)
+            span['bytes'] = audio.nbytes
+
+        with self.slots, metrics.span('whisper_local', media_seconds=len(audio) / SAMPLE_RATE):
+            segments, info = self.pipeline.transcribe(audio, language=LOCAL_WHISPER_LANGUAGE, word_timestamps=True,
+                                                      batch_size=LOCAL_WHISPER_BATCH)
+            # segments is lazy: decoding happens while it is consumed
+            return to_verbose_json(list(segments), info)
+
+    def transcribe_many(self, file_paths):
+        """Several videos through the one loaded model. Results in input order, None where one failed."""
+        def safe(path):
+            try:
+                return self.transcribe(path)
+            except Exception as e:
+                print(f"Transcription failed for {path}: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(safe, file_paths))
+
+
+_transcriber = None
+_transcriber_lock = threading.Lock()
+
+
+def get_local_transcriber():
+    """Process-wide LocalTranscriber, loaded on first use."""
+    global _transcriber
+    with _transcriber_lock:
+        if _transcriber is None:
+            _transcriber = LocalTranscriber()
+        return _transcriber
@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import datetime
+import threading
+from contextlib import contextmanager
+
+METRICS_DIR = os.getenv('METRICS_DIR', 'metrics')
+JSONL_FILE = 'pipeline_metrics.jsonl'
+PROM_FILE = 'content_engine.prom'
+
+# Short labels used in the sheet's per-stage breakdown column
+STAGE_LABELS = {
+    'download': 'download',
+    'probe': 'probe',
+    'fingerprint': 'fingerprint',
+    'audio_extract': 'audio',
+    'whisper': 'whisper',
+    'whisper_local': 'whisper_local',
+    'claude_map': 'claude_map',
+    'claude': 'claude',
+    'burn_subtitles': 'burn',
+    'intro_overlay': 'overlay',
+    'upload': 'upload',
+    'upload_variants': 'variants',
+    'preview_render': 'preview',
+    'preview_upload': 'preview_up',
+    'cover_frame': 'cover',
+    'upload_cover': 'cover_up',
+}
+
+
+class VideoMetrics:
+    """Timing spans and throughput numbers for one video. Create via PipelineMetrics.start_video()."""
+
+    def __init__(self, file_id, filename):
+        self.file_id = file_id
+        self.filename = filename
+        self.started_at = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds')
+        self.start = time.perf_counter()
+        self.spans = []
+
+    @contextmanager
+    def span(self, stage, bytes=None, media_seconds=None, frames=None):
+        """
+        Time a stage. Optional sizes turn the span into throughput numbers:
+        bytes -> MB/s, media_seconds -> speed factor (x realtime), frames -> fps.
+        Sizes can also be filled in after the fact through the yielded dict.
+        """
+        record = {'stage': stage, 'bytes': bytes, 'media_seconds': media_seconds, 'frames': frames}
+        span_start = time.perf_counter()
+        ok = True
+        try:
+            yield record
+        except Exception:
+            ok = False
+            raise
+        finally:
+            seconds = time.perf_counter() - span_start
+            record['seconds'] = round(seconds, 3)
+            record['ok'] = ok
+            if seconds > 0:
+                if record.get('bytes'):
+                    record['mb_per_s'] = round(record['bytes'] / (1024 * 1024) / seconds, 2)
+                if record.get('media_seconds'):
+                    record['speed_factor'] = round(record['media_seconds'] / seconds, 2)
+                if record.get('frames'):
+                    record['fps'] = round(record['frames'] / seconds, 1)
+            self.spans.append({k: v for k, v in record.items() if v is not None})
+
+    def total_seconds(self):
+        return time.perf_counter() - self.start
+
+    def stage_seconds(self):
+        """Seconds per stage, summed over repeated spans."""
+        totals = {}
+        for s in self.spans:
+            totals[s['stage']] = totals.get(s['stage'], 0) + s['seconds']
+        return totals
+
+    def breakdown(self):
+        """Compact one-line summary for the sheet, e.g. 'download 3.1s (12.4 MB/s) | burn 41.0s (1.9x)'."""
+        parts = []
+        for s in self.spans:
+            text = f"{STAGE_LABELS.get(s['stage'], s['stage'])} {s['seconds']:.1f}s"
+            if 'mb_per_s' in s:
+                text += f" ({s['mb_per_s']} MB/s)"
+            elif 'speed_factor' in s:
+                text += f" ({s['speed_factor']}x, {s.get('fps', '?')} fps)"
+            parts.append(text)
+        return " | ".join(parts)
+
+    def to_record(self, status):
+        return {
+            'file_id': self.file_id,
+            'filename': self.filename,
+            'started_at': self.started_at,
+            'status': status,
+            'total_seconds': round(self.total_seconds(), 3),
+            'spans': self.spans,
+        }
+
+
+class _NullMetrics:
+    """Drop-in for VideoMetrics when a caller does not collect metrics."""
+
+    @contextmanager
+    def span(self, stage, **_):
+        yield {}
+
+
+NULL_METRICS = _NullMetrics()
+
+
+class PipelineMetrics:
+    """
+    Run-level sink. Each finished video is appended to metrics/pipeline_metrics.jsonl and the
+    Prometheus textfile (metrics/content_engine.prom, node_exporter textfile-collector format)
+    is rewritten with cumulative per-stage counters.
+    """
+
+    def __init__(self, metrics_dir=None, rate_controller=None):
+        self.metrics_dir = metrics_dir or METRICS_DIR
+        self.rate_controller = rate_controller
+        self.lock = threading.Lock()
+        self.stage_totals = {}   # stage -> {'count', 'seconds', 'bytes', 'media_seconds', 'frames'}
+        self.stage_last = {}     # stage -> last span
+        self.videos = {}         # status -> count
+        os.makedirs(self.metrics_dir, exist_ok=True)
+
+    def start_video(self, file_id, filename):
+        return VideoMetrics(file_id, filename)
+
+    def finish_video(self, video_metrics, status):
+        record = video_metrics.to_record(status)
+        with self.lock:
+            self.videos[status] = self.videos.get(status, 0) + 1
+            for s in video_metrics.spans:
+                totals = self.stage_totals.setdefault(s['stage'], {'count': 0, 'seconds': 0.0, 'bytes': 0, 'media_seconds': 0.0, 'frames': 0})
+                totals['count'] += 1
+                totals['seconds'] += s['seconds']
+                totals['bytes'] += s.get('bytes') or 0
+                totals['media_seconds'] += s.get('media_seconds') or 0
+                totals['frames'] += s.get('frames') or 0
+                self.stage_last[s['stage']] = s
+            try:
+                with open(os.path.join(self.metrics_dir, JSONL_FILE), 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record) + "\n")
+                self._write_prometheus()
+            except Exception as e:
+                print(f"⚠️  Could not write metrics: {e}")
+        return record
+
+    def _write_prometheus(self):
+        lines = [
+            "# HELP content_engine_stage_seconds Wall time spent per pipeline stage.",
+            "# TYPE content_engine_stage_seconds summary",
+        ]
+        for stage, t in sorted(self.stage_totals.items()):
+            lines.append(f'content_engine_stage_seconds_sum{{stage="{stage}"}} {t["seconds"]:.3f}')
+            lines.append(f'content_engine_stage_seconds_count{{stage="{stage}"}} {t["count"]}')
+
+        lines += ["# HELP content_engine_stage_bytes_total Bytes moved by transfer stages.",
+                  "# TYPE content_engine_stage_bytes_total counter"]
+        lines += [f'content_engine_stage_bytes_total{{stage="{stage}"}} {t["bytes"]}'
+                  for stage, t in sorted(self.stage_totals.items()) if t['bytes']]
+
+        gauges = [
+            ('content_engine_stage_last_seconds', 'Duration of the most recent span per stage.', 'seconds'),
+            ('content_engine_stage_last_mb_per_second', 'Throughput of the most recent transfer span.', 'mb_per_s'),
+            ('content_engine_stage_last_speed_factor', 'Media seconds processed per wall second (most recent span).', 'speed_factor'),
+            ('content_engine_stage_last_fps', 'Encode frames per second (most recent span).', 'fps'),
+        ]
+        for name, help_text, key in gauges:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            lines += [f'{name}{{stage="{stage}"}} {s[key]}' for stage, s in sorted(self.stage_last.items()) if key in s]
+
+        lines += ["# HELP content_engine_videos_total Videos finished, by final status.",
+                  "# TYPE content_engine_videos_total counter"]
+        lines += [f'content_engine_videos_total{{status="{status}"}} {n}' for status, n in sorted(self.videos.items())]
+
+        if self.rate_controller:
+            lines += ["# HELP content_engine_api_throttled_total 429/5xx responses per external API.",
+                      "# TYPE content_engine_api_throttled_total counter",
+                      "# HELP content_engine_api_concurrency_limit Current adaptive concurrency window per API.",
+                      "# TYPE content_engine_api_concurrency_limit gauge"]
+            for api, snap in sorted(self.rate_controller.snapshot().items()):
+                lines.append(f'content_engine_api_throttled_total{{api="{api}"}} {snap["throttled"]}')
+                lines.append(f'content_engine_api_concurrency_limit{{api="{api}"}} {snap["limit"]}')
+
+        lines.append(f"content_engine_metrics_updated_timestamp_seconds {time.time():.0f}")
+
+        # Write-then-rename so the textfile collector never reads a half-written file
+        path = os.path.join(self.metrics_dir, PROM_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
@@ -0,0 +1,274 @@
+import os
+import time
+import random
+import asyncio
+import threading
+from tenacity import Retrying, AsyncRetrying, stop_after_attempt, retry_if_exception
+
+# Status codes worth retrying. 429 and 5xx also shrink the concurrency window (AIMD decrease).
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# Per-API defaults, tuned to the lowest paid tiers. Override with
+# RATE_LIMIT_<API>_RPS / _BURST / _CONCURRENCY / _MAX_CONCURRENCY.
+API_DEFAULTS = {
+    'openai':    {'rps': 0.8, 'burst': 3,  'concurrency': 4, 'max_concurrency': 16},  # Whisper ~50 RPM
+    'anthropic': {'rps': 0.8, 'burst': 3,  'concurrency': 4, 'max_concurrency': 16},  # ~50 RPM
+    'drive':     {'rps': 10,  'burst': 20, 'concurrency': 8, 'max_concurrency': 32},
+    'sheets':    {'rps': 1.0, 'burst': 5,  'concurrency': 2, 'max_concurrency': 8},   # 60 requests/min/user
+}
+
+
+def _status_of(exc):
+    """HTTP status of an OpenAI/Anthropic/httpx/googleapiclient error, or None."""
+    status = getattr(exc, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(exc, 'response', None), 'status_code', None)
+    if status is None:
+        status = getattr(getattr(exc, 'resp', None), 'status', None)  # googleapiclient HttpError
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _retry_after_of(exc):
+    """Seconds from a Retry-After header on the error's response, or None."""
+    value = None
+    headers = getattr(getattr(exc, 'response', None), 'headers', None)
+    if headers is not None:
+        value = headers.get('retry-after')
+    resp = getattr(exc, 'resp', None)
+    if value is None and hasattr(resp, 'get'):
+        value = resp.get('retry-after')
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except (TypeError, ValueError):
+        return None  # HTTP-date form; fall back to exponential backoff
+
+
+def _is_connection_error(exc):
+    # SDK connection/timeout errors carry no status; match by class name to avoid importing every SDK.
+    names = {cls.__name__ for cls in type(exc).__mro__}
+    return bool(names & {'APIConnectionError', 'APITimeoutError', 'TransportError', 'TimeoutError',
+                         'ConnectionError', 'ServerNotFoundError'})
+
+
+def is_retryable(exc):
+    status = _status_of(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+    return _is_connection_error(exc)
+
+
+class TokenBucket:
+    """Classic token bucket. reserve() books a token and returns how long to wait for it."""
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            # Negative balance means the token is borrowed from the future
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class AimdLimiter:
+    """
+    Additive-increase / multiplicative-decrease concurrency window.
+    Each success grows the window by ~1 per window's worth of calls; a throttle halves it
+    (at most once per cooldown, so one burst of 429s counts as a single congestion event).
+    """
+
+    def __init__(self, initial, maximum, minimum=1, decrease_factor=0.5, cooldown=5.0):
+        self.limit = float(initial)
+        self.minimum = float(minimum)
+        self.maximum = float(maximum)
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.last_decrease = 0.0
+        self.condition = threading.Condition()
+
+    def try_acquire(self):
+        with self.condition:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self):
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait(timeout=0.5)
+            self.in_flight += 1
+
+    def release(self, throttled=False):
+        with self.condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if throttled:
+                if now - self.last_decrease >= self.cooldown:
+                    self.limit = max(self.minimum, self.limit * self.decrease_factor)
+                    self.last_decrease = now
+            else:
+                self.limit = min(self.maximum, self.limit + 1.0 / max(self.limit, 1.0))
+            self.condition.notify_all()
+
+    def cancel(self):
+        """Give a slot back without counting it as a success or a throttle (call cancelled)."""
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+
+class ApiLimiter:
+    """Token bucket (request rate) + AIMD window (concurrency) + shared Retry-After pause for one API."""
+
+    def __init__(self, name, rps, burst, concurrency, max_concurrency):
+        self.name = name
+        self.bucket = TokenBucket(rps, burst)
+        self.window = AimdLimiter(concurrency, max_concurrency)
+        self.blocked_until = 0.0
+        self.calls = 0
+        self.throttled = 0
+        self.retries = 0
+
+    def pause_for(self, seconds):
+        """Retry-After applies to the whole API, not just the call that received it."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def _pause_remaining(self):
+        return max(0.0, self.blocked_until - time.monotonic())
+
+    def before_call(self):
+        self.window.acquire()
+        time.sleep(self._pause_remaining() + self.bucket.reserve())
+        self.calls += 1
+
+    async def before_call_async(self):
+        while not self.window.try_acquire():
+            await asyncio.sleep(0.05)
+        try:
+            await asyncio.sleep(self._pause_remaining() + self.bucket.reserve())
+        except asyncio.CancelledError:
+            self.window.cancel()
+            raise
+        self.calls += 1
+
+    def after_call(self, exc=None):
+        throttled = exc is not None and (_status_of(exc) in RETRYABLE_STATUSES)
+        if throttled:
+            self.throttled += 1
+            retry_after = _retry_after_of(exc)
+            if retry_after:
+                self.pause_for(retry_after)
+        self.window.release(throttled=throttled)
+
+    def snapshot(self):
+        return {
+            'limit': round(self.window.limit, 2),
+            'in_flight': self.window.in_flight,
+            'calls': self.calls,
+            'throttled': self.throttled,
+            'retries': self.retries,
+        }
+
+
+class RateController:
+    """
+    Central rate control for every external API the pipeline calls.
+    call()/acall() wait for a rate token and a concurrency slot, run the request and retry
+    429/5xx/connection errors with tenacity, honoring Retry-After when the server sends one.
+    """
+
+    def __init__(self, max_attempts=None):
+        self.max_attempts = max_attempts or int(os.getenv('RATE_LIMIT_MAX_ATTEMPTS', '6'))
+        self.limiters = {}
+        self.lock = threading.Lock()
+
+    def limiter(self, api):
+        with self.lock:
+            if api not in self.limiters:
+                defaults = API_DEFAULTS.get(api, API_DEFAULTS['drive'])
+                prefix = f"RATE_LIMIT_{api.upper()}_"
+                self.limiters[api] = ApiLimiter(
+                    api,
+                    rps=float(os.getenv(prefix + 'RPS', defaults['rps'])),
+                    burst=float(os.getenv(prefix + 'BURST', defaults['burst'])),
+                    concurrency=int(os.getenv(prefix + 'CONCURRENCY', defaults['concurrency'])),
+                    max_concurrency=int(os.getenv(prefix + 'MAX_CONCURRENCY', defaults['max_concurrency'])),
+                )
+            return self.limiters[api]
+
+    def _wait(self, retry_state):
+        """Retry-After if the server gave one, else full-jitter exponential backoff capped at 60s."""
+        exc = retry_state.outcome.exception()
+        retry_after = _retry_after_of(exc)
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(60.0, 2 ** retry_state.attempt_number))
+
+    def _before_sleep(self, api):
+        def log(retry_state):
+            self.limiter(api).retries += 1
+            exc = retry_state.outcome.exception()
+            print(f"⏳ {api} call failed ({_status_of(exc) or type(exc).__name__}), "
+                  f"retry {retry_state.attempt_number}/{self.max_attempts - 1} in {retry_state.next_action.sleep:.1f}s")
+        return log
+
+    def call(self, api, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) under `api`'s limits, retrying transient failures."""
+        limiter = self.limiter(api)
+        for attempt in Retrying(stop=stop_after_attempt(self.max_attempts), wait=self._wait,
+                                retry=retry_if_exception(is_retryable),
+                                before_sleep=self._before_sleep(api), reraise=True):
+            with attempt:
+                limiter.before_call()
+                try:
+                    result = fn(*args, **kwargs)
+                except Exception as e:
+                    limiter.after_call(e)
+                    raise
+                limiter.after_call()
+        return result
+
+    async def acall(self, api, fn, *args, **kwargs):
+        """Async twin of call(): awaits fn(*args, **kwargs)."""
+        limiter = self.limiter(api)
+        async for attempt in AsyncRetrying(stop=stop_after_attempt(self.max_attempts), wait=self._wait,
+                                           retry=retry_if_exception(is_retryable),
+                                           before_sleep=self._before_sleep(api), reraise=True):
+            with attempt:
+                await limiter.before_call_async()
+                try:
+                    result = await fn(*args, **kwargs)
+                except asyncio.CancelledError:
+                    limiter.window.cancel()
+                    raise
+                except Exception as e:
+                    limiter.after_call(e)
+                    raise
+                limiter.after_call()
+        return result
+
+    def snapshot(self):
+        return {api: limiter.snapshot() for api, limiter in self.limiters.items()}
+
+
+_controller = None
+
+
+def get_rate_controller():
+    """Process-wide controller so every service instance shares the same quotas."""
+    global _controller
+    if _controller is None:
+        _controller = RateController()
+    return _controller
@@ -1,12 +1,284 @@
 import os
+import re
+import glob
+import time
+import shutil
+import tempfile
+import threading
 import subprocess
+from collections import deque
 import ffmpeg
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw, ImageFont, ImageFilter, ImageStat
+from .fonts import get_font_setup, FONTS_DIR
+
+# Kill an encode whose output time has not advanced for this many seconds
+FFMPEG_STALL_TIMEOUT = float(os.getenv('FFMPEG_STALL_TIMEOUT', '120'))
+# Only the tail of stderr is kept for error messages; -nostats keeps it small anyway
+STDERR_TAIL_LINES = 40
+
+DURATION_RE = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+
+# Extra outputs encoded from the same decode as the main render (see _variants_args).
+# Crops keep full resolution and even dimensions for yuv420p.
+VARIANT_FILTERS = {
+    'vertical': "crop='trunc(min(iw,ih*9/16)/2)*2':'trunc(min(ih,iw*16/9)/2)*2'",  # 9:16
+    'square': "crop='trunc(min(iw,ih)/2)*2':'trunc(min(iw,ih)/2)*2'",               # 1:1
+    'lite': "scale='if(gt(iw,ih),-2,min(720,iw))':'if(gt(iw,ih),min(720,ih),-2)'",  # <=720p
+}
+# Crops change the frame, and the caption band (ASS MarginV near the bottom) would fall outside a crop
+# of the finished picture. These variants are cut from the clean source instead and get the subtitles
+# laid out again for their own frame (see _framed_subtitles); the others are split from the finished picture.
+FRAMED_VARIANTS = ('vertical', 'square')
+MAIN_ENCODE = ['-c:v', 'libx264']
+
+# Review preview: same subtitle/overlay graph at low resolution, encoded as fast as possible
+PREVIEW_SHORT_SIDE = int(os.getenv('PREVIEW_SHORT_SIDE', '480'))
+PREVIEW_ENCODE = ['-c:v', 'libx264', '-preset', 'ultrafast', '-crf', '30', '-c:a', 'aac', '-b:a', '64k', '-movflags', '+faststart']
+VARIANT_ENCODE = {
+    'lite': ['-c:v', 'libx264', '-preset', 'veryfast', '-crf', '28'],
+}
+# Outputs whose audio is always re-encoded (lite trades quality for size)
+VARIANT_AUDIO_ENCODE = {
+    'lite': ['-c:a', 'aac', '-b:a', '96k'],
+}
+# Source audio in these codecs is copied into renders instead of being re-encoded
+AUDIO_COPY_CODECS = ('aac',)
+# Every delivered file: moov atom up front so Drive and phones can start playback early, source metadata kept
+CONTAINER_ARGS = ['-movflags', '+faststart', '-map_metadata', '0']
+
+
+def plan_audio(source):
+    """
+    How a render treats the audio of its source, from probed metadata (VideoAnalyzer.get_metadata):
+    'copy' when every audio stream is AAC, None when there is no audio (video-only graph), else 'encode'.
+    Unknown sources (no metadata) are encoded.
+    """
+    codecs = (source or {}).get('audio_codecs')
+    if codecs is None:
+        return 'encode'
+    if not codecs:
+        return None
+    return 'copy' if all(codec in AUDIO_COPY_CODECS for codec in codecs) else 'encode'
+
+
+def rendered_metadata(source):
+    """Metadata of a file rendered from `source`: same picture and timing, audio now AAC (or still absent)."""
+    if not source or source.get('audio_codecs') is None:
+        return source
+    return dict(source, audio_codecs=['aac'] * len(source['audio_codecs']))
+
+
+def _audio_args(plan, encode=None):
+    """-map/-c:a for one output. `encode` forces this output's own audio encode."""
+    if plan is None:
+        return []
+    if plan == 'copy' and not encode:
+        return ['-map', '0:a?', '-c:a', 'copy']
+    return ['-map', '0:a?'] + (encode or ['-c:a', 'aac'])
+
+
+class FfmpegProgress:
+    """
+    Parses ffmpeg's `-progress` key=value stream while an encode runs.
+    Every completed block (ending in `progress=continue|end`) is passed to `callback` as a dict:
+    frame, fps, speed (x realtime), out_time_s, percent, eta_s, progress.
+    A callback returning False asks the runner to abort the encode.
+    """
+
+    def __init__(self, duration=None, callback=None):
+        self.duration = duration
+        self.callback = callback
+        self.block = {}
+        self.last = {}
+        self.stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+        self.abort_requested = False
+        self.last_advance = time.monotonic()
+        self.last_out_time = -1.0
+
+    def feed_stderr(self, line):
+        line = line.rstrip()
+        if not line:
+            return
+        self.stderr_tail.append(line)
+        if self.duration is None:
+            # First "Duration:" line is the main input; good enough for percent/ETA
+            match = DURATION_RE.search(line)
+            if match:
+                h, m, sec = match.groups()
+                self.duration = int(h) * 3600 + int(m) * 60 + float(sec)
+
+    def feed_progress(self, line):
+        key, sep, value = line.strip().partition('=')
+        if not sep:
+            return
+        self.block[key] = value
+        if key == 'progress':
+            self._emit(self.block)
+            self.block = {}
+
+    def _emit(self, block):
+        def number(key, cast=float):
+            try:
+                return cast(block.get(key, '').rstrip('x'))
+            except ValueError:
+                return None
+
+        out_time_us = number('out_time_us', int)
+        if out_time_us is None:
+            out_time_us = number('out_time_ms', int)  # Older builds: misnamed, also microseconds
+        out_time_s = max(0.0, out_time_us / 1_000_000) if out_time_us is not None else None
+        speed = number('speed')
+        snapshot = {
+            'frame': number('frame', int),
+            'fps': number('fps'),
+            'speed': speed,
+            'out_time_s': out_time_s,
+            'total_size': number('total_size', int),
+            'progress': block.get('progress'),
+            'percent': None,
+            'eta_s': None,
+        }
+        if self.duration and out_time_s is not None:
+            snapshot['percent'] = round(min(100.0, out_time_s / self.duration * 100), 1)
+            if speed:
+                snapshot['eta_s'] = round(max(0.0, self.duration - out_time_s) / speed, 1)
+        if out_time_s is not None and out_time_s > self.last_out_time:
+            self.last_out_time = out_time_s
+            self.last_advance = time.monotonic()
+        self.last = snapshot
+
+        if self.callback:
+            try:
+                if self.callback(snapshot) is False:
+                    self.abort_requested = True
+            except Exception as e:
+                print(f"⚠️  Progress callback error: {e}")
+
+    def stalled(self, timeout=None):
+        timeout = FFMPEG_STALL_TIMEOUT if timeout is None else timeout
+        return timeout > 0 and time.monotonic() - self.last_advance > timeout
+
+    def stderr_bytes(self):
+        return "\n".join(self.stderr_tail).encode()
+
+
+def format_progress(snapshot):
+    """Human readable one-liner, e.g. '42% • 1.9x • 57 fps • ETA 1m05s'."""
+    parts = []
+    if snapshot.get('percent') is not None:
+        parts.append(f"{snapshot['percent']:.0f}%")
+    if snapshot.get('speed'):
+        parts.append(f"{snapshot['speed']:.1f}x")
+    if snapshot.get('fps'):
+        parts.append(f"{snapshot['fps']:.0f} fps")
+    if snapshot.get('eta_s') is not None:
+        minutes, seconds = divmod(int(snapshot['eta_s']), 60)
+        parts.append(f"ETA {minutes}m{seconds:02d}s")
+    return " • ".join(parts) or "starting"
+
+
+def _with_progress(stream):
+    """
+    Command line for an ffmpeg-python stream or a prebuilt argv list, with machine-readable
+    progress on stdout and no interactive stats line on stderr.
+    """
+    if isinstance(stream, list):
+        return stream[:1] + ['-progress', 'pipe:1', '-nostats'] + stream[1:]
+    return stream.global_args('-progress', 'pipe:1', '-nostats').compile()
+
+
+# Cover frames: candidates are keyframes at scene changes (nothing else is decoded)
+COVER_SCENE_THRESHOLD = float(os.getenv('COVER_SCENE_THRESHOLD', '0.3'))
+COVER_MAX_CANDIDATES = int(os.getenv('COVER_MAX_CANDIDATES', '12'))
+COVER_SAMPLE_POINTS = 6  # evenly spaced keyframes when a video has too few scene changes
+
+
+def variant_size(name, width, height):
+    """Frame size VARIANT_FILTERS[name] produces from a width x height picture (crops only; None for scales)."""
+    if name == 'vertical':
+        return int(min(width, height * 9 / 16)) // 2 * 2, int(min(height, width * 16 / 9)) // 2 * 2
+    if name == 'square':
+        side = int(min(width, height)) // 2 * 2
+        return side, side
+    return None
+
+
+def cover_work_bytes(width, height):
+    """Scratch space for create_cover_frame's candidate JPEGs (generous ~1 byte per pixel each)."""
+    return (COVER_MAX_CANDIDATES + COVER_SAMPLE_POINTS + 1) * (width or 1920) * (height or 1080)
+
+
+def score_frame(image):
+    """
+    Cheap cover score: edge variance (sharpness) weighted by how well exposed the frame is.
+    Blurry, black, washed-out or flat frames score low.
+    """
+    gray = image.convert('L')
+    gray.thumbnail((320, 320))
+    sharpness = ImageStat.Stat(gray.filter(ImageFilter.FIND_EDGES)).var[0]
+    stat = ImageStat.Stat(gray)
+    brightness = stat.mean[0] / 255
+    contrast = stat.stddev[0] / 128
+    exposure = max(0.0, 1 - abs(brightness - 0.5) * 2)
+    return sharpness ** 0.5 * exposure * min(1.0, contrast + 0.2)
+
+
+def preview_size(width, height, short_side=None):
+    """(w, h) with the short side scaled to PREVIEW_SHORT_SIDE (never upscaled), rounded to even numbers."""
+    short_side = short_side or PREVIEW_SHORT_SIDE
+    factor = min(1.0, short_side / max(1, min(width, height)))
+    return int(width * factor / 2) * 2, int(height * factor / 2) * 2
+
 
 class RenderService:
     def __init__(self):
         # Ensure ffmpeg is in path or define path here
-        pass
+        # Dedicated fontconfig config + warm cache for libass, set up and checked once per process
+        self.fonts = get_font_setup()
+
+    def _run_ffmpeg(self, stream, progress_callback=None, duration=None):
+        """
+        Run an ffmpeg-python stream with live progress parsing.
+        stdout carries the -progress blocks, stderr is drained into a bounded tail, and a watchdog
+        kills the encode if it stalls or the callback asks to abort. Raises ffmpeg.Error on failure
+        (stderr = last lines only), so callers keep their existing error handling.
+        """
+        args = _with_progress(stream)
+        progress = FfmpegProgress(duration, progress_callback)
+        process = subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=self.fonts.env)
+
+        def pump(pipe, feed):
+            for raw in iter(pipe.readline, b''):
+                feed(raw.decode('utf-8', errors='replace'))
+            pipe.close()
+
+        readers = [
+            threading.Thread(target=pump, args=(process.stdout, progress.feed_progress), daemon=True),
+            threading.Thread(target=pump, args=(process.stderr, progress.feed_stderr), daemon=True),
+        ]
+        for reader in readers:
+            reader.start()
+
+        reason = None
+        while process.poll() is None:
+            if progress.abort_requested:
+                reason = "aborted by progress callback"
+            elif progress.stalled():
+                reason = f"stalled: no progress for {FFMPEG_STALL_TIMEOUT:.0f}s"
+            if reason:
+                process.kill()
+                process.wait()
+                break
+            time.sleep(0.5)
+        for reader in readers:
+            reader.join()
+
+        if reason or process.returncode != 0:
+            stderr = progress.stderr_bytes()
+            if reason:
+                stderr += f"\nffmpeg {reason}".encode()
+            raise ffmpeg.Error('ffmpeg', b'', stderr)
+        return progress.last
 
     def create_intro_overlay(self, title_text, width, height, output_image_path):
         """
@@ -150,94 +422,263 @@ class RenderService:
             print(f"Intro overlay creation failed: {e}")
             return None
 
-    def apply_intro_overlay(self, video_path, overlay_image_path, output_path, duration=6):
-        """Overlay the intro image on video for the first N seconds."""
+    def _render_args(self, input_paths, main_chain, output_path, variants=None, source=None, prelude=None, framed=None):
+        """
+        argv for one ffmpeg process that decodes once and encodes the main output plus optional variants.
+        `main_chain` is the filtergraph producing the finished picture; variants ({name: path}, names from
+        VARIANT_FILTERS) are split from it, except those in `framed` ({name: chain}), which have their own
+        chain (see FRAMED_VARIANTS). `prelude` holds the graph parts those chains read from (splits of
+        the inputs). Only video goes through the graph: audio is copied or encoded per plan_audio(source),
+        and every output gets CONTAINER_ARGS.
+        """
+        variants = variants or {}
+        framed = framed or {}
+        audio = plan_audio(source)
+        split = [name for name in variants if name not in framed]
+        graph = list(prelude or [])
+        if split:
+            graph.append(main_chain + f",split={len(split) + 1}[v0]" + "".join(f"[s_{name}]" for name in split))
+        else:
+            graph.append(main_chain + "[v0]")
+        args = ['ffmpeg']
+        for path in input_paths:
+            args += ['-i', path]
+        outputs = ['-map', '[v0]'] + _audio_args(audio) + MAIN_ENCODE + CONTAINER_ARGS + [output_path]
+        for i, (name, path) in enumerate(variants.items(), start=1):
+            if name in framed:
+                graph.append(f"{framed[name]}[out{i}]")
+            else:
+                graph.append(f"[s_{name}]{VARIANT_FILTERS[name]}[out{i}]")
+            outputs += (['-map', f'[out{i}]'] + _audio_args(audio, VARIANT_AUDIO_ENCODE.get(name))
+                        + VARIANT_ENCODE.get(name, MAIN_ENCODE) + CONTAINER_ARGS + [path])
+        return args + ['-filter_complex', ";".join(graph)] + outputs + ['-y']
+
+    def _framed_subtitles(self, srt_path, name, source):
+        """
+        Subtitle file for a FRAMED_VARIANTS branch: ASS gets PlayResX set to the cropped frame's aspect
+        (PlayResY, font sizes and margins unchanged), so libass lays the captions out inside the crop
+        instead of stretching the full-frame layout. SRT has no layout to fix and is used as is.
+        """
+        size = variant_size(name, (source or {}).get('width') or 0, (source or {}).get('height') or 0)
+        if not srt_path.endswith('.ass') or not size or not all(size):
+            return srt_path
+        with open(srt_path, encoding='utf-8') as f:
+            content = f.read()
+        match = re.search(r"^PlayResY:\s*(\d+)", content, re.MULTILINE)
+        play_height = int(match.group(1)) if match else 1920
+        play_width = round(play_height * size[0] / size[1])
+        if re.search(r"^PlayResX:", content, re.MULTILINE):
+            content = re.sub(r"^PlayResX:.*$", f"PlayResX: {play_width}", content, count=1, flags=re.MULTILINE)
+        else:
+            content = content.replace("[Script Info]", f"[Script Info]\nPlayResX: {play_width}", 1)
+        stem, ext = os.path.splitext(srt_path)
+        framed_path = f"{stem}_{name}{ext}"
+        with open(framed_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        return framed_path
+
+    def _framed_chains(self, variants, input_label, srt_path, source, overlay=None):
+        """
+        (prelude, {name: chain}) for the FRAMED_VARIANTS in `variants`: each crops its own split of
+        `input_label` (the clean, unsubtitled video) and burns srt_path laid out for the crop.
+        `overlay` = (label, duration) also crops and overlays the intro image.
+        """
+        names = [name for name in (variants or {}) if name in FRAMED_VARIANTS]
+        if not names:
+            return [], {}
+        prelude = [f"{input_label}split={len(names)}" + "".join(f"[clean_{name}]" for name in names)]
+        if overlay:
+            prelude.append(f"{overlay[0]}split={len(names)}" + "".join(f"[ov_{name}]" for name in names))
+        chains = {}
+        for name in names:
+            chain = f"[clean_{name}]{VARIANT_FILTERS[name]}"
+            if srt_path:
+                chain += f",{self._subtitles_filter(self._framed_subtitles(srt_path, name, source))}"
+            if overlay:
+                chain += (f"[base_{name}];[ov_{name}]{VARIANT_FILTERS[name]}[ovc_{name}];"
+                          f"[base_{name}][ovc_{name}]overlay=x=0:y=0:enable='between(t,0,{overlay[1]})'")
+            chains[name] = chain
+        return prelude, chains
+
+    def _intro_overlay_args(self, video_path, overlay_image_path, output_path, duration=6, variants=None, source=None, clean=None):
+        """
+        Intro overlay command (plus optional variants from the same process). `clean` = (path of the
+        unsubtitled video, its subtitle file or None) lets FRAMED_VARIANTS be cut from the clean picture.
+        """
+        inputs = [video_path, overlay_image_path]
+        prelude, framed = [], {}
+        if clean:
+            inputs.append(clean[0])
+            prelude, framed = self._framed_chains(variants, "[2:v]", clean[1], source, overlay=("[ov_src]", duration))
+        if framed:
+            prelude.insert(0, f"[1:v]split=2[ov_main][ov_src]")
+            chain = f"[0:v][ov_main]overlay=x=0:y=0:enable='between(t,0,{duration})'"
+        else:
+            inputs = inputs[:2]
+            chain = f"[0:v][1:v]overlay=x=0:y=0:enable='between(t,0,{duration})'"
+        return self._render_args(inputs, chain, output_path, variants, source, prelude, framed)
+
+    def apply_intro_overlay(self, video_path, overlay_image_path, output_path, duration=6, progress_callback=None, variants=None, source=None, clean=None):
+        """
+        Overlay the intro image on video for the first N seconds (plus optional variants from the same process).
+        `source` is the probed metadata of video_path; it decides whether audio is copied (see plan_audio).
+        Pass `clean` = (unsubtitled video, subtitle file) so cropped variants keep their captions.
+        """
         try:
-            # Create input streams
-            video_input = ffmpeg.input(video_path)
-            overlay_input = ffmpeg.input(overlay_image_path)
-            
-            # Apply overlay with enablement
-            # Note: We must ensure we pick the video stream from the input
-            # If the input has no audio, this might fail on audio map, but we assume input has audio.
-            
-            video_track = video_input.video.overlay(
-                overlay_input, 
-                x=0, 
-                y=0, 
-                enable=f'between(t,0,{duration})'
-            )
-            
-            # Pass audio content through (re-encode to AAC to be safe/standard)
-            audio_track = video_input.audio
-            
-            (
-                ffmpeg
-                .output(
-                    video_track, 
-                    audio_track, 
-                    output_path, 
-                    vcodec='libx264', 
-                    acodec='aac'
-                )
-                .overwrite_output()
-                .run(capture_stdout=True, capture_stderr=True)
+            self._run_ffmpeg(
+                self._intro_overlay_args(video_path, overlay_image_path, output_path, duration, variants, source, clean),
+                progress_callback
             )
             return output_path
         except ffmpeg.Error as e:
             print(f"Overlay application failed: {e.stderr.decode()}")
             return None
 
-    def burn_subtitles(self, video_path, srt_path, output_path):
-        """Burn subtitles (SRT or ASS) into video using proper path escaping."""
-        try:
-            abs_srt_path = os.path.abspath(srt_path)
-            # PROPER WINDOWS PATH ESCAPING FOR FFMPEG FILTERS
-            # 1. Replace backward slashes with forward slashes
-            # 2. Escape the colon in drive letter
-            # 3. Escape spaces even if quoted (safest for filter parser)
-            
-            # REVERTING TO SIMPLEST params:
-            # vf="ass='C\:/Path/To/File.ass'"
-            # But with escaping spaces?
-            
-            safe_srt_path = abs_srt_path.replace('\\', '/').replace(':', '\\\\:')
-            
-            # Escape single quotes in path if any
-            safe_srt_path = safe_srt_path.replace("'", "'\\''") 
-            
-            # Use filter_name='path'
-            # C\:/Users/DeeMindz/Documents/Social\ content\ automation/test_subs.ass
-            
-            safe_srt_path_no_quotes = abs_srt_path.replace('\\', '/').replace(':', '\\\\:').replace(' ', '\\\\ ').replace("'", "\\'")
-            
-            filter_name = 'ass' if srt_path.endswith('.ass') else 'subtitles'
-            
-            print(f"Debug: Burning subtitles using {filter_name} filter with safe path: {safe_srt_path_no_quotes}")
-            
-            # Construct complex filter argument
-            # vf="ass='C\:/path/to/file.ass'"
-            # ADDING fontsdir to ensure Montserrat is found
+    def _subtitles_filter(self, srt_path):
+        """The escaped ass/subtitles filter for srt_path."""
+        # Filter-argument escaping (works for Windows paths too): forward slashes, escaped drive colon,
+        # spaces and quotes, so the path needs no quoting inside the filtergraph
+        abs_srt_path = os.path.abspath(srt_path)
+        safe_srt_path = abs_srt_path.replace('\\', '/').replace(':', '\\\\:').replace(' ', '\\\\ ').replace("'", "\\'")
+        filter_name = 'ass' if srt_path.endswith('.ass') else 'subtitles'
+        vf_arg = f"{filter_name}={safe_srt_path}"
+        if not self.fonts.active:
+            # No managed fontconfig (see services/fonts.py): point libass at Montserrat directly
             # Syntax: ass=filename:fontsdir=directory
-            
-            project_root = os.getcwd()
-            fonts_dir = os.path.join(project_root, 'assets', 'fonts').replace('\\', '/').replace(':', '\\\\:')
-            
-            vf_arg = f"{filter_name}={safe_srt_path_no_quotes}:fontsdir={fonts_dir}"
-            
-            print(f"Debug: Burning with filter: {vf_arg}")
-            
-            (
-                ffmpeg
-                .input(video_path)
-                .output(output_path, vf=vf_arg)
-                .overwrite_output()
-                .run(capture_stdout=True, capture_stderr=True)
+            fonts_dir = FONTS_DIR.replace('\\', '/').replace(':', '\\\\:')
+            vf_arg += f":fontsdir={fonts_dir}"
+        return vf_arg
+
+    def _subtitles_args(self, video_path, srt_path, output_path, variants=None, source=None):
+        """Subtitle burn command (plus optional variants from the same decode; crops are burned on their own branch)."""
+        names = [name for name in (variants or {}) if name in FRAMED_VARIANTS]
+        if not names:
+            return self._render_args([video_path], f"[0:v]{self._subtitles_filter(srt_path)}", output_path, variants, source)
+        prelude, framed = self._framed_chains(variants, "[clean]", srt_path, source)
+        prelude.insert(0, "[0:v]split=2[main][clean]")
+        chain = f"[main]{self._subtitles_filter(srt_path)}"
+        return self._render_args([video_path], chain, output_path, variants, source, prelude, framed)
+
+    def extract_cover_candidates(self, video_path, output_dir, duration=None):
+        """
+        Decode keyframes only (-skip_frame nokey) and keep the first one plus every scene change.
+        Videos with too few scene changes fall back to keyframes at evenly spaced seeks.
+        Returns the candidate image paths.
+        """
+        pattern = os.path.join(output_dir, "scene_%03d.jpg")
+        subprocess.run([
+            'ffmpeg', '-v', 'error', '-skip_frame', 'nokey', '-i', video_path,
+            '-vf', f"select='eq(n,0)+gt(scene,{COVER_SCENE_THRESHOLD})'",
+            '-fps_mode', 'vfr', '-frames:v', str(COVER_MAX_CANDIDATES), '-q:v', '2', pattern, '-y'
+        ], check=True, capture_output=True)
+        candidates = sorted(glob.glob(os.path.join(output_dir, "scene_*.jpg")))
+
+        if len(candidates) < 3 and duration:
+            # Input seeking lands on a keyframe, so each sample still decodes a single frame
+            for i in range(COVER_SAMPLE_POINTS):
+                path = os.path.join(output_dir, f"seek_{i:03d}.jpg")
+                position = duration * (i + 1) / (COVER_SAMPLE_POINTS + 1)
+                result = subprocess.run([
+                    'ffmpeg', '-v', 'error', '-skip_frame', 'nokey', '-ss', f"{position:.2f}", '-i', video_path,
+                    '-frames:v', '1', '-q:v', '2', path, '-y'
+                ], capture_output=True)
+                if result.returncode == 0 and os.path.exists(path):
+                    candidates.append(path)
+        return candidates
+
+    def create_cover_frame(self, video_path, title_text, output_path, duration=None, work_dir=None):
+        """
+        Pick the best keyframe (score_frame) and composite the intro title styling on it.
+        Writes a JPEG thumbnail to output_path; returns output_path or None.
+        Candidate frames go to a scratch directory inside work_dir (the job workspace; default: next to output_path).
+        """
+        scratch_dir = tempfile.mkdtemp(prefix="cover_", dir=work_dir or os.path.dirname(os.path.abspath(output_path)))
+        try:
+            candidates = self.extract_cover_candidates(video_path, scratch_dir, duration)
+            if not candidates:
+                print("Cover frame: no keyframes decoded")
+                return None
+            scored = []
+            for path in candidates:
+                with Image.open(path) as img:
+                    scored.append((score_frame(img), path))
+            best_score, best_path = max(scored)
+            print(f"🖼️  Cover frame: best of {len(candidates)} keyframes ({os.path.basename(best_path)}, score {best_score:.1f})")
+
+            frame = Image.open(best_path).convert('RGBA')
+            title_path = os.path.join(scratch_dir, "title.png")
+            if title_text and self.create_intro_overlay(title_text, frame.width, frame.height, title_path):
+                with Image.open(title_path) as title_img:
+                    frame = Image.alpha_composite(frame, title_img.convert('RGBA'))
+            frame.convert('RGB').save(output_path, quality=90)
+            return output_path
+        except subprocess.CalledProcessError as e:
+            print(f"Cover frame extraction failed: {e.stderr.decode(errors='replace')}")
+            return None
+        except Exception as e:
+            print(f"Cover frame creation failed: {e}")
+            return None
+        finally:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
+
+    def _preview_args(self, video_path, srt_path, output_path, width, height, overlay_image_path=None, duration=6):
+        """
+        Preview command: scale down first so subtitles and overlay are drawn at preview size,
+        then the same subtitle filter and intro overlay as the full render.
+        """
+        w, h = preview_size(width, height)
+        chain = f"[0:v]scale={w}:{h}"
+        if srt_path:
+            chain += f",{self._subtitles_filter(srt_path)}"
+        inputs = ['-i', video_path]
+        if overlay_image_path:
+            inputs += ['-i', overlay_image_path]
+            chain += f"[base];[1:v]scale={w}:{h}[ov];[base][ov]overlay=x=0:y=0:enable='between(t,0,{duration})'"
+        return (['ffmpeg'] + inputs + ['-filter_complex', chain + "[v]", '-map', '[v]', '-map', '0:a?']
+                + PREVIEW_ENCODE + [output_path, '-y'])
+
+    def render_preview(self, video_path, srt_path, output_path, width, height, overlay_image_path=None, duration=6, progress_callback=None):
+        """Low-resolution ultrafast render for reviewing title and subtitle placement."""
+        try:
+            self._run_ffmpeg(
+                self._preview_args(video_path, srt_path, output_path, width, height, overlay_image_path, duration),
+                progress_callback
             )
             return output_path
+        except ffmpeg.Error as e:
+            print(f"Preview render failed: {e.stderr.decode()}")
+            return None
+        except Exception as e:
+            print(f"Preview render unexpected error: {e}")
+            return None
+
+    def _remux_args(self, video_path, output_path):
+        return ['ffmpeg', '-i', video_path, '-map', '0:v:0', '-map', '0:a?', '-c', 'copy'] + CONTAINER_ARGS + [output_path, '-y']
+
+    def remux(self, video_path, output_path):
+        """
+        Stream-copy video_path into output_path with CONTAINER_ARGS (faststart, metadata), for videos
+        that need no render. Falls back to a plain file copy if the streams don't fit the container.
+        """
+        try:
+            self._run_ffmpeg(self._remux_args(video_path, output_path))
+        except Exception as e:
+            print(f"Remux failed, copying as is: {e}")
+            shutil.copy(video_path, output_path)
+        return output_path
+
+    def burn_subtitles(self, video_path, srt_path, output_path, progress_callback=None, variants=None, source=None):
+        """
+        Burn subtitles (SRT or ASS) into video using proper path escaping (plus optional variants from the same decode).
+        `source` is the probed metadata of video_path; it decides whether audio is copied (see plan_audio).
+        """
+        try:
+            self._run_ffmpeg(self._subtitles_args(video_path, srt_path, output_path, variants, source), progress_callback)
+            return output_path
         except ffmpeg.Error as e:
             print(f"Subtitle burn failed (FFmpeg): {e.stderr.decode()}")
             return None
         except Exception as e:
             print(f"Subtitle burn unexpected error: {e}")
             return None
+
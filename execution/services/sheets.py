@@ -1,160 +1,1450 @@
 import os
+import re
+import time
+import uuid
+import socket
 import datetime
+import asyncio
+import threading
+import contextlib
+import httpx
+import google.auth.transport.requests
+from .rate_limiter import get_rate_controller, is_retryable
+from .journal import Journal, JOURNAL_MAX_ATTEMPTS
+from .dashboard_summary import SUMMARY_TAB, SUMMARY_RANGE, completion_event, fold, parse_summary, summary_values, summary_from_rows
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
 
+SHEETS_API = "https://sheets.googleapis.com/v4/spreadsheets"
+
+# Claims: column J holds the claim token (runner/random), column K the lease expiry (epoch seconds).
+# A heartbeat pushes K forward while the video is in flight; a 'Processing' row whose lease ran out
+# belongs to a dead runner and its file is picked up again.
+CLAIM_LEASE_SECONDS = int(os.getenv('CLAIM_LEASE_SECONDS', '900'))
+RUNNER_ID = os.getenv('RUNNER_ID') or f"{socket.gethostname()}-{os.getpid()}"
+CLAIM_RANGE = "'Content Engine'!E2:K"
+APPEND_RANGE = "'Content Engine'!A:K"
+DUPLICATE_STATUS = "Duplicate"
+EXPIRED_STATUS = "Lease Expired"
+# Rows with these statuses no longer hold their file
+RELEASED_STATUSES = (DUPLICATE_STATUS, EXPIRED_STATUS)
+
+# Per-video columns written with update_log_cells (C is rewritten by a restyle)
+FINAL_LINK_COLUMN = "C"
+VARIANTS_COLUMN = "L"
+PREVIEW_COLUMN = "M"
+COVER_COLUMN = "N"
+
+# 'Content Index' tab: one row per processed piece of content, used to link re-uploads to the existing output.
+# Columns: MD5, Size, Audio Fingerprint, Original ID, Final Link, Filename, Indexed At
+CONTENT_INDEX_RANGE = "'Content Index'!A2:G"
+CONTENT_INDEX_APPEND_RANGE = "'Content Index'!A:G"
+CONTENT_DUPLICATE_STATUS = "Duplicate Content"
+
+MONITOR_RANGE = "'Backend Monitoring'!A1:B1"
+
+# Keep the 'Dashboard Summary' tab (see dashboard_summary.py) up to date as videos finish
+DASHBOARD_SUMMARY = os.getenv('DASHBOARD_SUMMARY', 'true').lower() in ('1', 'true', 'yes')
+# The summary is read-modify-write, so runners take turns through a SheetLock (hidden tab) around it
+SUMMARY_LOCK_TAB = f"_lock {SUMMARY_TAB}"
+# Seconds a summary lock holder may keep it before others break it (a crashed runner's lock)
+SUMMARY_LOCK_SECONDS = 60
+# Seconds to wait for the lock; after that the update fails and its events stay in the journal
+SUMMARY_LOCK_TIMEOUT = float(os.getenv('SUMMARY_LOCK_TIMEOUT', '30'))
+SHEET_LOCK_POLL = 1.0
+
+# Archival: finished rows leave 'Content Engine' for monthly 'Archive YYYY-MM' tabs and their IDs go to the
+# compact 'Processed Index' tab (Original ID, Status, Archive Tab, Archived At), so the hot tab stays small.
+# Deleting rows shifts row numbers under every runner, so exactly one runner may archive: opt in with SHEETS_ARCHIVER
+SHEETS_ARCHIVER = os.getenv('SHEETS_ARCHIVER', '').lower() in ('1', 'true', 'yes')
+# Finished rows older than ARCHIVE_RETENTION_DAYS are moved (0 disables archival)
+ARCHIVE_RETENTION_DAYS = float(os.getenv('ARCHIVE_RETENTION_DAYS', '30'))
+# Finished rows kept in the hot tab at most, whatever their age
+ARCHIVE_MAX_ROWS = int(os.getenv('ARCHIVE_MAX_ROWS', '500'))
+ENGINE_HEADER_RANGE = "'Content Engine'!A1:N1"
+ENGINE_ROWS_RANGE = "'Content Engine'!A2:N"
+PROCESSED_INDEX_TAB = "Processed Index"
+PROCESSED_INDEX_RANGE = "'Processed Index'!A2:B"
+PROCESSED_INDEX_HEADER = ["Original ID", "Status", "Archive Tab", "Archived At"]
+# Row lease (holder, expiry epoch, archival generation) the archiver holds while it deletes rows. Every write
+# that addresses 'Content Engine' rows by number reads the lease together with the rows, backs off while it is
+# live, and must be sent within ROW_WRITE_WINDOW seconds of that read; the archiver waits out the window after
+# taking the lease, so no such write can land on shifted rows. The generation goes up with every archival,
+# so rows read earlier stay usable as long as it has not changed (JournalSyncer caches them this way).
+ROW_LEASE_RANGE = "'Content Engine'!P1:R1"
+ROW_LEASE_SECONDS = 120
+ROW_WRITE_WINDOW = float(os.getenv('ROW_WRITE_WINDOW', '15'))
+ROW_LEASE_POLL = 2.0
+# Seconds the archiver holds the lease before deleting. Writers in other processes can't tell it when their
+# last write landed, so it waits the write window plus as long again for requests already sent. Lower it only
+# if Sheets round trips are reliably short; it is never less than ROW_WRITE_WINDOW.
+ROW_LEASE_DRAIN = max(ROW_WRITE_WINDOW, float(os.getenv('ROW_LEASE_DRAIN', str(2 * ROW_WRITE_WINDOW))))
+
+# Write-behind: completions, extra cells and status updates go to the local journal and a background
+# syncer batches them into the sheet. Claims stay synchronous (they must read the shared sheet back).
+# Needs a JOURNAL_PATH that outlives the process; the GitHub Actions workflow turns it off.
+JOURNAL_ENABLED = os.getenv('SHEETS_JOURNAL', 'true').lower() in ('1', 'true', 'yes')
+# Seconds between syncer rounds when nothing new is written (retries after Sheets errors)
+JOURNAL_SYNC_INTERVAL = float(os.getenv('JOURNAL_SYNC_INTERVAL', '30'))
+# Seconds a new write waits so writes arriving together share one batch
+JOURNAL_BATCH_DELAY = float(os.getenv('JOURNAL_BATCH_DELAY', '1'))
+# Seconds the end of a run waits for the journal to drain into the sheet
+JOURNAL_FLUSH_TIMEOUT = float(os.getenv('JOURNAL_FLUSH_TIMEOUT', '60'))
+
+
+def _load_credentials(scopes):
+    """Service account credentials from GOOGLE_SERVICE_ACCOUNT_JSON or the key file, else None."""
+    # Try loading from ENV variable first (Content)
+    json_creds = os.getenv('GOOGLE_SERVICE_ACCOUNT_JSON')
+    creds_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS', 'service_account.json')
+
+    if json_creds:
+        import json
+        info = json.loads(json_creds)
+        return service_account.Credentials.from_service_account_info(info, scopes=scopes)
+    if os.path.exists(creds_path):
+        return service_account.Credentials.from_service_account_file(creds_path, scopes=scopes)
+    return None
+
+
+def _start_row_values(timestamp_str, original_id, original_link, filename, claim_token="", lease_expires=""):
+    # Columns: Timestamp, Original Link, Final Link, Platforms, Status, Original ID, Strategy, Duration,
+    # Stage Breakdown, Claim, Lease Expires
+    return [[
+        timestamp_str,
+        original_link,
+        "Processing...",      # Final Link placeholder
+        "Processing...",      # Platforms placeholder
+        "Processing",         # Status
+        original_id,
+        f"Started: {filename}", # Strategy placeholder
+        "",                   # Duration placeholder
+        "",                   # Stage Breakdown placeholder
+        claim_token,
+        lease_expires
+    ]]
+
+
+def _completion_row_values(original_id, final_link, platforms, strategy_content, status, duration, stage_breakdown=None):
+    # Range C:H covers: Final Link(C), Platforms(D), Status(E), ID(F), Strategy(G), Duration(H)
+    row = [
+        final_link,
+        ", ".join(platforms) if isinstance(platforms, list) else platforms,
+        status,
+        original_id,
+        strategy_content,
+        str(duration) if duration else ""
+    ]
+    # Optional Stage Breakdown(I)
+    if stage_breakdown is not None:
+        row.append(stage_breakdown)
+    return [row]
+
+
+def _completion_range(row_index, stage_breakdown=None):
+    last_col = "I" if stage_breakdown is not None else "H"
+    return f"'Content Engine'!C{row_index}:{last_col}{row_index}"
+
+
+def _new_claim():
+    return f"{RUNNER_ID}/{uuid.uuid4().hex[:8]}", int(time.time() + CLAIM_LEASE_SECONDS)
+
+
+def _parse_claims(values):
+    """Rows of E2:K -> [{'row', 'status', 'id', 'claim', 'expires'}] (row = sheet row number)."""
+    rows = []
+    for i, cells in enumerate(values):
+        cells = list(cells) + [""] * (7 - len(cells))
+        try:
+            expires = float(cells[6]) if cells[6] != "" else None
+        except (TypeError, ValueError):
+            expires = None
+        rows.append({'row': i + 2, 'status': str(cells[0]), 'id': str(cells[1]), 'claim': str(cells[5]), 'expires': expires})
+    return rows
+
+
+class RowsMoving(Exception):
+    """Rows are being archived (row lease held), or row numbers read for a write are older than ROW_WRITE_WINDOW."""
+
+
+def _row_lease(values, now=None):
+    """ROW_LEASE_RANGE values -> (lease is live, archival generation)."""
+    cells = list(values[0]) if values else []
+    cells += [""] * (3 - len(cells))
+    try:
+        live = float(cells[1]) > (now or time.time())
+    except (TypeError, ValueError):
+        live = False
+    return live, str(cells[2])
+
+
+def _lease_values(value_ranges):
+    """Lease cells of a batchGet [rows range, ROW_LEASE_RANGE]; raises RowsMoving while the lease is live."""
+    lease = value_ranges[1].get('values', []) if len(value_ranges) > 1 else []
+    if _row_lease(lease)[0]:
+        raise RowsMoving("'Content Engine' rows are being archived")
+    return lease
+
+
+def _rows_with_lease(value_ranges):
+    """batchGet [rows range, ROW_LEASE_RANGE] -> values of the rows range; raises RowsMoving while the lease is live."""
+    _lease_values(value_ranges)
+    return value_ranges[0].get('values', []) if value_ranges else []
+
+
+def _read_rows(rate, values_api, sheet_id, range_name=CLAIM_RANGE):
+    """
+    Values of range_name for a write by row number, plus the monotonic time they were read
+    (pass it to _fenced). Raises RowsMoving while the archiver holds the row lease.
+    """
+    result = rate.call('sheets', values_api.batchGet(
+        spreadsheetId=sheet_id, ranges=[range_name, ROW_LEASE_RANGE], valueRenderOption="UNFORMATTED_VALUE"
+    ).execute)
+    return _rows_with_lease(result.get('valueRanges', [])), time.monotonic()
+
+
+def _check_fence(read_at):
+    if time.monotonic() - read_at > ROW_WRITE_WINDOW:
+        raise RowsMoving(f"row numbers read {time.monotonic() - read_at:.0f}s ago may have moved")
+
+
+def _fenced(read_at, fn):
+    """fn for rate.call that refuses to send (on any attempt) once its row numbers are older than ROW_WRITE_WINDOW."""
+    def call():
+        _check_fence(read_at)
+        return fn()
+    return call
+
+
+def _holds_file(row, now):
+    """
+    True if this row keeps its file from being (re)processed: a finished row, a live lease,
+    or a legacy 'Processing' row written before leases existed.
+    """
+    if not row['id'] or row['status'] in RELEASED_STATUSES:
+        return False
+    if row['status'] == "Processing" and row['expires'] is not None:
+        return row['expires'] > now
+    return True
+
+
+def _held_ids(rows):
+    now = time.time()
+    return [r['id'] for r in rows if _holds_file(r, now)]
+
+
+def _claim_winner(rows, original_id):
+    """Earliest row still holding original_id: appends are serialized, so every runner agrees on it."""
+    now = time.time()
+    for r in rows:
+        if r['id'] == original_id and _holds_file(r, now):
+            return r
+    return None
+
+
+def _expired_rows(rows, original_id):
+    now = time.time()
+    return [r for r in rows if r['id'] == original_id and r['status'] == "Processing"
+            and r['expires'] is not None and r['expires'] <= now]
+
+
+def _row_for(rows, original_id, claim_token=None):
+    """
+    Sheet row of our claim, or None if these rows don't show it (the caller re-reads or retries: an older
+    row for the same ID, 'Lease Expired' or 'Duplicate', must not take the write). Writes without a claim
+    (restyle, rows from before leases) go to the LAST row for original_id.
+    """
+    if claim_token:
+        return next((r['row'] for r in rows if r['claim'] == claim_token), None)
+    return _last_row_for([r['id'] for r in rows], original_id)
+
+
+def _appended_row(result):
+    """Row number from an append response ("'Content Engine'!A12:K12")."""
+    match = re.search(r"![A-Z]+(\d+)", result.get('updates', {}).get('updatedRange', ''))
+    return int(match.group(1)) if match else None
+
+
+def _parse_content_index(values):
+    """Rows of the 'Content Index' tab -> [{'md5', 'size', 'fingerprint', 'id', 'final_link', 'filename'}]."""
+    entries = []
+    for cells in values:
+        cells = [str(c) for c in cells] + [""] * (7 - len(cells))
+        if cells[4]:
+            entries.append({'md5': cells[0], 'size': cells[1], 'fingerprint': cells[2], 'id': cells[3],
+                            'final_link': cells[4], 'filename': cells[5]})
+    return entries
+
+
+def _content_index_values(file, fingerprint, final_link):
+    return [[
+        file.get('md5Checksum', ""),
+        str(file.get('size', "")),
+        fingerprint or "",
+        file['id'],
+        final_link,
+        file.get('name', ""),
+        datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    ]]
+
+
+def _journal_row_values(entry):
+    """Full 'Content Engine' row for a journaled completion whose row is not in the sheet."""
+    values = list(entry['payload']['values'][0])
+    timestamp = datetime.datetime.fromtimestamp(entry['created_at']).strftime("%Y-%m-%d %H:%M:%S")
+    values += [""] * (7 - len(values))  # through Stage Breakdown(I)
+    return [timestamp, ""] + values + [entry['claim'] or "", ""]
+
+
+def _index_held_ids(values):
+    """Rows of 'Processed Index'!A2:B -> archived IDs that still hold their file."""
+    return [str(cells[0]) for cells in values
+            if cells and cells[0] and (len(cells) < 2 or cells[1] not in RELEASED_STATUSES)]
+
+
+def _row_age_days(timestamp, now):
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return (now - datetime.datetime.strptime(str(timestamp).strip(), fmt)).total_seconds() / 86400
+        except ValueError:
+            pass
+    return None
+
+
+def _archive_tab(timestamp, now):
+    try:
+        month = datetime.datetime.strptime(str(timestamp).strip()[:7], "%Y-%m")
+    except ValueError:
+        month = now
+    return f"Archive {month:%Y-%m}"
+
+
+def _archive_plan(values, now=None):
+    """
+    Rows of A2:N -> [(sheet row, cells, archive tab)]: finished rows past ARCHIVE_RETENTION_DAYS,
+    plus the oldest finished rows beyond ARCHIVE_MAX_ROWS. In-flight ('Processing') rows never move.
+    """
+    now = now or datetime.datetime.now()
+    finished = [(i + 2, list(cells)) for i, cells in enumerate(values)
+                if any(cells) and (len(cells) < 5 or cells[4] != "Processing")]
+    excess = len(finished) - ARCHIVE_MAX_ROWS
+    plan = []
+    for n, (row, cells) in enumerate(finished):
+        age = _row_age_days(cells[0], now)
+        if n < excess or (age is not None and age >= ARCHIVE_RETENTION_DAYS):
+            plan.append((row, cells, _archive_tab(cells[0], now)))
+    return plan
+
+
+def _delete_row_requests(sheet_gid, rows):
+    """deleteDimension requests for the given sheet rows, bottom-up so earlier deletes don't shift later ones."""
+    spans = []
+    for row in sorted(rows, reverse=True):
+        if spans and spans[-1][0] == row:
+            spans[-1][0] = row - 1
+        else:
+            spans.append([row - 1, row])
+    return [{'deleteDimension': {'range': {'sheetId': sheet_gid, 'dimension': 'ROWS',
+                                           'startIndex': start, 'endIndex': end}}} for start, end in spans]
+
+
+def _sheet_tabs(service, sheet_id):
+    """Tab title -> numeric sheetId."""
+    meta = get_rate_controller().call('sheets', service.spreadsheets().get(
+        spreadsheetId=sheet_id, fields='sheets.properties(sheetId,title)'
+    ).execute)
+    return {sheet['properties']['title']: sheet['properties']['sheetId'] for sheet in meta.get('sheets', [])}
+
+
+class SheetLockError(Exception):
+    """A SheetLock could not be taken in time, or its holder ran past the expiry."""
+
+
+def _transient(exc):
+    """True for failures a later journal round can outlast (outages, throttling, archival, lock contention)."""
+    return isinstance(exc, (RowsMoving, SheetLockError)) or is_retryable(exc)
+
+
+class SheetLock:
+    """
+    Mutex shared by every runner on one spreadsheet: a hidden tab whose creation is the test-and-set
+    (addSheet fails when the title exists, and the batchUpdate also writing holder and expiry into it is
+    atomic). A lock past its expiry belongs to a crashed runner and is broken by deleting that tab by
+    sheetId, so a breaker never removes a newer holder's lock. Writes made under the lock go through
+    fenced(), which refuses to send them once the lock may have been broken.
+    """
+
+    def __init__(self, service, sheet_id, title, seconds=None, timeout=None):
+        self.service = service
+        self.sheet_id = sheet_id
+        self.title = title
+        self.seconds = seconds or SUMMARY_LOCK_SECONDS
+        self.timeout = SUMMARY_LOCK_TIMEOUT if timeout is None else timeout
+        self.gid = None
+        self.expires = 0
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def acquire(self):
+        rate = get_rate_controller()
+        spreadsheets = self.service.spreadsheets()
+        deadline = time.time() + self.timeout
+        while True:
+            gid = uuid.uuid4().int % 2_000_000_000 + 1
+            expires = int(time.time() + self.seconds)
+            try:
+                rate.call('sheets', spreadsheets.batchUpdate(spreadsheetId=self.sheet_id, body={'requests': [
+                    {'addSheet': {'properties': {'sheetId': gid, 'title': self.title, 'hidden': True,
+                                                 'gridProperties': {'rowCount': 1, 'columnCount': 2}}}},
+                    {'updateCells': {'start': {'sheetId': gid, 'rowIndex': 0, 'columnIndex': 0}, 'fields': 'userEnteredValue',
+                                     'rows': [{'values': [{'userEnteredValue': {'stringValue': RUNNER_ID}},
+                                                          {'userEnteredValue': {'numberValue': expires}}]}]}},
+                ]}).execute)
+                self.gid, self.expires = gid, expires
+                return self
+            except Exception as e:
+                held_by = _sheet_tabs(self.service, self.sheet_id).get(self.title)
+                if held_by is None and 'already exists' not in str(e):
+                    raise  # not contention: the request itself failed
+            if held_by is not None:  # else the holder released it after our attempt
+                self._break_expired(held_by)
+            if time.time() >= deadline:
+                raise SheetLockError(f"'{self.title}' still held after {self.timeout:.0f}s")
+            time.sleep(SHEET_LOCK_POLL)
+
+    def _break_expired(self, gid):
+        rate = get_rate_controller()
+        try:
+            cells = rate.call('sheets', self.service.spreadsheets().values().get(
+                spreadsheetId=self.sheet_id, range=f"'{self.title}'!A1:B1", valueRenderOption="UNFORMATTED_VALUE"
+            ).execute).get('values', [[]])[0]
+            if len(cells) > 1 and float(cells[1]) > time.time():
+                return
+            print(f"🔓 Breaking expired lock '{self.title}' held by {cells[0] if cells else 'unknown'}")
+            rate.call('sheets', self.service.spreadsheets().batchUpdate(
+                spreadsheetId=self.sheet_id, body={'requests': [{'deleteSheet': {'sheetId': gid}}]}
+            ).execute)
+        except Exception:
+            pass  # released, or broken by someone else, in the meantime: just try again
+
+    def fenced(self, fn):
+        """fn for rate.call that only runs while the lock is safely ours (a margin before the expiry)."""
+        def call():
+            if time.time() > self.expires - SHEET_LOCK_POLL * 5:
+                raise SheetLockError(f"'{self.title}' lock expired before the write")
+            return fn()
+        return call
+
+    def release(self):
+        if self.gid is None:
+            return
+        gid, self.gid = self.gid, None
+        try:
+            get_rate_controller().call('sheets', self.service.spreadsheets().batchUpdate(
+                spreadsheetId=self.sheet_id, body={'requests': [{'deleteSheet': {'sheetId': gid}}]}
+            ).execute)
+        except Exception as e:
+            print(f"⚠️  Could not release lock '{self.title}' (it expires on its own): {e}")
+
+
+def update_dashboard_summary(service, sheet_id, events):
+    """
+    Fold finished videos into the 'Dashboard Summary' grid: one read and one RAW write of the fixed-size range,
+    under the summary SheetLock so concurrent runners never fold over each other's counts.
+    The first time, the tab is created and seeded from the log itself (hot tab plus 'Processed Index');
+    the seed already contains these events, so they are not folded again.
+    Raises if the lock or Sheets is unavailable (journaled events are retried on the next sync round).
+    """
+    with SheetLock(service, sheet_id, SUMMARY_LOCK_TAB) as lock:
+        _fold_summary(service, sheet_id, events, lock)
+
+
+def _fold_summary(service, sheet_id, events, lock):
+    rate = get_rate_controller()
+    values_api = service.spreadsheets().values()
+
+    def read(range_name, render="FORMATTED_VALUE"):
+        return rate.call('sheets', values_api.get(
+            spreadsheetId=sheet_id, range=range_name, valueRenderOption=render
+        ).execute).get('values', [])
+
+    try:
+        summary = parse_summary(read(SUMMARY_RANGE, render="UNFORMATTED_VALUE"))
+    except Exception:
+        if SUMMARY_TAB in _sheet_tabs(service, sheet_id):
+            raise
+        rate.call('sheets', service.spreadsheets().batchUpdate(
+            spreadsheetId=sheet_id, body={'requests': [{'addSheet': {'properties': {'title': SUMMARY_TAB}}}]}
+        ).execute)
+        summary = None
+
+    if summary is None:
+        try:
+            archived = [cells[0] for cells in read(f"'{PROCESSED_INDEX_TAB}'!B2:B") if cells]
+        except Exception:
+            archived = []
+        summary = summary_from_rows(read("'Content Engine'!A2:H"), archived)
+    else:
+        for event in events:
+            fold(summary, event)
+
+    rate.call('sheets', lock.fenced(values_api.update(
+        spreadsheetId=sheet_id, range=SUMMARY_RANGE, valueInputOption='RAW',
+        body={'values': summary_values(summary)}
+    ).execute))
+
+
+def archive_finished_rows(service, sheet_id):
+    """
+    Move archivable rows (see _archive_plan) out of 'Content Engine' with a googleapiclient Sheets service.
+    Only on the runner with SHEETS_ARCHIVER set. Rows are copied to their archive tab and indexed first; the
+    deletes then happen under the row lease, after writes addressed by row number have drained (ROW_LEASE_DRAIN),
+    and only if the lease is still ours and the hot tab still holds exactly what was read. A concurrent writer
+    can at worst leave a row archived twice, never lose one or write onto a shifted row. Returns the number of
+    rows moved.
+    """
+    if not SHEETS_ARCHIVER or ARCHIVE_RETENTION_DAYS <= 0:
+        return 0
+    rate = get_rate_controller()
+    spreadsheets = service.spreadsheets()
+    values_api = spreadsheets.values()
+
+    def engine_rows():
+        return rate.call('sheets', values_api.get(spreadsheetId=sheet_id, range=ENGINE_ROWS_RANGE).execute).get('values', [])
+
+    def append(range_name, rows, input_option='USER_ENTERED'):
+        rate.call('sheets', values_api.append(
+            spreadsheetId=sheet_id, range=range_name, valueInputOption=input_option,
+            insertDataOption='INSERT_ROWS', body={'values': rows}
+        ).execute)
+
+    plan = _archive_plan(engine_rows())
+    if not plan:
+        return 0
+
+    # 1. Missing archive / index tabs, with headers
+    tabs = _sheet_tabs(service, sheet_id)
+    new_tabs = sorted(({tab for _, _, tab in plan} | {PROCESSED_INDEX_TAB}) - set(tabs))
+    if new_tabs:
+        rate.call('sheets', spreadsheets.batchUpdate(
+            spreadsheetId=sheet_id, body={'requests': [{'addSheet': {'properties': {'title': tab}}} for tab in new_tabs]}
+        ).execute)
+        header = rate.call('sheets', values_api.get(spreadsheetId=sheet_id, range=ENGINE_HEADER_RANGE).execute).get('values', [[]])
+        data = [{'range': f"'{tab}'!A1", 'values': [PROCESSED_INDEX_HEADER] if tab == PROCESSED_INDEX_TAB else header}
+                for tab in new_tabs]
+        rate.call('sheets', values_api.batchUpdate(
+            spreadsheetId=sheet_id, body={'valueInputOption': 'RAW', 'data': data}
+        ).execute)
+
+    # 2. Copy rows, then index their IDs
+    by_tab = {}
+    for _, cells, tab in plan:
+        by_tab.setdefault(tab, []).append(cells)
+    for tab, rows in by_tab.items():
+        append(f"'{tab}'!A:N", rows)
+    archived_at = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    index = [[cells[5], cells[4], tab, archived_at] for _, cells, tab in plan if len(cells) > 5 and cells[5]]
+    if index:
+        append(f"'{PROCESSED_INDEX_TAB}'!A:D", index, input_option='RAW')
+
+    # 3. Take the row lease and wait until every write that read row numbers before it has landed
+    deletes = _delete_row_requests(tabs["Content Engine"], [row for row, _, _ in plan])
+
+    def get_lease():
+        return rate.call('sheets', values_api.get(
+            spreadsheetId=sheet_id, range=ROW_LEASE_RANGE, valueRenderOption="UNFORMATTED_VALUE"
+        ).execute).get('values', [])
+
+    lease = get_lease()
+    live, generation = _row_lease(lease)
+    if live:
+        print(f"⚠️  Row lease held by {lease[0][0]}; rows were copied but left in place (is SHEETS_ARCHIVER set on more than one runner?)")
+        return 0
+    # New generation: rows cached under the old one are re-read
+    generation = int(float(generation or 0)) + 1
+
+    def set_lease(values):
+        rate.call('sheets', values_api.update(
+            spreadsheetId=sheet_id, range=ROW_LEASE_RANGE, valueInputOption='RAW', body={'values': values}
+        ).execute)
+
+    # The lease outlives the drain, so writers keep backing off until the deletes are done
+    set_lease([[RUNNER_ID, int(time.time() + ROW_LEASE_DRAIN + ROW_LEASE_SECONDS), generation]])
+    ours = True
+    try:
+        time.sleep(ROW_LEASE_DRAIN)
+
+        # 4. Delete from the hot tab if the lease is still ours and nothing moved underneath us
+        lease = get_lease()
+        if not (lease and lease[0] and lease[0][0] == RUNNER_ID and _row_lease(lease)[1] == str(generation)):
+            ours = False
+            print("⚠️  Row lease was taken over during archival; rows were copied but left in place")
+            return 0
+        current = engine_rows()
+        if any(row - 2 >= len(current) or list(current[row - 2]) != cells for row, cells, _ in plan):
+            print("⚠️  'Content Engine' changed during archival; rows were copied but left in place")
+            return 0
+        rate.call('sheets', spreadsheets.batchUpdate(spreadsheetId=sheet_id, body={'requests': deletes}).execute)
+    finally:
+        if ours:
+            set_lease([["", "", generation]])
+    print(f"🗄️  Archived {len(plan)} rows to {', '.join(sorted(by_tab))}")
+    return len(plan)
+
+
+def _summary_event(links, original_id, final_link, platforms, strategy_content, status, duration, stages):
+    if not DASHBOARD_SUMMARY:
+        return None
+    return completion_event(original_id, links.pop(original_id, ""), final_link, platforms,
+                            strategy_content, status, duration, stages)
+
+
+def _status_updates(rows, status):
+    return [{'range': f"'Content Engine'!E{r['row']}", 'values': [[status]]} for r in rows]
+
+
+def _claim_marks(rows, original_id, claim_token, outcome):
+    """Status updates after a claim read-back: our row is 'Duplicate' if an earlier row won, else expired leases are marked."""
+    winner = outcome['winner'] = _claim_winner(rows, original_id)
+    if winner and winner['claim'] != claim_token:
+        return _status_updates([r for r in rows if r['claim'] == claim_token], DUPLICATE_STATUS)
+    return _status_updates(_expired_rows(rows, original_id), EXPIRED_STATUS)
+
+
+def _completion_update(rows, original_id, claim_token, values, stage_breakdown):
+    row = _row_for(rows, original_id, claim_token)
+    return [{'range': _completion_range(row, stage_breakdown), 'values': values}] if row else []
+
+
+def _cell_updates(rows, original_id, claim_token, cells):
+    row = _row_for(rows, original_id, claim_token)
+    return [{'range': f"'Content Engine'!{col}{row}", 'values': [[value]]} for col, value in cells.items()] if row else []
+
+
+class LeaseKeeper:
+    """
+    Process-wide heartbeat for held claims. Runs on its own thread with its own Sheets client
+    (googleapiclient objects are not thread-safe) and rewrites column K for every claim still
+    held, every CLAIM_LEASE_SECONDS / 3 seconds.
+    """
+
+    def __init__(self, interval=None):
+        self.interval = interval or max(5, CLAIM_LEASE_SECONDS / 3)
+        self.lock = threading.Lock()
+        self.claims = {}  # claim token -> sheet_id
+        self.thread = None
+        self.service = None
+
+    def hold(self, sheet_id, claim_token):
+        with self.lock:
+            self.claims[claim_token] = sheet_id
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._loop, name="lease-keeper", daemon=True)
+                self.thread.start()
+
+    def release(self, claim_token):
+        with self.lock:
+            self.claims.pop(claim_token, None)
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.renew()
+            except Exception as e:
+                print(f"⚠️  Lease heartbeat failed: {e}")
+
+    def renew(self):
+        with self.lock:
+            by_sheet = {}
+            for token, sheet_id in self.claims.items():
+                by_sheet.setdefault(sheet_id, set()).add(token)
+        if not by_sheet:
+            return
+        if self.service is None:
+            creds = _load_credentials(['https://www.googleapis.com/auth/spreadsheets'])
+            if not creds:
+                return
+            self.service = build('sheets', 'v4', credentials=creds)
+        rate = get_rate_controller()
+        expires = int(time.time() + CLAIM_LEASE_SECONDS)
+        values_api = self.service.spreadsheets().values()
+        for sheet_id, tokens in by_sheet.items():
+            try:
+                values, read_at = _read_rows(rate, values_api, sheet_id, "'Content Engine'!J2:J")
+                data = [{'range': f"'Content Engine'!K{i + 2}", 'values': [[expires]]}
+                        for i, cells in enumerate(values) if cells and cells[0] in tokens]
+                if data:
+                    rate.call('sheets', _fenced(read_at, values_api.batchUpdate(
+                        spreadsheetId=sheet_id, body={'valueInputOption': 'RAW', 'data': data}
+                    ).execute))
+            except RowsMoving as e:
+                # Rows are shifting; claims outlive several heartbeats, so the next round renews them
+                print(f"⏸️  Lease heartbeat skipped: {e}")
+
+
+_lease_keeper = None
+_lease_keeper_lock = threading.Lock()
+
+
+def get_lease_keeper():
+    global _lease_keeper
+    with _lease_keeper_lock:
+        if _lease_keeper is None:
+            _lease_keeper = LeaseKeeper()
+        return _lease_keeper
+
+
+class JournalSyncer:
+    """
+    Replays the local journal into the sheet on its own thread (and its own Sheets client). Each round
+    takes every pending entry and issues at most two appends (rows the sheet never got) and one
+    batchUpdate (completions, cells and the latest status). Replays are idempotent: starts already in
+    the sheet are skipped and updates land on the row found by claim token, so entries left over by a
+    crashed run are simply synced on the next start.
+    """
+
+    def __init__(self, journal=None, interval=None):
+        self.journal = journal or Journal()
+        self.interval = interval or JOURNAL_SYNC_INTERVAL
+        self.lock = threading.Lock()
+        self.sync_lock = threading.Lock()
+        self.wake = threading.Event()
+        self.thread = None
+        self.service = None
+        self.rows = {}  # sheet_id -> {'rows', 'generation'}: claim rows from the last read (see _claim_rows)
+
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._loop, name="journal-syncer", daemon=True)
+                self.thread.start()
+        self.wake.set()
+
+    def record(self, sheet_id, kind, payload, original_id=None, claim=None):
+        """Durably journal a sheet write and return without waiting for Sheets."""
+        self.journal.append(sheet_id, kind, payload, original_id, claim)
+        self.start()
+
+    def _loop(self):
+        while True:
+            self.wake.wait(self.interval)
+            self.wake.clear()
+            time.sleep(JOURNAL_BATCH_DELAY)
+            try:
+                self.sync_once()
+            except Exception as e:
+                print(f"⚠️  Journal sync failed: {e}")
+
+    def sync_once(self):
+        """One replay round. Returns the number of entries the sheet took."""
+        with self.sync_lock:
+            entries = self.journal.pending()
+            if not entries:
+                return 0
+            if self.service is None:
+                creds = _load_credentials(['https://www.googleapis.com/auth/spreadsheets'])
+                if not creds:
+                    return 0
+                self.service = build('sheets', 'v4', credentials=creds)
+
+            by_sheet = {}
+            for entry in entries:
+                by_sheet.setdefault(entry['sheet_id'], []).append(entry)
+            synced = 0
+            for sheet_id, items in by_sheet.items():
+                log = [e for e in items if e['kind'] != 'summary']
+                try:
+                    synced += self._sync_sheet(sheet_id, log) if log else 0
+                except Exception as e:
+                    if _transient(e):
+                        # Sheets is down, throttling or archiving: everything stays pending for the next round
+                        print(f"⚠️  Journal sync failed, {len(items)} entries pending: {e}")
+                        continue
+                    # The sheet rejected something in this round: replay it entry by entry so only the bad
+                    # entries are charged an attempt (pending() drops them after JOURNAL_MAX_ATTEMPTS)
+                    print(f"⚠️  Journal sync rejected ({e}), retrying {len(log)} entries one at a time")
+                    synced += self._sync_each(sheet_id, log)
+                # Summary events go after their completions (a first-time seed reads them from the log)
+                summaries = [e for e in items if e['kind'] == 'summary']
+                if summaries:
+                    try:
+                        update_dashboard_summary(self.service, sheet_id, [e['payload'] for e in summaries])
+                        self.journal.mark_synced([e['id'] for e in summaries])
+                        synced += len(summaries)
+                    except Exception as e:
+                        if not _transient(e):
+                            self.journal.mark_failed([e['id'] for e in summaries], e)
+                        print(f"⚠️  Dashboard summary update failed, {len(summaries)} videos pending: {e}")
+            if synced:
+                print(f"📤 Synced {synced} journal entries to the sheet")
+                self.journal.prune()
+            return synced
+
+    def _sync_each(self, sheet_id, items):
+        """Sync entries one at a time after a rejected round, charging an attempt to each one the sheet rejects."""
+        synced = 0
+        for entry in items:
+            try:
+                synced += self._sync_sheet(sheet_id, [entry])
+            except Exception as e:
+                if _transient(e):
+                    print(f"⚠️  Journal sync failed, {len(items)} entries pending: {e}")
+                    break
+                self.journal.mark_failed([entry['id']], e)
+                print(f"⚠️  Journal entry {entry['id']} ({entry['kind']} for {entry['original_id']}) rejected, "
+                      f"attempt {entry['attempts'] + 1}/{JOURNAL_MAX_ATTEMPTS}: {e}")
+        return synced
+
+    def invalidate_rows(self, sheet_id=None):
+        """Forget cached claim rows (after this process archived rows, or a write found them stale)."""
+        if sheet_id is None:
+            self.rows.clear()
+        else:
+            self.rows.pop(sheet_id, None)
+
+    def _claim_rows(self, sheet_id, fresh=False):
+        """
+        Claim rows to resolve journal entries against, and the monotonic time they were confirmed (for _fenced).
+        Row numbers only move when the archiver deletes rows, and it bumps the generation in ROW_LEASE_RANGE
+        first, so cached rows are reused after a one-range check of the lease instead of re-reading E2:K.
+        Raises RowsMoving while rows are being archived.
+        """
+        rate = get_rate_controller()
+        values_api = self.service.spreadsheets().values()
+        cached = self.rows.get(sheet_id)
+        if cached and not fresh:
+            lease = rate.call('sheets', values_api.get(
+                spreadsheetId=sheet_id, range=ROW_LEASE_RANGE, valueRenderOption="UNFORMATTED_VALUE"
+            ).execute).get('values', [])
+            checked_at = time.monotonic()
+            live, generation = _row_lease(lease)
+            if live:
+                raise RowsMoving("'Content Engine' rows are being archived")
+            if generation == cached['generation']:
+                return cached['rows'], checked_at
+        result = rate.call('sheets', values_api.batchGet(
+            spreadsheetId=sheet_id, ranges=[CLAIM_RANGE, ROW_LEASE_RANGE], valueRenderOption="UNFORMATTED_VALUE"
+        ).execute)
+        read_at = time.monotonic()
+        value_ranges = result.get('valueRanges', [])
+        lease = _lease_values(value_ranges)
+        rows = _parse_claims(value_ranges[0].get('values', []) if value_ranges else [])
+        self.rows[sheet_id] = {'rows': rows, 'generation': _row_lease(lease)[1]}
+        return rows, read_at
+
+    def _sync_sheet(self, sheet_id, items):
+        try:
+            return self._sync_entries(sheet_id, items)
+        except RowsMoving:
+            self.invalidate_rows(sheet_id)
+            raise
+
+    def _sync_entries(self, sheet_id, items):
+        rate = get_rate_controller()
+        values_api = self.service.spreadsheets().values()
+
+        def append(rows):
+            rate.call('sheets', values_api.append(
+                spreadsheetId=sheet_id, range=APPEND_RANGE, valueInputOption='USER_ENTERED',
+                insertDataOption='INSERT_ROWS', body={'values': rows}
+            ).execute)
+
+        starts = [e for e in items if e['kind'] == 'start']
+        updates = [e for e in items if e['kind'] in ('completion', 'cells')]
+        rows, read_at, fresh = [], None, False
+        if starts or updates:
+            # Status-only rounds never look at rows
+            rows, read_at = self._claim_rows(sheet_id)
+
+        def refresh():
+            nonlocal rows, read_at, fresh
+            rows, read_at = self._claim_rows(sheet_id, fresh=True)
+            fresh = True
+
+        # 1. Claim rows that never reached the sheet (the claim call failed, or we crashed during it)
+        if starts:
+            missing = [e for e in starts if e['claim'] not in {r['claim'] for r in rows if r['claim']}]
+            if missing and not fresh:
+                refresh()  # the cache may just predate them
+                missing = [e for e in starts if e['claim'] not in {r['claim'] for r in rows if r['claim']}]
+            if missing:
+                append([e['payload']['values'][0] for e in missing])
+                refresh()
+
+        # 2. Everything else becomes one batchUpdate; completions without any row are appended whole.
+        # Only a fresh read decides that a row is missing, and rows found by ID alone (no claim) come from one too.
+        if updates and not fresh and any(e['claim'] is None or _row_for(rows, e['original_id'], e['claim']) is None
+                                         for e in updates):
+            refresh()
+        done = [e['id'] for e in starts]
+        data, orphans, unresolved, released = [], [], [], []
+        for entry in updates:
+            payload = entry['payload']
+            row = _row_for(rows, entry['original_id'], entry['claim'])
+            if row is None:
+                if entry['kind'] == 'completion':
+                    orphans.append(entry)
+                else:
+                    unresolved.append(entry['id'])
+                continue
+            if entry['kind'] == 'completion':
+                data.append({'range': _completion_range(row, payload['stage_breakdown']), 'values': payload['values']})
+                released.append(entry['claim'])
+            else:
+                data += [{'range': f"'Content Engine'!{col}{row}", 'values': [[value]]} for col, value in payload['cells'].items()]
+            done.append(entry['id'])
+
+        statuses = [e for e in items if e['kind'] == 'status']
+        if statuses:
+            # Only the latest status is still true
+            data.append({'range': MONITOR_RANGE, 'values': statuses[-1]['payload']['values']})
+            done += [e['id'] for e in statuses]
+
+        if orphans:
+            append([_journal_row_values(e) for e in orphans])
+            done += [e['id'] for e in orphans]
+            released += [e['claim'] for e in orphans]
+        if data:
+            request = values_api.batchUpdate(
+                spreadsheetId=sheet_id, body={'valueInputOption': 'USER_ENTERED', 'data': data}
+            ).execute
+            rate.call('sheets', _fenced(read_at, request) if read_at is not None else request)
+
+        self.journal.mark_synced(done)
+        self.journal.mark_failed(unresolved, "row not found")
+        # The lease is renewed until the sheet shows the row as finished
+        for claim_token in released:
+            if claim_token:
+                get_lease_keeper().release(claim_token)
+        return len(done)
+
+    def flush(self, timeout=None):
+        """Sync until the journal is empty, a round makes no progress, or timeout passes. Returns entries left."""
+        deadline = time.time() + (JOURNAL_FLUSH_TIMEOUT if timeout is None else timeout)
+        while True:
+            progress = self.sync_once()
+            remaining = self.journal.pending_count()
+            if not remaining or not progress or time.time() >= deadline:
+                return remaining
+
+
+_journal_syncer = None
+_journal_syncer_lock = threading.Lock()
+
+
+def get_journal_syncer():
+    global _journal_syncer
+    with _journal_syncer_lock:
+        if _journal_syncer is None:
+            _journal_syncer = JournalSyncer()
+        return _journal_syncer
+
+
+def flush_journal(timeout=None):
+    """Push journaled writes into the sheet before the process exits. Returns entries still pending."""
+    if not JOURNAL_ENABLED or _journal_syncer is None:
+        return 0
+    remaining = _journal_syncer.flush(timeout)
+    if remaining:
+        print(f"⚠️  {remaining} journal entries not in the sheet yet; they are replayed on the next start")
+    return remaining
+
+
+def _last_row_for(ids, original_id):
+    """Sheet row of the LAST occurrence of original_id in column F (F2 is list index 0), or None."""
+    try:
+        # Find LAST occurrence by reversing the list
+        # This ensures we update the most recently added row, not an old one
+        reversed_ids = list(reversed(ids))
+        reverse_index = reversed_ids.index(original_id)
+        # Convert back to original position: len - 1 - reverse_index
+        list_index = len(ids) - 1 - reverse_index
+        # ids list corresponds to rows 2, 3, 4... (0-indexed in list -> 2-indexed in sheet)
+        return list_index + 2
+    except ValueError:
+        return None
+
+
 class SheetsService:
     def __init__(self):
-        self.creds = None
         SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
-        
-        # Try loading from ENV variable first (Content)
-        json_creds = os.getenv('GOOGLE_SERVICE_ACCOUNT_JSON')
-        creds_path = os.getenv('GOOGLE_APPLICATION_CREDENTIALS', 'service_account.json')
-        
-        if json_creds:
-            import json
-            info = json.loads(json_creds)
-            self.creds = service_account.Credentials.from_service_account_info(
-                info, scopes=SCOPES)
-            self.service = build('sheets', 'v4', credentials=self.creds)
-        elif os.path.exists(creds_path):
-            self.creds = service_account.Credentials.from_service_account_file(
-                creds_path, scopes=SCOPES)
-            self.service = build('sheets', 'v4', credentials=self.creds)
-        else:
-            self.service = None
+        self.creds = _load_credentials(SCOPES)
+        self.service = build('sheets', 'v4', credentials=self.creds) if self.creds else None
+        self.rate = get_rate_controller()
+        self.claims = {}  # original_id -> claim token held by this service
+        self.links = {}   # original_id -> original link, for the dashboard summary
+        if self.service and JOURNAL_ENABLED:
+            get_journal_syncer().start()  # replays whatever an earlier run left unsynced
+
+    def _get_values(self, sheet_id, range_name, render="FORMATTED_VALUE"):
+        result = self.rate.call('sheets', self.service.spreadsheets().values().get(
+            spreadsheetId=sheet_id,
+            range=range_name,
+            valueRenderOption=render
+        ).execute)
+        return result.get('values', [])
+
+    def _claim_rows(self, sheet_id):
+        return _parse_claims(self._get_values(sheet_id, CLAIM_RANGE, render="UNFORMATTED_VALUE"))
+
+    def _write_rows(self, sheet_id, build):
+        """
+        Read the claim rows, turn them into batchUpdate data with build(rows) and send it while the row
+        numbers are still good (see ROW_LEASE_RANGE): waits out archival and re-reads if the write was late.
+        Returns the data written ([] if build found nothing to write).
+        """
+        values_api = self.service.spreadsheets().values()
+        deadline = time.time() + ROW_LEASE_SECONDS
+        while True:
+            try:
+                values, read_at = _read_rows(self.rate, values_api, sheet_id)
+                data = build(_parse_claims(values))
+                if data:
+                    self.rate.call('sheets', _fenced(read_at, values_api.batchUpdate(
+                        spreadsheetId=sheet_id, body={'valueInputOption': 'USER_ENTERED', 'data': data}
+                    ).execute))
+                return data
+            except RowsMoving:
+                if time.time() >= deadline:
+                    raise
+                time.sleep(ROW_LEASE_POLL)
+
+    def _journal_start(self, sheet_id, original_id, claim_token, values):
+        """After a failed claim call, keep the row: the syncer appends it unless the append already landed."""
+        if JOURNAL_ENABLED and claim_token:
+            get_journal_syncer().record(sheet_id, 'start', {'values': values}, original_id, claim_token)
+            self.claims[original_id] = claim_token
+            self.links[original_id] = values[0][1]
+            get_lease_keeper().hold(sheet_id, claim_token)
 
     def log_processing_start(self, sheet_id, original_id, original_link, filename, timestamp_str=None):
         """
-        Append a new log entry to the next empty row.
-        Manually calculates the next row to prevent overwriting.
+        Claim the video for this runner.
+        The claim row is appended atomically (values.append), then the sheet is re-read: the earliest
+        row still holding the file wins, so concurrent runners agree without a lock. Losers mark their
+        row 'Duplicate'. Expired leases of crashed runners are marked 'Lease Expired'.
+        Returns False only if another runner holds the video; sheet errors don't block processing.
         """
-        if not self.service: return
+        if not self.service: return True
         
         if not timestamp_str:
             timestamp_str = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
+        claim_token = values = None
         try:
-            # 1. Find the next empty row by counting existing rows in Column A
-            # We look at A:A to see how many rows have data
-            result = self.service.spreadsheets().values().get(
-                spreadsheetId=sheet_id,
-                range="'Content Engine'!A:A"
-            ).execute()
-            
-            existing_rows = result.get('values', [])
-            next_row = len(existing_rows) + 1
-            
-            # If sheet is empty (no header), start at 1? usually row 1 is header.
-            # If len is 0, we write to row 1 (bad if header missing). 
-            # Assuming row 1 is header. If len is 1, next is 2.
-            if next_row < 2: next_row = 2
-            
-            range_name = f"'Content Engine'!A{next_row}"
-            
-            # Columns: Timestamp, Original Link, Final Link, Platforms, Status, Original ID, Strategy, Duration
-            values = [[
-                timestamp_str,
-                original_link,
-                "Processing...",      # Final Link placeholder
-                "Processing...",      # Platforms placeholder
-                "Processing",         # Status
-                original_id,
-                f"Started: {filename}", # Strategy placeholder
-                ""                    # Duration placeholder
-            ]]
-            
-            body = {'values': values}
-            
-            self.service.spreadsheets().values().update(
+            # 1. Cheap pre-check so runners rarely collide at all
+            if _claim_winner(self._claim_rows(sheet_id), original_id):
+                print(f"⏭️  {filename} is already claimed by another runner, skipping")
+                return False
+
+            # 2. Atomic append of our claim
+            claim_token, lease_expires = _new_claim()
+            values = _start_row_values(timestamp_str, original_id, original_link, filename, claim_token, lease_expires)
+            result = self.rate.call('sheets', self.service.spreadsheets().values().append(
                 spreadsheetId=sheet_id,
-                range=range_name,
+                range=APPEND_RANGE,
                 valueInputOption='USER_ENTERED',
-                body=body
-            ).execute()
-            print(f"🔒 Locked video {filename} in Sheet at Row {next_row}")
+                insertDataOption='INSERT_ROWS',
+                body={'values': values}
+            ).execute)
+            row = _appended_row(result)
+
+            # 3. Read back: first holder wins
+            outcome = {}
+            self._write_rows(sheet_id, lambda rows: _claim_marks(rows, original_id, claim_token, outcome))
+            winner = outcome['winner']
+            if winner and winner['claim'] != claim_token:
+                print(f"⏭️  Lost claim for {filename} to {winner['claim'] or 'an earlier row'}, skipping")
+                return False
+
+            self.claims[original_id] = claim_token
+            self.links[original_id] = original_link
+            get_lease_keeper().hold(sheet_id, claim_token)
+            print(f"🔒 Locked video {filename} in Sheet at Row {row} (claim {claim_token})")
+            return True
             
         except Exception as e:
             print(f"Error logging start to sheets: {e}")
+            self._journal_start(sheet_id, original_id, claim_token, values)
+            return True
 
-    def update_log_completion(self, sheet_id, original_id, final_link, platforms, strategy_content, status="Completed", duration=None):
-        """Find the row with original_id and update it with final details."""
+    def update_log_completion(self, sheet_id, original_id, final_link, platforms, strategy_content, status="Completed", duration=None, stage_breakdown=None, stages=None):
+        """
+        Find our claim row (the last row with original_id if we hold no claim) and update it with final details.
+        stages ({stage: seconds}) feed the stage-time percentiles of the dashboard summary.
+        """
         if not self.service: return
         
-        # 1. Find the row index (LAST occurrence to avoid overwriting old processed videos)
-        ids = self.get_processed_ids(sheet_id)
-        try:
-            # Find LAST occurrence by reversing the list
-            # This ensures we update the most recently added row, not an old one
-            reversed_ids = list(reversed(ids))
-            reverse_index = reversed_ids.index(original_id)
-            # Convert back to original position: len - 1 - reverse_index
-            list_index = len(ids) - 1 - reverse_index
-            # ids list corresponds to rows 2, 3, 4... (0-indexed in list -> 2-indexed in sheet)
-            row_index = list_index + 2 
-        except ValueError:
+        claim_token = self.claims.pop(original_id, None)
+        event = _summary_event(self.links, original_id, final_link, platforms, strategy_content, status, duration, stages)
+        if JOURNAL_ENABLED:
+            values = _completion_row_values(original_id, final_link, platforms, strategy_content, status, duration, stage_breakdown)
+            get_journal_syncer().record(sheet_id, 'completion', {'values': values, 'stage_breakdown': stage_breakdown},
+                                        original_id, claim_token)
+            if event:
+                get_journal_syncer().record(sheet_id, 'summary', event, original_id)
+            print(f"📝 Journaled {status} for {original_id}")
+            return
+
+        # 1. Find the row index (our claim; else LAST occurrence to avoid overwriting old processed videos)
+        if claim_token:
+            get_lease_keeper().release(claim_token)
+        values = _completion_row_values(original_id, final_link, platforms, strategy_content, status, duration, stage_breakdown)
+        try:
+            # 2. Update the row (re-resolved if archival moved it)
+            data = self._write_rows(sheet_id, lambda rows: _completion_update(rows, original_id, claim_token, values, stage_breakdown))
+        except Exception as e:
+            print(f"Error updating sheet: {e}")
+            return
+        if not data:
             print(f"⚠️ Could not find row for {original_id} to update")
             return
+        print(f"✅ Updated Sheet {data[0]['range']} directly w/ status {status}")
 
-        # 2. Update the row
-        # Range C:H covers: Final Link(C), Platforms(D), Status(E), ID(F), Strategy(G), Duration(H)
-        range_name = f"'Content Engine'!C{row_index}:H{row_index}"
-        
-        values = [[
-            final_link,
-            ", ".join(platforms) if isinstance(platforms, list) else platforms,
-            status,
-            original_id,
-            strategy_content,
-            str(duration) if duration else ""
-        ]]
-        
-        body = {'values': values}
-        
+        if event:
+            try:
+                update_dashboard_summary(self.service, sheet_id, [event])
+            except Exception as e:
+                print(f"Error updating dashboard summary: {e}")
+
+    def update_log_cells(self, sheet_id, original_id, cells):
+        """Write extra columns ({'L': value, ...}) on this video's row (our claim, else the last row for the ID)."""
+        if not self.service or not cells: return
+        if JOURNAL_ENABLED:
+            get_journal_syncer().record(sheet_id, 'cells', {'cells': cells}, original_id, self.claims.get(original_id))
+            return
+
+        claim_token = self.claims.get(original_id)
         try:
-            self.service.spreadsheets().values().update(
+            if not self._write_rows(sheet_id, lambda rows: _cell_updates(rows, original_id, claim_token, cells)):
+                print(f"⚠️ Could not find row for {original_id} to update")
+        except Exception as e:
+            print(f"Error updating sheet cells: {e}")
+
+    def get_content_index(self, sheet_id):
+        """Entries of the 'Content Index' tab ([] if the tab is missing or unreadable)."""
+        if not self.service: return []
+
+        try:
+            return _parse_content_index(self._get_values(sheet_id, CONTENT_INDEX_RANGE, render="UNFORMATTED_VALUE"))
+        except Exception as e:
+            print(f"Error reading content index: {e}")
+            return []
+
+    def add_content_index(self, sheet_id, file, final_link, fingerprint=None):
+        """Record processed content so later re-uploads of it can be linked instead of reprocessed."""
+        if not self.service: return
+
+        try:
+            self.rate.call('sheets', self.service.spreadsheets().values().append(
                 spreadsheetId=sheet_id,
-                range=range_name,
-                valueInputOption='USER_ENTERED',
-                body=body
-            ).execute()
-            print(f"✅ Updated Sheet row {row_index} directly w/ status {status}")
+                range=CONTENT_INDEX_APPEND_RANGE,
+                valueInputOption='RAW',  # keep checksums like '12e4...' from becoming numbers
+                insertDataOption='INSERT_ROWS',
+                body={'values': _content_index_values(file, fingerprint, final_link)}
+            ).execute)
         except Exception as e:
-            print(f"Error updating sheet: {e}")
+            print(f"Error updating content index: {e}")
 
     def get_processed_ids(self, sheet_id):
-        """Fetch all original file IDs already processed from the sheet."""
+        """IDs that must not be started again: finished rows, claims whose lease is still live, and archived rows."""
         if not self.service: return []
         
         try:
-            range_name = "'Content Engine'!F2:F" # All IDs in column F
-            result = self.service.spreadsheets().values().get(
-                spreadsheetId=sheet_id,
-                range=range_name
-            ).execute()
-            values = result.get('values', [])
-            return [row[0] for row in values if row]
+            return _held_ids(self._claim_rows(sheet_id)) + self._archived_ids(sheet_id)
         except Exception as e:
             print(f"Error fetching IDs from sheets: {e}")
             return []
+
+    def _archived_ids(self, sheet_id):
+        try:
+            return _index_held_ids(self._get_values(sheet_id, PROCESSED_INDEX_RANGE, render="UNFORMATTED_VALUE"))
+        except Exception:
+            return []  # no 'Processed Index' tab until the first archival
+
+    def archive_rows(self, sheet_id):
+        """Move old finished rows to the archive tabs (see archive_finished_rows). Returns the number moved."""
+        if not self.service: return 0
+
+        try:
+            # The journal syncer addresses rows by number; keep it paused while rows shift
+            with get_journal_syncer().sync_lock if JOURNAL_ENABLED else contextlib.nullcontext():
+                moved = archive_finished_rows(self.service, sheet_id)
+                if moved and JOURNAL_ENABLED:
+                    get_journal_syncer().invalidate_rows(sheet_id)
+                return moved
+        except Exception as e:
+            print(f"Error archiving sheet rows: {e}")
+            return 0
+
     def update_status(self, sheet_id, status_text, state="Processing"):
         """Overwrite the current status in 'Backend Monitoring' (Col A=State, Col B=Message)."""
         if not self.service: return
         
         timestamp = datetime.datetime.now().strftime("%H:%M:%S")
         message = f"[{timestamp}] {status_text}"
-        
-        range_name = "'Backend Monitoring'!A1:B1"
+        if JOURNAL_ENABLED:
+            get_journal_syncer().record(sheet_id, 'status', {'values': [[state, message]]})
+            return
+
+        range_name = MONITOR_RANGE
         body = {'values': [[state, message]]}
         
         try:
-            self.service.spreadsheets().values().update(
+            self.rate.call('sheets', self.service.spreadsheets().values().update(
                 spreadsheetId=sheet_id,
                 range=range_name,
                 valueInputOption='USER_ENTERED',
                 body=body
-            ).execute()
+            ).execute)
         except Exception as e:
             # If sheet doesn't exist, we might need to handle it, but for now just print
             print(f"Error updating status: {e}")
+
+
+class AsyncSheetsService:
+    """
+    Asyncio variant of SheetsService over the Sheets v4 REST API and httpx.AsyncClient.
+    Same sheet layout and row semantics as the sync service.
+    """
+
+    def __init__(self, client=None):
+        SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
+        self.creds = _load_credentials(SCOPES)
+        self.client = client or httpx.AsyncClient(timeout=httpx.Timeout(30.0, connect=10.0))
+        self.rate = get_rate_controller()
+        self.claims = {}  # original_id -> claim token held by this service
+        self.links = {}   # original_id -> original link, for the dashboard summary
+        if self.creds and JOURNAL_ENABLED:
+            get_journal_syncer().start()  # replays whatever an earlier run left unsynced
+
+    async def _headers(self):
+        # Token refresh uses the blocking google-auth transport; keep it off the loop.
+        if not self.creds.valid:
+            await asyncio.to_thread(self.creds.refresh, google.auth.transport.requests.Request())
+        return {"Authorization": f"Bearer {self.creds.token}"}
+
+    async def _request(self, method, url, read_at=None, **kwargs):
+        """read_at: monotonic time the addressed row numbers were read (see _fenced); checked on every attempt."""
+        async def send():
+            if read_at is not None:
+                _check_fence(read_at)
+            response = await self.client.request(method, url, headers=await self._headers(), **kwargs)
+            response.raise_for_status()
+            return response
+        return await self.rate.acall('sheets', send)
+
+    async def _get_values(self, sheet_id, range_name, render="FORMATTED_VALUE"):
+        response = await self._request("GET", f"{SHEETS_API}/{sheet_id}/values/{range_name}",
+                                       params={"valueRenderOption": render})
+        return response.json().get('values', [])
+
+    async def _update_values(self, sheet_id, range_name, values):
+        await self._request(
+            "PUT",
+            f"{SHEETS_API}/{sheet_id}/values/{range_name}",
+            params={"valueInputOption": "USER_ENTERED"},
+            json={'values': values}
+        )
+
+    async def _claim_rows(self, sheet_id):
+        return _parse_claims(await self._get_values(sheet_id, CLAIM_RANGE, render="UNFORMATTED_VALUE"))
+
+    async def _write_rows(self, sheet_id, build):
+        """Async twin of SheetsService._write_rows."""
+        deadline = time.time() + ROW_LEASE_SECONDS
+        while True:
+            try:
+                response = await self._request("GET", f"{SHEETS_API}/{sheet_id}/values:batchGet",
+                                               params={"ranges": [CLAIM_RANGE, ROW_LEASE_RANGE], "valueRenderOption": "UNFORMATTED_VALUE"})
+                read_at = time.monotonic()
+                data = build(_parse_claims(_rows_with_lease(response.json().get('valueRanges', []))))
+                if data:
+                    await self._request(
+                        "POST",
+                        f"{SHEETS_API}/{sheet_id}/values:batchUpdate",
+                        read_at=read_at,
+                        json={'valueInputOption': 'USER_ENTERED', 'data': data}
+                    )
+                return data
+            except RowsMoving:
+                if time.time() >= deadline:
+                    raise
+                await asyncio.sleep(ROW_LEASE_POLL)
+
+    def _journal_start(self, sheet_id, original_id, claim_token, values):
+        """After a failed claim call, keep the row: the syncer appends it unless the append already landed."""
+        if JOURNAL_ENABLED and claim_token:
+            get_journal_syncer().record(sheet_id, 'start', {'values': values}, original_id, claim_token)
+            self.claims[original_id] = claim_token
+            self.links[original_id] = values[0][1]
+            get_lease_keeper().hold(sheet_id, claim_token)
+
+    async def log_processing_start(self, sheet_id, original_id, original_link, filename, timestamp_str=None):
+        """Claim the video for this runner (see SheetsService.log_processing_start)."""
+        if not self.creds: return True
+
+        if not timestamp_str:
+            timestamp_str = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        claim_token = values = None
+        try:
+            if _claim_winner(await self._claim_rows(sheet_id), original_id):
+                print(f"⏭️  {filename} is already claimed by another runner, skipping")
+                return False
+
+            claim_token, lease_expires = _new_claim()
+            values = _start_row_values(timestamp_str, original_id, original_link, filename, claim_token, lease_expires)
+            response = await self._request(
+                "POST",
+                f"{SHEETS_API}/{sheet_id}/values/{APPEND_RANGE}:append",
+                params={"valueInputOption": "USER_ENTERED", "insertDataOption": "INSERT_ROWS"},
+                json={'values': values}
+            )
+            row = _appended_row(response.json())
+
+            outcome = {}
+            await self._write_rows(sheet_id, lambda rows: _claim_marks(rows, original_id, claim_token, outcome))
+            winner = outcome['winner']
+            if winner and winner['claim'] != claim_token:
+                print(f"⏭️  Lost claim for {filename} to {winner['claim'] or 'an earlier row'}, skipping")
+                return False
+
+            self.claims[original_id] = claim_token
+            self.links[original_id] = original_link
+            get_lease_keeper().hold(sheet_id, claim_token)
+            print(f"🔒 Locked video {filename} in Sheet at Row {row} (claim {claim_token})")
+            return True
+        except Exception as e:
+            print(f"Error logging start to sheets: {e}")
+            self._journal_start(sheet_id, original_id, claim_token, values)
+            return True
+
+    async def update_log_completion(self, sheet_id, original_id, final_link, platforms, strategy_content, status="Completed", duration=None, stage_breakdown=None, stages=None):
+        """Find our claim row (or the last row with original_id) and update it with final details."""
+        if not self.creds: return
+
+        claim_token = self.claims.pop(original_id, None)
+        event = _summary_event(self.links, original_id, final_link, platforms, strategy_content, status, duration, stages)
+        if JOURNAL_ENABLED:
+            values = _completion_row_values(original_id, final_link, platforms, strategy_content, status, duration, stage_breakdown)
+            get_journal_syncer().record(sheet_id, 'completion', {'values': values, 'stage_breakdown': stage_breakdown},
+                                        original_id, claim_token)
+            if event:
+                get_journal_syncer().record(sheet_id, 'summary', event, original_id)
+            print(f"📝 Journaled {status} for {original_id}")
+            return
+
+        if claim_token:
+            get_lease_keeper().release(claim_token)
+        values = _completion_row_values(original_id, final_link, platforms, strategy_content, status, duration, stage_breakdown)
+        try:
+            data = await self._write_rows(sheet_id, lambda rows: _completion_update(rows, original_id, claim_token, values, stage_breakdown))
+        except Exception as e:
+            print(f"Error updating sheet: {e}")
+            return
+        if not data:
+            print(f"⚠️ Could not find row for {original_id} to update")
+            return
+        print(f"✅ Updated Sheet {data[0]['range']} directly w/ status {status}")
+
+        if event:
+            try:
+                # googleapiclient is blocking and not thread-safe: a private client on a worker thread
+                await asyncio.to_thread(lambda: update_dashboard_summary(build('sheets', 'v4', credentials=self.creds), sheet_id, [event]))
+            except Exception as e:
+                print(f"Error updating dashboard summary: {e}")
+
+    async def update_log_cells(self, sheet_id, original_id, cells):
+        """Write extra columns ({'L': value, ...}) on this video's row (our claim, else the last row for the ID)."""
+        if not self.creds or not cells: return
+        if JOURNAL_ENABLED:
+            get_journal_syncer().record(sheet_id, 'cells', {'cells': cells}, original_id, self.claims.get(original_id))
+            return
+
+        claim_token = self.claims.get(original_id)
+        try:
+            if not await self._write_rows(sheet_id, lambda rows: _cell_updates(rows, original_id, claim_token, cells)):
+                print(f"⚠️ Could not find row for {original_id} to update")
+        except Exception as e:
+            print(f"Error updating sheet cells: {e}")
+
+    async def get_content_index(self, sheet_id):
+        """Entries of the 'Content Index' tab ([] if the tab is missing or unreadable)."""
+        if not self.creds: return []
+
+        try:
+            return _parse_content_index(await self._get_values(sheet_id, CONTENT_INDEX_RANGE, render="UNFORMATTED_VALUE"))
+        except Exception as e:
+            print(f"Error reading content index: {e}")
+            return []
+
+    async def add_content_index(self, sheet_id, file, final_link, fingerprint=None):
+        """Record processed content so later re-uploads of it can be linked instead of reprocessed."""
+        if not self.creds: return
+
+        try:
+            await self._request(
+                "POST",
+                f"{SHEETS_API}/{sheet_id}/values/{CONTENT_INDEX_APPEND_RANGE}:append",
+                params={"valueInputOption": "RAW", "insertDataOption": "INSERT_ROWS"},
+                json={'values': _content_index_values(file, fingerprint, final_link)}
+            )
+        except Exception as e:
+            print(f"Error updating content index: {e}")
+
+    async def get_processed_ids(self, sheet_id):
+        """IDs that must not be started again: finished rows, claims whose lease is still live, and archived rows."""
+        if not self.creds: return []
+
+        try:
+            held, archived = await asyncio.gather(self._claim_rows(sheet_id), self._archived_ids(sheet_id))
+            return _held_ids(held) + archived
+        except Exception as e:
+            print(f"Error fetching IDs from sheets: {e}")
+            return []
+
+    async def _archived_ids(self, sheet_id):
+        try:
+            return _index_held_ids(await self._get_values(sheet_id, PROCESSED_INDEX_RANGE, render="UNFORMATTED_VALUE"))
+        except Exception:
+            return []  # no 'Processed Index' tab until the first archival
+
+    async def archive_rows(self, sheet_id):
+        """Move old finished rows to the archive tabs (see archive_finished_rows). Returns the number moved."""
+        if not self.creds: return 0
+
+        def run():
+            # googleapiclient is blocking and not thread-safe: a private client on a worker thread
+            with get_journal_syncer().sync_lock if JOURNAL_ENABLED else contextlib.nullcontext():
+                moved = archive_finished_rows(build('sheets', 'v4', credentials=self.creds), sheet_id)
+                if moved and JOURNAL_ENABLED:
+                    get_journal_syncer().invalidate_rows(sheet_id)
+                return moved
+        try:
+            return await asyncio.to_thread(run)
+        except Exception as e:
+            print(f"Error archiving sheet rows: {e}")
+            return 0
+
+    async def update_status(self, sheet_id, status_text, state="Processing"):
+        """Overwrite the current status in 'Backend Monitoring' (Col A=State, Col B=Message)."""
+        if not self.creds: return
+
+        timestamp = datetime.datetime.now().strftime("%H:%M:%S")
+        if JOURNAL_ENABLED:
+            get_journal_syncer().record(sheet_id, 'status', {'values': [[state, f"[{timestamp}] {status_text}"]]})
+            return
+        try:
+            await self._update_values(sheet_id, MONITOR_RANGE, [[state, f"[{timestamp}] {status_text}"]])
+        except Exception as e:
+            print(f"Error updating status: {e}")
+
+    async def aclose(self):
+        await self.client.aclose()
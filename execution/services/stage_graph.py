@@ -0,0 +1,127 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Threads for the off-thread stages of one video (Claude call, overlay image, cover frame)
+STAGE_WORKERS = 3
+
+
+class StageGraph:
+    """
+    The stages of one video and what each one needs, run with as much overlap as the dependencies allow.
+    Each stage is fn(results) -> value, where results holds the values of the stages finished so far.
+    Stages added with on_caller=True run on the calling thread (anything that talks to Drive or Sheets:
+    googleapiclient objects are not thread-safe), the others on a small thread pool, started the moment
+    their inputs are ready even while the caller is busy with a long stage.
+    The first stage that raises stops the graph: running stages finish, nothing new starts, the error is re-raised.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or STAGE_WORKERS
+        self.stages = {}  # name -> (fn, after, on_caller), in insertion order
+
+    def add(self, name, fn, after=(), on_caller=False):
+        for dependency in after:
+            if dependency not in self.stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dependency}'")
+        self.stages[name] = (fn, tuple(after), on_caller)
+        return self
+
+    def run(self):
+        results = {}
+        pending = dict(self.stages)
+        state = {'running': 0, 'error': None}
+        cond = threading.Condition()
+
+        def ready(name):
+            return all(dependency in results for dependency in pending[name][1])
+
+        def finish(name, value=None, error=None):
+            with cond:
+                if error is not None:
+                    state['error'] = state['error'] or error
+                else:
+                    results[name] = value
+                    submit_ready()
+                cond.notify_all()
+
+        def run_pooled(name, fn):
+            try:
+                value = fn(results)
+            except Exception as e:
+                finish(name, error=e)
+            else:
+                finish(name, value)
+            finally:
+                with cond:
+                    state['running'] -= 1
+                    cond.notify_all()
+
+        def submit_ready():
+            # Called with cond held
+            if state['error'] is not None:
+                return
+            for name in [n for n in pending if not pending[n][2] and ready(n)]:
+                fn = pending.pop(name)[0]
+                state['running'] += 1
+                pool.submit(run_pooled, name, fn)
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='stage') as pool:
+            with cond:
+                submit_ready()
+                while state['error'] is None and (pending or state['running']):
+                    name = next((n for n in pending if pending[n][2] and ready(n)), None)
+                    if name is None:
+                        cond.wait()
+                        continue
+                    fn = pending.pop(name)[0]
+                    cond.release()
+                    try:
+                        value = fn(results)
+                    except Exception as e:
+                        finish(name, error=e)
+                    else:
+                        finish(name, value)
+                    finally:
+                        cond.acquire()
+                # Let running stages finish before reporting the error
+                while state['running']:
+                    cond.wait()
+        if state['error'] is not None:
+            raise state['error']
+        return results
+
+
+class AsyncStageGraph(StageGraph):
+    """
+    StageGraph for the asyncio driver: each stage is an async fn(results), started as a task on the loop
+    the moment its inputs are ready. on_caller is accepted (render_stages wires both graphs the same way)
+    but has no effect: there is one thread, and stages that must not overlap say so in `after`.
+    """
+
+    async def run(self):
+        results = {}
+        pending = dict(self.stages)
+        running = {}  # task -> stage name
+        error = None
+        try:
+            while pending or running:
+                if error is None:
+                    for name in [n for n in pending if all(d in results for d in pending[n][1])]:
+                        running[asyncio.ensure_future(pending.pop(name)[0](results))] = name
+                if not running:
+                    break
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = running.pop(task)
+                    if task.exception() is not None:
+                        # Running stages finish, nothing new starts
+                        error = error or task.exception()
+                    else:
+                        results[name] = task.result()
+        finally:
+            for task in running:
+                task.cancel()
+        if error is not None:
+            raise error
+        return results
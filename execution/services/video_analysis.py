@@ -1,34 +1,70 @@
 import ffmpeg
 import json
+import asyncio
+
+
+def _metadata_from_probe(probe):
+    video_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'video'), None)
+    
+    if not video_stream:
+        return None
+        
+    width = int(video_stream['width'])
+    height = int(video_stream['height'])
+    duration = float(video_stream['duration'])
+    
+    # Frame rate ("30000/1001") for encode fps/speed metrics
+    try:
+        num, den = video_stream.get('avg_frame_rate', '0/1').split('/')
+        fps = float(num) / float(den) if float(den) else 0.0
+    except (ValueError, ZeroDivisionError):
+        fps = 0.0
+    
+    # Audio codecs decide whether renders can copy the audio (renderer.plan_audio)
+    audio_codecs = [stream.get('codec_name', '') for stream in probe['streams'] if stream['codec_type'] == 'audio']
+
+    # Determine orientation
+    orientation = "landscape" if width >= height else "portrait"
+    
+    # Determine length category
+    length_category = "short" if duration <= 180 else "long"
+    
+    return {
+        "width": width,
+        "height": height,
+        "duration": duration,
+        "fps": fps,
+        "audio_codecs": audio_codecs,
+        "orientation": orientation,
+        "length_category": length_category
+    }
+
 
 class VideoAnalyzer:
     @staticmethod
     def get_metadata(file_path):
         """Extract metadata from video file."""
         try:
-            probe = ffmpeg.probe(file_path)
-            video_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'video'), None)
-            
-            if not video_stream:
-                return None
-                
-            width = int(video_stream['width'])
-            height = int(video_stream['height'])
-            duration = float(video_stream['duration'])
-            
-            # Determine orientation
-            orientation = "landscape" if width >= height else "portrait"
-            
-            # Determine length category
-            length_category = "short" if duration <= 180 else "long"
-            
-            return {
-                "width": width,
-                "height": height,
-                "duration": duration,
-                "orientation": orientation,
-                "length_category": length_category
-            }
+            return _metadata_from_probe(ffmpeg.probe(file_path))
+        except Exception as e:
+            print(f"Error checking video metadata: {e}")
+            return None
+
+
+class AsyncVideoAnalyzer:
+    @staticmethod
+    async def get_metadata(file_path):
+        """Extract metadata from video file without blocking the event loop."""
+        try:
+            process = await asyncio.create_subprocess_exec(
+                'ffprobe', '-show_format', '-show_streams', '-of', 'json', file_path,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            stdout, stderr = await process.communicate()
+            if process.returncode != 0:
+                raise RuntimeError(stderr.decode(errors='replace')[-500:])
+            return _metadata_from_probe(json.loads(stdout))
         except Exception as e:
             print(f"Error checking video metadata: {e}")
             return None
@@ -0,0 +1,102 @@
+import os
+import re
+import shutil
+import tempfile
+import threading
+
+# Large intermediates (downloaded source, renders) live here
+WORKSPACE_DIR = os.getenv('WORKSPACE_DIR') or tempfile.gettempdir()
+# Small intermediates (subtitles, overlay PNG, audio, cover) go to tmpfs when there is room
+WORKSPACE_RAM_DIR = os.getenv('WORKSPACE_RAM_DIR', '/dev/shm')
+# Disk kept free for everything else on the machine
+DISK_RESERVE_BYTES = int(float(os.getenv('WORKSPACE_DISK_RESERVE_MB', '512')) * 1024 * 1024)
+# tmpfs kept free (Docker's default /dev/shm is only 64 MB)
+RAM_RESERVE_BYTES = int(float(os.getenv('WORKSPACE_RAM_RESERVE_MB', '16')) * 1024 * 1024)
+
+_active = set()
+_lock = threading.Lock()
+
+
+def expected_job_bytes(source_bytes, outputs=2):
+    """Disk a job needs: the downloaded source plus `outputs` renders of roughly source size."""
+    return int(source_bytes or 0) * (1 + outputs)
+
+
+def _dir_bytes(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def _outstanding_bytes():
+    """Disk already promised to admitted jobs but not yet written by them."""
+    return sum(max(0, ws.expected_bytes - _dir_bytes(ws.disk_dir)) for ws in _active)
+
+
+class JobWorkspace:
+    """
+    Isolated scratch space for one video. Large files go to a private directory under WORKSPACE_DIR,
+    small ones to tmpfs (WORKSPACE_RAM_DIR) when it is available and has room. Both are removed on close(),
+    so same-named uploads never collide and a crashed job leaves nothing in the working directory.
+    """
+
+    def __init__(self, job_id, expected_bytes=0):
+        self.job_id = re.sub(r'[^A-Za-z0-9_-]', '_', str(job_id))[:40]
+        self.expected_bytes = expected_bytes
+        self.disk_dir = None
+        self.ram_dir = None
+
+    def admit(self):
+        """
+        Reserve disk for the job and create its directories. Returns False (and creates nothing)
+        if free space minus what running jobs still need can't fit expected_bytes.
+        """
+        with _lock:
+            free = shutil.disk_usage(WORKSPACE_DIR).free - _outstanding_bytes()
+            if free - self.expected_bytes < DISK_RESERVE_BYTES:
+                return False
+            self.disk_dir = tempfile.mkdtemp(prefix=f"job_{self.job_id}_", dir=WORKSPACE_DIR)
+            _active.add(self)
+        if os.path.isdir(WORKSPACE_RAM_DIR) and os.access(WORKSPACE_RAM_DIR, os.W_OK):
+            try:
+                self.ram_dir = tempfile.mkdtemp(prefix=f"job_{self.job_id}_", dir=WORKSPACE_RAM_DIR)
+            except OSError:
+                self.ram_dir = None
+        return True
+
+    def path(self, name):
+        """Disk path for a large intermediate or output."""
+        return os.path.join(self.disk_dir, name)
+
+    def small_dir(self, expected_bytes=0):
+        """tmpfs directory if it can take expected_bytes more, else the disk directory."""
+        if self.ram_dir:
+            try:
+                if shutil.disk_usage(self.ram_dir).free - expected_bytes >= RAM_RESERVE_BYTES:
+                    return self.ram_dir
+            except OSError:
+                pass
+        return self.disk_dir
+
+    def small(self, name, expected_bytes=0):
+        """Path for a small intermediate (subtitles, overlay image, audio, cover)."""
+        return os.path.join(self.small_dir(expected_bytes), name)
+
+    def close(self):
+        with _lock:
+            _active.discard(self)
+        for directory in (self.ram_dir, self.disk_dir):
+            if directory and os.path.exists(directory):
+                shutil.rmtree(directory, ignore_errors=True)
+                print(f"🧹 Cleaned up: {directory}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
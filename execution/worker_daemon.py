@@ -0,0 +1,192 @@
+import os
+import json
+import time
+import queue
+import signal
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from main import build_services, load_config, process_video, select_pending_files
+from services.metrics import PipelineMetrics
+from services.sheets import flush_journal
+from services.rate_limiter import get_rate_controller
+
+# Seconds between Drive polls (a POST /poll wakes the poller early)
+POLL_INTERVAL = float(os.getenv('DAEMON_POLL_INTERVAL', '60'))
+# Videos processed in parallel; each worker owns its own warm set of services
+WORKERS = int(os.getenv('DAEMON_WORKERS', '1'))
+# Optional HTTP port for /healthz and /poll (Cloud Run sets PORT)
+HTTP_PORT = os.getenv('DAEMON_PORT') or os.getenv('PORT')
+# Seconds between archival passes over the 'Content Engine' tab (run only while no video is in flight)
+ARCHIVE_INTERVAL = float(os.getenv('DAEMON_ARCHIVE_INTERVAL', '21600'))
+
+
+class VideoDaemon:
+    """
+    Long-running engine: a poller fills an in-process job queue from the upload folder and
+    N worker threads drain it through main.process_video. Services are built once per thread
+    (googleapiclient objects are not thread-safe) and stay warm between videos.
+    """
+
+    def __init__(self, config, workers=None, poll_interval=None):
+        self.config = config
+        self.workers = max(1, workers or WORKERS)
+        self.poll_interval = POLL_INTERVAL if poll_interval is None else poll_interval
+        self.jobs = queue.Queue()
+        self.stopping = threading.Event()
+        self.wake = threading.Event()
+        self.lock = threading.Lock()
+        self.known_ids = set()  # queued or in flight, so repeated polls don't enqueue twice
+        self.stats = {'polls': 0, 'queued': 0, 'active': 0, 'processed': 0, 'failed': 0, 'skipped': 0, 'last_poll': None}
+        self.metrics = PipelineMetrics(rate_controller=get_rate_controller())
+        self.services = build_services()
+        self.threads = []
+        self.http = None
+        self.last_archive = 0
+
+    # --- intake ---
+    def poll(self):
+        """Enqueue uploads that are neither logged in the sheet nor already queued. Returns the count added."""
+        drive, sheets = self.services[0], self.services[4]
+        with self.lock:
+            idle = self.stats['active'] == 0 and self.jobs.empty()
+        # Archival shifts row numbers, so only while no claim row is being written
+        if idle and time.time() - self.last_archive >= ARCHIVE_INTERVAL:
+            sheets.archive_rows(self.config['sheet_id'])
+            self.last_archive = time.time()
+        processed_ids = sheets.get_processed_ids(self.config['sheet_id'])
+        if not isinstance(processed_ids, list):
+            processed_ids = []
+        files = drive.list_files(self.config['upload_folder_id'])
+        added = 0
+        with self.lock:
+            for file in select_pending_files(files, processed_ids):
+                if file['id'] in self.known_ids:
+                    continue
+                self.known_ids.add(file['id'])
+                self.jobs.put(file)
+                added += 1
+            self.stats['polls'] += 1
+            self.stats['queued'] = self.jobs.qsize()
+            self.stats['last_poll'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        if added:
+            print(f"📥 Queued {added} new videos ({self.jobs.qsize()} waiting)")
+        return added
+
+    # --- workers ---
+    def _worker(self, index):
+        services = build_services()
+        sheets = services[4]
+        while not self.stopping.is_set():
+            try:
+                file = self.jobs.get(timeout=1)
+            except queue.Empty:
+                continue
+            if self.stopping.is_set():
+                # Not claimed yet: leave it for the next run
+                break
+            with self.lock:
+                self.stats['active'] += 1
+                self.stats['queued'] = self.jobs.qsize()
+            result = False
+            try:
+                result = process_video(file, services, self.config, self.metrics)
+            except Exception as e:
+                print(f"❌ Worker {index} error on {file.get('name', 'unknown')}: {e}")
+            finally:
+                with self.lock:
+                    self.stats['active'] -= 1
+                    self.stats['skipped' if result is None else 'processed' if result else 'failed'] += 1
+                    self.known_ids.discard(file['id'])
+                    idle = self.stats['active'] == 0 and self.jobs.empty()
+                self.jobs.task_done()
+            if idle:
+                sheets.update_status(self.config['sheet_id'],
+                                     f"💤 Idle: {self.stats['processed']} processed, {self.stats['failed']} failed since start",
+                                     state="Idle")
+
+    # --- control ---
+    def request_stop(self, *_):
+        if self.stopping.is_set():
+            print("🛑 Second signal: exiting without waiting for in-flight videos")
+            os._exit(1)
+        print("🛑 Shutdown requested: finishing in-flight videos, no new work will start")
+        self.stopping.set()
+        self.wake.set()
+
+    def _start_http(self, port):
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _reply(self, code, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path.rstrip('/') in ('', '/healthz'):
+                    with daemon.lock:
+                        stats = dict(daemon.stats, stopping=daemon.stopping.is_set())
+                    self._reply(503 if stats['stopping'] else 200, stats)
+                else:
+                    self._reply(404, {'error': 'not found'})
+
+            def do_POST(self):
+                # e.g. a Drive push notification or a scheduler ping
+                if self.path.rstrip('/') == '/poll':
+                    daemon.wake.set()
+                    self._reply(202, {'status': 'poll scheduled'})
+                else:
+                    self._reply(404, {'error': 'not found'})
+
+            def log_message(self, *_):
+                pass
+
+        self.http = ThreadingHTTPServer(('0.0.0.0', int(port)), Handler)
+        threading.Thread(target=self.http.serve_forever, daemon=True).start()
+        print(f"🌐 Listening on :{port} (GET /healthz, POST /poll)")
+
+    def run(self, http_port=None):
+        signal.signal(signal.SIGTERM, self.request_stop)
+        signal.signal(signal.SIGINT, self.request_stop)
+        if http_port:
+            self._start_http(http_port)
+
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, args=(i,), name=f"worker-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        print(f"👷 {self.workers} workers started, polling every {self.poll_interval:.0f}s")
+
+        while not self.stopping.is_set():
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"⚠️  Poll failed: {e}")
+            self.wake.wait(self.poll_interval)
+            self.wake.clear()
+
+        for thread in self.threads:
+            thread.join()
+        if self.http:
+            self.http.shutdown()
+        flush_journal()
+        print(f"👋 Daemon stopped: {self.stats['processed']} processed, {self.stats['failed']} failed")
+        return 0
+
+
+def run_daemon():
+    """Entry point for `python execution/main.py --daemon`."""
+    print("🎬 Starting Video Content Engine (daemon mode)...")
+    try:
+        daemon = VideoDaemon(load_config())
+    except Exception as e:
+        print(f"💥 Could not start daemon: {e}")
+        return 1
+    return daemon.run(HTTP_PORT)
+
+
+if __name__ == "__main__":
+    raise SystemExit(run_daemon())
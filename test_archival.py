@@ -0,0 +1,148 @@
+import os
+import sys
+import time
+import threading
+
+# Add execution directory to path
+project_root = os.getcwd()
+sys.path.append(os.path.join(project_root, 'execution'))
+
+# Sheets quotas are not what this test is about
+os.environ.setdefault('RATE_LIMIT_SHEETS_RPS', '1000')
+os.environ.setdefault('RATE_LIMIT_SHEETS_BURST', '1000')
+
+import services.sheets as sheets
+from benchmarks.fakes import FakeSheetsBackend
+
+# Short windows so a test archival takes a second, not half a minute
+SETTINGS = {'SHEETS_ARCHIVER': True, 'JOURNAL_ENABLED': False, 'ROW_WRITE_WINDOW': 0.3, 'ROW_LEASE_DRAIN': 0.6,
+            'ROW_LEASE_POLL': 0.05}
+
+
+def with_settings(test):
+    def run():
+        saved = {name: getattr(sheets, name) for name in SETTINGS}
+        for name, value in SETTINGS.items():
+            setattr(sheets, name, value)
+        try:
+            test()
+        finally:
+            for name, value in saved.items():
+                setattr(sheets, name, value)
+    run.__name__ = test.__name__
+    return run
+
+
+def log_row(original_id, claim, status, timestamp="2020-01-01 00:00:00"):
+    values = sheets._start_row_values(timestamp, original_id, f"https://drive/{original_id}", f"{original_id}.mp4",
+                                      claim, int(time.time() + 600))[0]
+    values[4] = status
+    return values
+
+
+def new_backend():
+    """Three finished rows old enough to archive, then a video still being processed (row 5)."""
+    backend = FakeSheetsBackend()
+    backend.tabs['Content Engine'] += [log_row(f"old{i}", f"old/{i}", "Completed") for i in range(3)]
+    backend.tabs['Content Engine'].append(log_row('video', 'run/1', "Processing", "2026-01-01 00:00:00"))
+    return backend
+
+
+def new_service(backend):
+    service = sheets.SheetsService()
+    service.service = backend
+    return service
+
+
+def lease(backend):
+    return backend._read(sheets.ROW_LEASE_RANGE)
+
+
+def engine_rows(backend):
+    return [row[:14] for row in backend.tabs['Content Engine'][1:]]
+
+
+def archived_rows(backend):
+    return [row for tab, rows in backend.tabs.items() if tab.startswith("Archive ") for row in rows[1:]]
+
+
+def complete(service, build_rows):
+    """Write the video's completion through _write_rows, with build_rows run between the read and the write."""
+    values = sheets._completion_row_values('video', "https://drive/final", ["TikTok"], "TITLE: x", "Completed", "9.0s")
+
+    def build(rows):
+        build_rows()
+        return sheets._completion_update(rows, 'video', 'run/1', values, None)
+    return service._write_rows('sheet', build)
+
+
+@with_settings
+def test_write_waits_out_archival():
+    print("Testing a completion written while rows are being archived...")
+    backend = new_backend()
+    moved = []
+    archiver = threading.Thread(target=lambda: moved.append(sheets.archive_finished_rows(backend, 'sheet')))
+    archiver.start()
+    deadline = time.time() + 5
+    while not (lease(backend) and lease(backend)[0][0]) and time.time() < deadline:
+        time.sleep(0.01)
+
+    # The lease is live: the write backs off until the rows have moved, then lands on the video's new row
+    data = complete(new_service(backend), lambda: None)
+    archiver.join()
+    assert moved == [3], moved
+    assert data[0]['range'].startswith("'Content Engine'!C2:"), data
+    rows = engine_rows(backend)
+    assert len(rows) == 1 and rows[0][5] == 'video' and rows[0][4] == "Completed", rows
+    assert [row[5] for row in archived_rows(backend)] == ["old0", "old1", "old2"]
+    assert all(row[4] == "Completed" and row[2] != "https://drive/final" for row in archived_rows(backend))
+    print("✅ Completion waited for the lease and landed on the moved row")
+
+
+@with_settings
+def test_late_write_is_fenced():
+    print("Testing a write whose row numbers were read before archival started...")
+    backend = new_backend()
+    builds = []
+
+    def archive_during_first_build():
+        builds.append(len(engine_rows(backend)))
+        if len(builds) == 1:
+            # The rows were read with the video on row 5; archival runs to the end before the write is sent
+            assert sheets.archive_finished_rows(backend, 'sheet') == 3
+
+    data = complete(new_service(backend), archive_during_first_build)
+    # The stale write was refused past ROW_WRITE_WINDOW and re-read: nothing landed on row 5
+    assert builds == [4, 1], builds
+    assert data[0]['range'].startswith("'Content Engine'!C2:"), data
+    rows = engine_rows(backend)
+    assert len(rows) == 1 and rows[0][5] == 'video' and rows[0][4] == "Completed", rows
+    print("✅ Late write dropped by the fence and re-addressed")
+
+
+@with_settings
+def test_archival_stops_when_lease_is_taken():
+    print("Testing an archival whose lease is taken over during the drain...")
+    backend = new_backend()
+
+    def take_over():
+        deadline = time.time() + 5
+        while not (lease(backend) and lease(backend)[0][0]) and time.time() < deadline:
+            time.sleep(0.01)
+        backend._write(sheets.ROW_LEASE_RANGE, [["other-runner", int(time.time() + 600), "7"]])
+    thief = threading.Thread(target=take_over)
+    thief.start()
+    assert sheets.archive_finished_rows(backend, 'sheet') == 0
+    thief.join()
+
+    # Rows were copied but not deleted, and the other runner's lease is left alone
+    assert len(engine_rows(backend)) == 4
+    assert len(archived_rows(backend)) == 3
+    assert lease(backend)[0][0] == "other-runner", lease(backend)
+    print("✅ Archival left the rows in place and the lease to its new holder")
+
+
+if __name__ == "__main__":
+    test_write_waits_out_archival()
+    test_late_write_is_fenced()
+    test_archival_stops_when_lease_is_taken()
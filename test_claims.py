@@ -0,0 +1,103 @@
+import os
+import sys
+import time
+import threading
+
+# Add execution directory to path
+project_root = os.getcwd()
+sys.path.append(os.path.join(project_root, 'execution'))
+
+# Sheets quotas are not what this test is about
+os.environ.setdefault('RATE_LIMIT_SHEETS_RPS', '1000')
+os.environ.setdefault('RATE_LIMIT_SHEETS_BURST', '1000')
+
+import services.sheets as sheets
+from benchmarks.fakes import FakeSheetsBackend
+
+
+def new_service(backend):
+    service = sheets.SheetsService()
+    service.service = backend
+    return service
+
+
+def engine_rows(backend):
+    """(status, original ID, claim) of every log row."""
+    return [(row[4], row[5], row[9]) for row in backend.tabs['Content Engine'][1:]]
+
+
+def claim(service, original_id="video"):
+    return service.log_processing_start('sheet', original_id, "https://drive/original", f"{original_id}.mp4")
+
+
+def release_all(*services):
+    for service in services:
+        for claim_token in service.claims.values():
+            sheets.get_lease_keeper().release(claim_token)
+
+
+def test_concurrent_claims_have_one_winner():
+    print("Testing runners claiming the same video at once...")
+    runners = 3
+    backend = FakeSheetsBackend()
+    services = [new_service(backend) for _ in range(runners)]
+    results = [None] * runners
+
+    # Every runner passes the pre-check before any of them appends its claim
+    barrier = threading.Barrier(runners)
+    new_claim = sheets._new_claim
+
+    def claim_together():
+        barrier.wait(timeout=5)
+        return new_claim()
+
+    def run(i):
+        results[i] = claim(services[i])
+    sheets._new_claim = claim_together
+    try:
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(runners)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sheets._new_claim = new_claim
+    release_all(*services)
+
+    assert sorted(results) == [False, False, True], results
+    rows = engine_rows(backend)
+    winner = next(s for s, ok in zip(services, results) if ok).claims['video']
+    # The earliest appended row wins; every later one is marked 'Duplicate'
+    assert rows[0] == ("Processing", "video", winner), rows
+    assert [status for status, _, _ in rows[1:]] == [sheets.DUPLICATE_STATUS] * (runners - 1), rows
+
+    # A runner arriving afterwards stops at the pre-check without appending
+    assert claim(new_service(backend)) is False
+    assert len(engine_rows(backend)) == runners
+    print("✅ One claim won; the others were marked Duplicate")
+
+
+def test_expired_lease_is_reclaimed():
+    print("Testing a claim on a video whose runner crashed...")
+    backend = FakeSheetsBackend()
+    crashed = sheets._start_row_values("2026-01-01 00:00:00", 'video', "https://drive/original", "video.mp4",
+                                       "crashed/1", int(time.time() - 1))
+    live = sheets._start_row_values("2026-01-01 00:00:00", 'other', "https://drive/other", "other.mp4",
+                                    "busy/1", int(time.time() + 600))
+    backend.tabs['Content Engine'] += crashed + live
+
+    service = new_service(backend)
+    assert claim(service) is True
+    assert claim(service, 'other') is False  # a live lease still holds its video
+    release_all(service)
+
+    rows = engine_rows(backend)
+    assert rows[0] == (sheets.EXPIRED_STATUS, 'video', "crashed/1"), rows
+    assert rows[1] == ("Processing", 'other', "busy/1"), rows
+    assert rows[2] == ("Processing", 'video', service.claims['video']) and len(rows) == 3, rows
+    print("✅ Expired lease marked Lease Expired and the video reclaimed")
+
+
+if __name__ == "__main__":
+    test_concurrent_claims_have_one_winner()
+    test_expired_lease_is_reclaimed()
@@ -0,0 +1,83 @@
+import os
+import sys
+import threading
+
+# Add execution directory to path
+project_root = os.getcwd()
+sys.path.append(os.path.join(project_root, 'execution'))
+
+# Sheets quotas are not what this test is about
+os.environ.setdefault('RATE_LIMIT_SHEETS_RPS', '1000')
+os.environ.setdefault('RATE_LIMIT_SHEETS_BURST', '1000')
+
+import services.sheets as sheets
+from services.dashboard_summary import SUMMARY_TAB, SUMMARY_RANGE, completion_event, empty_summary, parse_summary, summary_values
+from benchmarks.fakes import FakeSheetsBackend
+
+
+class InterleavingSheets(FakeSheetsBackend):
+    """Holds the first writer between its summary read and its write until the second writer goes for the lock."""
+
+    def __init__(self):
+        super().__init__()
+        self.first_read = threading.Event()
+        self.second_tried = threading.Event()
+
+    def get(self, spreadsheetId=None, range=None, **kwargs):
+        request = super().get(spreadsheetId=spreadsheetId, range=range, **kwargs)
+        if range == SUMMARY_RANGE and threading.current_thread().name == 'writer-a':
+            fn = request.fn
+
+            def read_then_wait():
+                values = fn()
+                self.first_read.set()
+                self.second_tried.wait(timeout=5)
+                return values
+            request.fn = read_then_wait
+        return request
+
+    def batchUpdate(self, spreadsheetId=None, body=None, **kwargs):
+        if threading.current_thread().name == 'writer-b' and any(
+                r.get('addSheet', {}).get('properties', {}).get('title') == sheets.SUMMARY_LOCK_TAB for r in body.get('requests', [])):
+            self.second_tried.set()
+        return super().batchUpdate(spreadsheetId=spreadsheetId, body=body, **kwargs)
+
+
+def event(original_id, status="Completed"):
+    return completion_event(original_id, "https://drive/original", "https://drive/final", ["TikTok"],
+                            f"TITLE: {original_id}", status, "12.0s", {'burn_subtitles': 8.0})
+
+
+def test_interleaved_summary_writers():
+    print("Testing two runners updating the dashboard summary at once...")
+    sheets.SHEET_LOCK_POLL = 0.05
+    service = InterleavingSheets()
+    service.tabs[SUMMARY_TAB] = []
+    service._write(SUMMARY_RANGE, summary_values(empty_summary()))
+    errors = []
+
+    def writer(ev):
+        try:
+            sheets.update_dashboard_summary(service, 'sheet', [ev])
+        except Exception as e:
+            errors.append(e)
+
+    a = threading.Thread(target=writer, args=(event('video-a'),), name='writer-a')
+    b = threading.Thread(target=writer, args=(event('video-b', status="Failed"),), name='writer-b')
+    a.start()
+    assert service.first_read.wait(timeout=5)
+    b.start()
+    a.join(timeout=30)
+    b.join(timeout=30)
+
+    assert not errors, errors
+    assert service.second_tried.is_set()
+    summary = parse_summary(service._read(SUMMARY_RANGE))
+    assert summary['total'] == 2, summary
+    assert summary['completed'] == 1 and summary['failed'] == 1, summary
+    assert sheets.SUMMARY_LOCK_TAB not in service.tabs
+    print("✅ Both videos counted; the lock was released")
+
+
+if __name__ == "__main__":
+    test_interleaved_summary_writers()
@@ -0,0 +1,153 @@
+import os
+import sys
+import time
+import tempfile
+
+# Add execution directory to path
+project_root = os.getcwd()
+sys.path.append(os.path.join(project_root, 'execution'))
+
+# Sheets quotas are not what this test is about
+os.environ.setdefault('RATE_LIMIT_SHEETS_RPS', '1000')
+os.environ.setdefault('RATE_LIMIT_SHEETS_BURST', '1000')
+
+import services.sheets as sheets
+import services.journal as journal
+from services.journal import Journal
+from services.rate_limiter import get_rate_controller
+from benchmarks.fakes import FakeSheetsBackend, _http_error
+
+
+class RejectingBackend(FakeSheetsBackend):
+    """Answers value writes containing `rejected` with `status` (400: a bad entry, 503: an outage)."""
+
+    def __init__(self, rejected, status=400):
+        super().__init__()
+        self.rejected = rejected
+        self.status = status
+
+    def batchUpdate(self, spreadsheetId=None, body=None, **kwargs):
+        if self.rejected and any(self.rejected in map(str, sum(e['values'], [])) for e in (body or {}).get('data', [])):
+            raise _http_error(self.status, "Invalid value")
+        return super().batchUpdate(spreadsheetId=spreadsheetId, body=body, **kwargs)
+
+
+def new_syncer(backend):
+    syncer = sheets.JournalSyncer(journal=Journal(os.path.join(tempfile.mkdtemp(), 'journal.db')))
+    syncer.service = backend
+    return syncer
+
+
+def start_row(original_id, claim, status="Processing"):
+    values = sheets._start_row_values("2026-01-01 00:00:00", original_id, "https://drive/original", f"{original_id}.mp4",
+                                      claim, int(time.time() + 600))[0]
+    values[4] = status
+    return values
+
+
+def engine_rows(backend):
+    return backend.tabs['Content Engine'][1:]
+
+
+def record_completion(syncer, original_id, claim, status="Completed"):
+    values = sheets._completion_row_values(original_id, "https://drive/final", ["TikTok"], "TITLE: x", status, "9.0s")
+    syncer.record('sheet', 'completion', {'values': values, 'stage_breakdown': None}, original_id, claim)
+
+
+def test_completion_lands_on_claim_row():
+    print("Testing a journaled completion against cached rows that predate its claim...")
+    backend = FakeSheetsBackend()
+    syncer = new_syncer(backend)
+    syncer.start = lambda: None  # rounds are driven by the test
+    # An earlier run's reclaimed row for the same video, and another video's row
+    backend.tabs['Content Engine'] += [start_row('video', 'old/1', sheets.EXPIRED_STATUS), start_row('other', 'other/1')]
+
+    # A round for the other video caches the rows
+    syncer.record('sheet', 'cells', {'cells': {'L': 'variants'}}, 'other', 'other/1')
+    assert syncer.sync_once() == 1
+
+    # Our claim row lands after the cache was filled (direct claim append), then the completion is journaled
+    backend.tabs['Content Engine'].append(start_row('video', 'new/1'))
+    record_completion(syncer, 'video', 'new/1')
+    assert syncer.sync_once() == 1
+
+    stale, _, claimed = engine_rows(backend)
+    assert stale[4] == sheets.EXPIRED_STATUS and stale[2] == "Processing...", stale
+    assert claimed[4] == "Completed" and claimed[2] == "https://drive/final", claimed
+    print("✅ Completion written to the claim row; the expired row is untouched")
+
+
+def test_replay_is_idempotent():
+    print("Testing a replay of entries the sheet already took...")
+    backend = FakeSheetsBackend()
+    syncer = new_syncer(backend)
+    syncer.start = lambda: None
+    values = [start_row('video', 'run/1')]
+    syncer.record('sheet', 'start', {'values': values}, 'video', 'run/1')
+    record_completion(syncer, 'video', 'run/1')
+    syncer.record('sheet', 'cells', {'cells': {'N': 'https://drive/cover'}}, 'video', 'run/1')
+    assert syncer.sync_once() == 3
+    first = [list(r) for r in engine_rows(backend)]
+
+    # A crash before mark_synced: the same entries are pending again on the next start
+    syncer.record('sheet', 'start', {'values': values}, 'video', 'run/1')
+    record_completion(syncer, 'video', 'run/1')
+    syncer.record('sheet', 'cells', {'cells': {'N': 'https://drive/cover'}}, 'video', 'run/1')
+    assert syncer.sync_once() == 3
+
+    assert engine_rows(backend) == first, engine_rows(backend)
+    assert len(first) == 1 and first[0][4] == "Completed" and first[0][13] == "https://drive/cover", first
+    print("✅ Replaying the same entries left one finished row")
+
+
+def test_rejected_entry_is_capped():
+    print("Testing an entry the sheet keeps rejecting...")
+    backend = RejectingBackend("bad-link")
+    syncer = new_syncer(backend)
+    syncer.start = lambda: None
+    backend.tabs['Content Engine'] += [start_row('video', 'run/1'), start_row('other', 'other/1')]
+    syncer.record('sheet', 'cells', {'cells': {'N': 'bad-link'}}, 'video', 'run/1')
+    record_completion(syncer, 'other', 'other/1')
+
+    # The healthy entry is not held back by the rejected one, which is charged one attempt per round
+    max_attempts = journal.JOURNAL_MAX_ATTEMPTS
+    journal.JOURNAL_MAX_ATTEMPTS = 3
+    try:
+        assert syncer.sync_once() == 1
+        assert engine_rows(backend)[1][4] == "Completed", engine_rows(backend)
+        assert [e['attempts'] for e in syncer.journal.pending()] == [1]
+        for _ in range(2):
+            assert syncer.sync_once() == 0
+        assert syncer.journal.pending() == [] and syncer.journal.pending_count() == 0
+    finally:
+        journal.JOURNAL_MAX_ATTEMPTS = max_attempts
+    print("✅ Rejected entry dropped after JOURNAL_MAX_ATTEMPTS rounds; the healthy one synced")
+
+
+def test_outage_costs_no_attempts():
+    print("Testing rounds that fail while Sheets is down...")
+    backend = RejectingBackend("Completed", status=503)
+    syncer = new_syncer(backend)
+    syncer.start = lambda: None
+    backend.tabs['Content Engine'].append(start_row('video', 'run/1'))
+    record_completion(syncer, 'video', 'run/1')
+
+    rate = get_rate_controller()
+    max_attempts, rate.max_attempts = rate.max_attempts, 1  # no backoff sleeps in the test
+    try:
+        for _ in range(3):
+            assert syncer.sync_once() == 0
+    finally:
+        rate.max_attempts = max_attempts
+    assert [e['attempts'] for e in syncer.journal.pending()] == [0]
+    backend.rejected = None  # Sheets is back
+    assert syncer.sync_once() == 1
+    assert engine_rows(backend)[0][4] == "Completed", engine_rows(backend)
+    print("✅ Outage rounds left the entry pending with no attempts charged")
+
+
+if __name__ == "__main__":
+    test_completion_lands_on_claim_row()
+    test_replay_is_idempotent()
+    test_rejected_entry_is_capped()
+    test_outage_costs_no_attempts()
@@ -0,0 +1,85 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+
+# Add execution directory to path
+project_root = os.getcwd()
+sys.path.append(os.path.join(project_root, 'execution'))
+
+from main import render_stages
+from services.stage_graph import AsyncStageGraph
+
+
+def recording_steps(events, durations):
+    """Fake pipeline steps that log (name, 'start'/'end', thread) and sleep for their duration."""
+    def step(name):
+        def fn(results):
+            events.append((name, 'start', threading.current_thread() is threading.main_thread()))
+            time.sleep(durations.get(name, 0.01))
+            events.append((name, 'end', threading.current_thread() is threading.main_thread()))
+            return {'title': 'Test'} if name == 'strategy' else name
+        return fn
+    return {name: step(name) for name in ['subtitles', 'strategy', 'artifacts', 'artifacts_mirror', 'overlay_image',
+                                          'cover', 'preview', 'preview_upload', 'burn', 'intro_overlay']}
+
+
+def position(events, name, kind):
+    return next(i for i, e in enumerate(events) if e[0] == name and e[1] == kind)
+
+
+def test_preview_starts_before_burn():
+    print("Testing preview/burn ordering for a portrait short...")
+    events = []
+    steps = recording_steps(events, {'strategy': 0.2, 'burn': 0.2})
+    results = render_stages(steps, needs_intro=True).run()
+
+    assert results['strategy'] == {'title': 'Test'}
+    assert position(events, 'preview_upload', 'end') < position(events, 'burn', 'start'), events
+    assert position(events, 'burn', 'end') < position(events, 'intro_overlay', 'start'), events
+    # Renders stay on the caller
+    assert all(on_main for name, _, on_main in events if name in ('preview', 'burn', 'intro_overlay')), events
+    print("✅ Preview finished before the burn started")
+
+
+def test_artifacts_written_during_burn():
+    print("Testing artifact write timing without a preview...")
+    events = []
+    steps = recording_steps(events, {'strategy': 0.05, 'burn': 0.4})
+    del steps['preview'], steps['preview_upload']
+    render_stages(steps, needs_intro=False).run()
+
+    # The local write runs on a worker thread as soon as the strategy exists, not after the burn
+    assert position(events, 'artifacts', 'end') < position(events, 'burn', 'end'), events
+    assert not any(on_main for name, _, on_main in events if name == 'artifacts'), events
+    print("✅ Artifacts written while the burn was running")
+
+
+def test_async_graph_overlaps_preview_upload():
+    print("Testing the asyncio wiring of the same stages...")
+    events = []
+
+    def async_step(name, delay):
+        async def fn(results):
+            events.append((name, 'start', None))
+            await asyncio.sleep(delay)
+            events.append((name, 'end', None))
+            return {'title': 'Test'} if name == 'strategy' else name
+        return fn
+    delays = {'strategy': 0.05, 'preview_upload': 0.2, 'burn': 0.2}
+    steps = {name: async_step(name, delays.get(name, 0.01)) for name in recording_steps([], {})}
+    results = asyncio.run(render_stages(steps, needs_intro=True, graph=AsyncStageGraph()).run())
+
+    assert results['strategy'] == {'title': 'Test'}
+    assert position(events, 'preview', 'end') < position(events, 'burn', 'start'), events
+    # No caller thread to keep free: the upload runs while the burn does
+    assert position(events, 'burn', 'start') < position(events, 'preview_upload', 'end'), events
+    assert position(events, 'burn', 'end') < position(events, 'intro_overlay', 'start'), events
+    print("✅ Preview uploaded while the burn was running")
+
+
+if __name__ == "__main__":
+    test_preview_starts_before_burn()
+    test_artifacts_written_during_burn()
+    test_async_graph_overlaps_preview_upload()